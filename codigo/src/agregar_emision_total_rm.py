@@ -4,64 +4,42 @@ from __future__ import annotations
 
 import argparse
 import csv
-import unicodedata
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Optional
 
-import pandas as pd
+from ejecucion_por_archivo import agregar_argumento_jobs, ejecutar_por_archivo, reportar_fallos
+from esquema_retc import dtypes_lectura, escribir_esquema, inferir_tipos, leer_esquema
+from instrumentacion import agregar_argumento_profile, contar_filas, instrumentar
+from lectura_csv import leer_csv_etapa
+from numeros_retc import parse_numeric
 
-NA_VALUES = {"", "na", "nan", "none", "null"}
 SOURCE_OVERRIDE: Dict[str, str] = {
     "retc_2023_RM.csv": "emision_total",
 }
 DEFAULT_COLUMN = "cantidad_toneladas"
 
 
-def normalize_number(value: str | None) -> str | None:
-    if value is None:
-        return None
-    text = str(value).strip()
-    if text.lower() in NA_VALUES or text == "":
-        return None
-    norm = unicodedata.normalize("NFKC", text)
-    norm = norm.replace(" ", "")
-    if "," in norm and "." in norm:
-        norm = norm.replace(".", "")
-    norm = norm.replace(",", ".")
-    norm = norm.replace("·", "")
-    norm = norm.strip()
-    return norm or None
-
-
 def process_file(path: Path) -> None:
-    df = pd.read_csv(path, sep=';', dtype=str, encoding='utf-8', on_bad_lines='skip')
-    df.columns = [c.lstrip('\ufeff') for c in df.columns]
+    tipos = leer_esquema(path)
+    df = leer_csv_etapa(path, dtype=dtypes_lectura(path))
 
     source_col = SOURCE_OVERRIDE.get(path.name, DEFAULT_COLUMN)
     if source_col not in df.columns:
         raise KeyError(f"{path.name}: no se encuentra columna '{source_col}'")
 
-    emision_values = [normalize_number(val) for val in df[source_col]]
-
     # Consolida desde columnas de respaldo si la principal está vacía o "-"
     if 'emision_total' in df.columns:
         fallback_cols = ['emision_total', 'emision_primario', 'emision_combustible_primario']
     else:
         fallback_cols = ['emision_primario', 'emision_total', 'emision_combustible_primario']
+    fallback_cols = [col for col in fallback_cols if col in df.columns]
 
-    for idx, primary in enumerate(emision_values):
-        if primary not in (None, '-'):
-            continue
-        backup = None
-        row = df.iloc[idx]
-        for col in fallback_cols:
-            if col not in df.columns:
-                continue
-            candidate = normalize_number(row[col])
-            if candidate not in (None, '-'):
-                backup = candidate
-                break
-        emision_values[idx] = backup
+    # Con esquema numérico las columnas ya vienen como float y se usan tal cual
+    emision_values, invalidos = parse_numeric(df[source_col])
+    for col in fallback_cols:
+        emision_values = emision_values.fillna(parse_numeric(df[col])[0])
+    if invalidos.any():
+        print(f"[!] {path.name}: {int(invalidos.sum())} valores no numéricos en '{source_col}'")
 
     if 'emision_total' in df.columns:
         df.drop(columns=['emision_total'], inplace=True)
@@ -73,26 +51,35 @@ def process_file(path: Path) -> None:
         insert_idx = len(df.columns)
 
     df.insert(insert_idx, 'emision_total', emision_values)
+    contar_filas(entrada=len(df), salida=len(df))
 
     df.to_csv(path, index=False, sep=';', encoding='utf-8-sig', quoting=csv.QUOTE_NONE, escapechar='\\')
-    print(f"[✓] emision_total normalizada en {path.name}")
+    if tipos:
+        tipos.update(inferir_tipos(df[['emision_total']]))
+        escribir_esquema(path, tipos, len(df))
 
 
-def main() -> None:
+@instrumentar
+def main(argv: Optional[List[str]] = None) -> None:
     parser = argparse.ArgumentParser(description="Añade columna emision_total homogénea")
     parser.add_argument(
         "--indir",
         default="../data/interim/03_emisiones_rm_fusionadas",
         help="Carpeta con los CSV RM fusionados",
     )
-    args = parser.parse_args()
+    agregar_argumento_jobs(parser)
+    agregar_argumento_profile(parser)
+    args = parser.parse_args(argv)
 
     indir = Path(args.indir).expanduser().resolve()
     if not indir.is_dir():
         raise SystemExit(f"No se encontró el directorio: {indir}")
 
-    for csv_path in sorted(indir.glob('retc*_RM.csv')):
-        process_file(csv_path)
+    files = sorted(indir.glob('retc*_RM.csv'))
+    resultados, fallos = ejecutar_por_archivo(process_file, files, jobs=args.jobs)
+    for csv_path, _ in resultados:
+        print(f"[✓] emision_total normalizada en {csv_path.name}")
+    reportar_fallos(fallos)
 
     print("[✓] Columna emision_total creada/actualizada en todas las tablas")
 
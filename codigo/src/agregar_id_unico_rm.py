@@ -1,13 +1,51 @@
 #!/usr/bin/env python3
-"""Genera un `id_unico` secuencial por fila en cada tabla RM fusionada."""
+"""Genera un `id_unico` por fila en cada tabla RM fusionada.
+
+Modos (`--modo`):
+  - `secuencial` (por defecto): año del archivo + correlativo de 9 dígitos
+    según la posición de la fila (13 caracteres).
+  - `contenido`: año de la fila + 16 dígitos hexadecimales de un hash de las
+    columnas que identifican el registro (establecimiento, contaminante,
+    fuente y claves de emisión). Un registro sin cambios conserva su ID entre
+    ejecuciones aunque se agreguen, quiten o reordenen otras filas.
+"""
 from __future__ import annotations
 
 import argparse
+import hashlib
 from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
+
+from ejecucion_por_archivo import agregar_argumento_jobs, ejecutar_por_archivo, reportar_fallos
+from instrumentacion import agregar_argumento_profile, contar_filas, instrumentar
+from lectura_csv import leer_csv_etapa
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
 
-import pandas as pd
+SEQ_DIGITS = 9  # año + 9 dígitos (cero relleno) => 13 caracteres
+MODOS = ("secuencial", "contenido")
+SEPARADOR_CLAVE = "\x1f"  # separador de unidades ASCII: no aparece en los CSV
 
-ID_FORMAT = "{year}{seq:09d}"  # año + 9 dígitos (cero relleno) => 13 caracteres
+# Claves del modo `contenido`: en cada grupo se usa la primera columna presente.
+# Se prefieren columnas tal como vienen en la descarga (no las canónicas de la
+# etapa 03) para que el mismo registro reciba el mismo ID desde la etapa 01;
+# `diferencias_retc.py` depende de ello. La cantidad emitida no forma parte de
+# la clave, así un cambio de valor se detecta como fila modificada y no como
+# fila nueva.
+CLAVES_CONTENIDO: Tuple[Tuple[str, ...], ...] = (
+    ("año", "ano"),
+    ("id_vu", "id_establecimiento", "rut_razon_social", "nombre_establecimiento"),
+    ("contaminantes", "contaminante", "contaminante_canon"),
+    ("fuente_emisora_general", "tipo_fuente"),
+    ("id_fuente_emisora", "source_id", "codigo_fuente"),
+    ("combustible_primario",),
+    ("ccf8_primario",),
+    ("combustible_secundario",),
+    ("ccf8_secundario",),
+    ("ccf8_procesos",),
+)
 
 
 def year_from_path(path: Path) -> str:
@@ -21,33 +59,146 @@ def year_from_path(path: Path) -> str:
     raise ValueError(f"No se pudo inferir año desde el nombre {path.name}")
 
 
-def main() -> None:
+def sequential_ids(year: str, n: int) -> np.ndarray:
+    """`<año><correlativo>` calculado como entero y convertido a texto en bloque."""
+    import numpy as np
+
+    values = int(year) * 10**SEQ_DIGITS + np.arange(1, n + 1, dtype=np.int64)
+    return values.astype(str)
+
+
+def strip_values(series: pd.Series) -> pd.Series:
+    """`str.strip` aplicado una vez por valor distinto y no por fila."""
+    import pandas as pd
+
+    codes, uniques = pd.factorize(series.fillna(''), sort=False)
+    return pd.Series(pd.Index(uniques).str.strip().to_numpy()[codes], index=series.index)
+
+
+def key_frame(df: pd.DataFrame, groups: Sequence[Tuple[str, ...]] = CLAVES_CONTENIDO) -> pd.DataFrame:
+    import pandas as pd
+
+    keys = {}
+    for i, group in enumerate(groups):
+        col = next((c for c in group if c in df.columns), None)
+        keys[f"k{i}"] = strip_values(df[col]) if col else pd.Series('', index=df.index)
+    return pd.DataFrame(keys, index=df.index)
+
+
+def hash_textos(textos: pd.Series) -> np.ndarray:
+    """blake2b de 64 bits (uint64) de cada texto, calculado una vez por valor distinto.
+
+    A diferencia de `pd.util.hash_pandas_object`, el resultado depende sólo de
+    los bytes UTF-8 del texto y no de la versión de pandas, por lo que los IDs
+    guardados en disco siguen siendo válidos al actualizar dependencias.
+    """
+    import numpy as np
+    import pandas as pd
+
+    codes, uniques = pd.factorize(textos, sort=False)
+    digests = b''.join(hashlib.blake2b(v.encode('utf-8'), digest_size=8).digest() for v in uniques)
+    return np.frombuffer(digests, dtype='>u8').astype(np.uint64)[codes]
+
+
+def unir_columnas(df: pd.DataFrame) -> pd.Series:
+    """Valores de cada fila como texto unidos por `SEPARADOR_CLAVE`."""
+    textos = [df[col].astype(str) for col in df.columns]
+    return textos[0].str.cat(textos[1:], sep=SEPARADOR_CLAVE) if len(textos) > 1 else textos[0]
+
+
+def claves_distintas(df: pd.DataFrame) -> Tuple[np.ndarray, pd.Series]:
+    """(grupo de cada fila, texto unido de cada fila distinta).
+
+    Las filas se agrupan con los códigos enteros de cada columna y el texto se
+    arma sólo una vez por combinación distinta.
+    """
+    import numpy as np
+    import pandas as pd
+
+    grupo = np.zeros(len(df), dtype=np.int64)
+    for col in df.columns:
+        codigos, valores = pd.factorize(df[col], sort=False)
+        # combina con la columna anterior y renumera para no desbordar int64
+        grupo, _ = pd.factorize(grupo * len(valores) + codigos, sort=False)
+    _, primeras = np.unique(grupo, return_index=True)
+    return grupo, unir_columnas(df.iloc[primeras]).reset_index(drop=True)
+
+
+def hash_estable(df: pd.DataFrame) -> np.ndarray:
+    """Hash uint64 por fila de `df`, reproducible entre versiones de pandas."""
+    grupo, textos = claves_distintas(df)
+    return hash_textos(textos)[grupo]
+
+
+def content_ids(df: pd.DataFrame, default_year: str) -> np.ndarray:
+    """`<año><hash hex>` estable ante cambios en otras filas.
+
+    Las filas con claves idénticas se distinguen por su número de ocurrencia
+    (la primera usa sólo la clave), de modo que los duplicados exactos
+    también reciben IDs distintos.
+    """
+    import numpy as np
+    import pandas as pd
+
+    grupo, textos = claves_distintas(key_frame(df))
+    hashes = hash_textos(textos)[grupo]
+    occurrence = pd.Series(grupo).groupby(grupo, sort=False).cumcount().to_numpy()
+    repetidas = occurrence > 0
+    if repetidas.any():
+        claves = textos.iloc[grupo[repetidas]].reset_index(drop=True)
+        hashes[repetidas] = hash_textos(claves + SEPARADOR_CLAVE + pd.Series(occurrence[repetidas]).astype(str))
+    hex_ids = np.frombuffer(hashes.astype('>u8').tobytes().hex().encode('ascii'), dtype='S16').astype(str)
+
+    year_col = next((c for c in CLAVES_CONTENIDO[0] if c in df.columns), None)
+    if year_col is None:
+        return np.char.add(default_year, hex_ids)
+    codes, uniques = pd.factorize(strip_values(df[year_col]), sort=False)
+    uniques = pd.Index(uniques)
+    years = uniques.where(uniques.str.fullmatch(r'\d{4}'), default_year).to_numpy(dtype=str)[codes]
+    return np.char.add(years, hex_ids)
+
+
+def process_file(csv_path: Path, modo: str = "secuencial") -> None:
+    year = year_from_path(csv_path)
+    df = leer_csv_etapa(csv_path)
+
+    if 'id_unico' in df.columns:
+        df.drop(columns=['id_unico'], inplace=True)
+
+    ids = content_ids(df, year) if modo == "contenido" else sequential_ids(year, len(df))
+    df.insert(0, 'id_unico', ids)
+    contar_filas(entrada=len(df), salida=len(df))
+
+    df.to_csv(csv_path, index=False, sep=';', encoding='utf-8-sig', quoting=0, escapechar='\\')
+
+
+@instrumentar
+def main(argv: Optional[List[str]] = None) -> None:
     parser = argparse.ArgumentParser(description="Añade id_unico a tablas RM")
     parser.add_argument(
         "--indir",
         default="../data/interim/03_emisiones_rm_fusionadas",
         help="Carpeta con los CSV a actualizar",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--modo",
+        choices=MODOS,
+        default="secuencial",
+        help="secuencial: año + correlativo; contenido: año + hash estable de las claves del registro",
+    )
+    agregar_argumento_jobs(parser)
+    agregar_argumento_profile(parser)
+    args = parser.parse_args(argv)
 
     indir = Path(args.indir).expanduser().resolve()
     if not indir.is_dir():
         raise SystemExit(f"No se encontró el directorio: {indir}")
 
-    for csv_path in sorted(indir.glob('retc*_RM.csv')):
-        year = year_from_path(csv_path)
-        df = pd.read_csv(csv_path, sep=';', dtype=str, encoding='utf-8', on_bad_lines='skip')
-        df.columns = [c.lstrip('\ufeff') for c in df.columns]
-
-        if 'id_unico' in df.columns:
-            df.drop(columns=['id_unico'], inplace=True)
-
-        sequences = range(1, len(df) + 1)
-        ids = [ID_FORMAT.format(year=year, seq=seq) for seq in sequences]
-        df.insert(0, 'id_unico', ids)
-
-        df.to_csv(csv_path, index=False, sep=';', encoding='utf-8-sig', quoting=0, escapechar='\\')
+    files = sorted(indir.glob('retc*_RM.csv'))
+    resultados, fallos = ejecutar_por_archivo(process_file, files, args.modo, jobs=args.jobs)
+    for csv_path, _ in resultados:
         print(f"[✓] id_unico añadido en {csv_path.name}")
+    reportar_fallos(fallos)
 
     print("[✓] Todas las tablas cuentan con identificadores únicos")
 
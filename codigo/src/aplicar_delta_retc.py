@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""Aplica un delta de `diferencias_retc.py` a las salidas de las etapas 02–04.
+
+Sólo las filas agregadas o modificadas pasan por el filtro RM y por la
+estandarización de la etapa 03 (contaminantes, CIIU, comunas y emisión total).
+Luego, en cada etapa se quitan los registros eliminados o modificados según su
+`id_unico` de contenido y se agregan las filas nuevas:
+
+  - 02: `retc_<año>_RM.csv` (el `id_unico` se recalcula al leer),
+  - 03: la tabla fusionada que contiene el año (usa su columna `id_unico`,
+    por lo que debe generarse con `agregar_id_unico_rm.py --modo contenido`;
+    esto se verifica en las tablas 03 y el consolidado antes de escribir nada;
+    si las tablas tienen `id_establecimiento`, las filas nuevas se resuelven
+    junto a ellas con `resolver_establecimientos_rm.asignar_delta`),
+  - 04: el consolidado, leído por bloques.
+
+Al terminar, la carpeta de la etapa 01 puede reemplazarse por la de la
+publicación nueva.
+
+Uso:
+  python aplicar_delta_retc.py --delta ../data/interim/00_delta_retc
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import shutil
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+import agregar_emision_total_rm
+import estandarizar_ciiu_rm
+import estandarizar_contaminantes_rm
+import filtrar_region_metropolitana
+import normalizar_comunas_rm
+from agregar_id_unico_rm import content_ids
+from diferencias_retc import YEAR_FILE
+from esquema_retc import ruta_esquema, selector_columnas
+from fusionar_emisiones_consolidadas import CHUNK_ROWS, ensure_rut_column
+from fusionar_emisiones_por_grupo import GROUPS
+from instrumentacion import agregar_argumento_profile, contar_filas, instrumentar
+from lectura_csv import leer_csv_etapa
+from resolver_establecimientos_rm import ID_COL, asignar_delta, clave_registro
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+CONTENT_ID_LENGTH = 20  # año + 16 dígitos hexadecimales
+
+Delta = Dict[str, Tuple[Optional[Path], Set[str]]]
+
+
+def read_table(path: Path) -> pd.DataFrame:
+    return leer_csv_etapa(path)
+
+
+def write_table(df: pd.DataFrame, path: Path) -> None:
+    df.to_csv(path, index=False, sep=';', encoding='utf-8-sig', quoting=csv.QUOTE_NONE, escapechar='\\')
+
+
+def load_delta(delta_dir: Path) -> Delta:
+    """Por año: (CSV de filas nuevas/modificadas o None, IDs a quitar)."""
+    import pandas as pd
+
+    delta: Delta = {}
+    for path in sorted(delta_dir.glob("retc_*_claves.csv")):
+        year = YEAR_FILE.match(path.stem).group(1)
+        claves = pd.read_csv(path, sep=';', dtype=str, encoding='utf-8-sig')
+        remove = set(claves.loc[claves['cambio'] != 'agregada', 'id_unico'])
+        rows = delta_dir / f"retc_{year}_delta.csv"
+        delta[year] = (rows if rows.exists() else None, remove)
+    return delta
+
+
+def prepare_rows(year: str, rows_path: Path, workdir: Path, code_map: Dict[str, str]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Filtra y estandariza las filas del delta con las funciones de cada etapa.
+
+    Devuelve las filas tal como quedan en la etapa 02 y en la etapa 03.
+    """
+    import pandas as pd
+
+    # el nombre `retc_<año>.csv` conserva las reglas por archivo (p. ej. 2023 en emision_total)
+    year_dir = workdir / year
+    year_dir.mkdir()
+    stage01 = year_dir / f"retc_{year}.csv"
+    shutil.copyfile(rows_path, stage01)
+    if ruta_esquema(rows_path).exists():
+        shutil.copyfile(ruta_esquema(rows_path), ruta_esquema(stage01))
+
+    stage02 = filtrar_region_metropolitana.process_file(stage01, year_dir)
+    if stage02 is None:
+        return pd.DataFrame(), pd.DataFrame()
+    rows02 = read_table(stage02)
+
+    missing = estandarizar_contaminantes_rm.process_file(stage02, year_dir)
+    missing_ciiu, _ = estandarizar_ciiu_rm.process_file(stage02, year_dir, code_map)
+    missing_comunas = normalizar_comunas_rm.process_file(stage02, year_dir)
+    agregar_emision_total_rm.process_file(stage02)
+    for label, values in (("Contaminantes", missing), ("Códigos CIIU", missing_ciiu), ("Comunas", missing_comunas)):
+        if values:
+            print(f"[!] {year}: {label} sin mapeo: {', '.join(sorted(values))}")
+    return rows02, read_table(stage02)
+
+
+def replace_rows(df: pd.DataFrame, ids: pd.Series, remove: Set[str], rows: pd.DataFrame) -> pd.DataFrame:
+    import pandas as pd
+
+    kept = df[~ids.isin(remove).to_numpy()]
+    columns = list(df.columns) + [c for c in rows.columns if c not in df.columns]
+    if rows.empty:
+        return kept
+    return pd.concat([kept, rows], ignore_index=True).reindex(columns=columns)
+
+
+def update_stage02(dir02: Path, year: str, remove: Set[str], rows: pd.DataFrame) -> None:
+    import pandas as pd
+
+    path = dir02 / f"retc_{year}_RM.csv"
+    rows = rows.drop(columns=['id_unico'], errors='ignore')
+    if path.exists():
+        df = read_table(path)
+        ids = pd.Series(content_ids(df, year) if len(df) else [], dtype=str)
+    elif rows.empty:
+        return
+    else:
+        df, ids = rows.iloc[:0], pd.Series([], dtype=str)
+    result = replace_rows(df, ids, remove, rows)
+    write_table(result, path)
+    print(f"[✓] 02 {path.name}: {len(df)} -> {len(result)} filas")
+
+
+def group_label(year: str) -> str:
+    for label, years in GROUPS.items():
+        if int(year) in years:
+            return label
+    return year
+
+
+def check_content_ids(paths: List[Path]) -> None:
+    """Aborta antes de escribir si alguna tabla 03/04 existente no tiene `id_unico` de contenido.
+
+    Se verifica todo al inicio: si fallara al llegar a la etapa 03, la 02 ya
+    estaría actualizada y volver a ejecutar aplicaría el delta dos veces.
+    """
+    for path in paths:
+        if not path.exists():
+            continue
+        df = leer_csv_etapa(path, usecols=selector_columnas(['id_unico']))
+        if 'id_unico' not in df.columns or not df['id_unico'].str.len().eq(CONTENT_ID_LENGTH).all():
+            raise SystemExit(
+                f"{path.name} no tiene id_unico de contenido; ejecuta agregar_id_unico_rm.py --modo contenido "
+                "y vuelve a consolidar antes de aplicar el delta"
+            )
+
+
+def assign_establecimientos(dir03: Path, frames: List[pd.DataFrame]) -> None:
+    """Agrega `id_establecimiento` a las filas nuevas si las tablas 03 ya lo tienen."""
+    import pandas as pd
+
+    paths = sorted(dir03.glob('retc*_RM.csv'))
+    if not frames or not paths:
+        return
+    if ID_COL not in pd.read_csv(paths[0], sep=';', nrows=0, encoding='utf-8-sig').columns:
+        return
+    asignacion, cambian = asignar_delta(paths, pd.concat(frames, ignore_index=True))
+    for frame in frames:
+        frame[ID_COL] = asignacion.reindex(clave_registro(frame)).to_numpy()
+    if cambian:
+        print(
+            f"[!] {cambian} registros existentes cambian de {ID_COL} con las filas nuevas; "
+            "ejecuta `python retc.py pipeline --desde establecimientos` para actualizar 03 y 04"
+        )
+
+
+def update_stage03(dir03: Path, label: str, remove: Set[str], rows: pd.DataFrame) -> None:
+    path = dir03 / f"retc_{label}_RM.csv"
+    if not path.exists():
+        if rows.empty:
+            return
+        df = rows.iloc[:0]
+    else:
+        df = read_table(path)
+    result = replace_rows(df, df['id_unico'], remove, rows)
+    write_table(result, path)
+    print(f"[✓] 03 {path.name}: {len(df)} -> {len(result)} filas")
+
+
+def update_stage04(consolidado: Path, remove: Set[str], rows: pd.DataFrame, chunksize: int) -> None:
+    """Reescribe el consolidado conservando su encabezado.
+
+    Las columnas que agregan las etapas posteriores (coordenadas corregidas,
+    calidad, unidad de paisaje...) se mantienen en las filas existentes y
+    quedan vacías en las nuevas hasta volver a ejecutar esas etapas.
+    """
+    import pandas as pd
+
+    if not consolidado.exists():
+        print(f"[!] No existe {consolidado}; se omite la etapa 04")
+        return
+    header = list(pd.read_csv(consolidado, sep=';', nrows=0, encoding='utf-8-sig').columns)
+    tmp = consolidado.with_suffix('.tmp')
+    pd.DataFrame(columns=header).to_csv(tmp, index=False, sep=';', encoding='utf-8-sig')
+    before = after = 0
+    reader = pd.read_csv(consolidado, sep=';', dtype=str, encoding='utf-8-sig', chunksize=chunksize)
+    with reader:
+        for chunk in reader:
+            before += len(chunk)
+            chunk = chunk.loc[~chunk['id_unico'].isin(remove)].copy()
+            chunk.to_csv(tmp, mode='a', header=False, index=False, sep=';', encoding='utf-8')
+            after += len(chunk)
+    if not rows.empty:
+        nuevas = ensure_rut_column(rows.copy()).reindex(columns=header)
+        nuevas.to_csv(tmp, mode='a', header=False, index=False, sep=';', encoding='utf-8')
+        after += len(nuevas)
+    tmp.replace(consolidado)
+    print(f"[✓] 04 {consolidado.name}: {before} -> {after} filas")
+
+
+@instrumentar
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Aplica un delta RETC a las etapas 02–04")
+    parser.add_argument("--delta", default="../data/interim/00_delta_retc", help="Salida de diferencias_retc.py")
+    parser.add_argument("--dir02", default="../data/interim/02_emisiones_por_ano_rm", help="CSV RM por año")
+    parser.add_argument("--dir03", default="../data/interim/03_emisiones_rm_fusionadas", help="Tablas RM fusionadas")
+    parser.add_argument(
+        "--consolidado",
+        default="../data/interim/04_emisiones_consolidadas/retc_RM_consolidado.csv",
+        help="Consolidado RM de la etapa 04",
+    )
+    parser.add_argument(
+        "--metadata",
+        default=str(estandarizar_ciiu_rm.METADATA_PATH),
+        help="Ruta del CSV con códigos CIIU normalizados",
+    )
+    parser.add_argument("--chunksize", type=int, default=CHUNK_ROWS, help="Filas por bloque al reescribir la etapa 04")
+    agregar_argumento_profile(parser)
+    args = parser.parse_args(argv)
+
+    import pandas as pd
+
+    delta_dir = Path(args.delta).expanduser().resolve()
+    dir02 = Path(args.dir02).expanduser().resolve()
+    dir03 = Path(args.dir03).expanduser().resolve()
+    metadata_path = Path(args.metadata).expanduser().resolve()
+    if not delta_dir.is_dir():
+        raise SystemExit(f"No se encontró el delta: {delta_dir}")
+    if not metadata_path.exists():
+        raise SystemExit(f"No se encuentra el metadata de CIIU: {metadata_path}")
+
+    delta = load_delta(delta_dir)
+    if not delta:
+        print("[=] El delta no contiene cambios")
+        return
+    consolidado = Path(args.consolidado).expanduser().resolve()
+    labels = sorted({group_label(year) for year in delta})
+    check_content_ids([dir03 / f"retc_{label}_RM.csv" for label in labels] + [consolidado])
+    code_map = estandarizar_ciiu_rm.load_ciiu_mapping(metadata_path)
+
+    groups: Dict[str, Tuple[Set[str], List[pd.DataFrame]]] = {}
+    remove_all: Set[str] = set()
+    rows_all: List[pd.DataFrame] = []
+    with tempfile.TemporaryDirectory(prefix="retc_delta_") as tmp:
+        for year, (rows_path, remove) in delta.items():
+            rows02 = rows03 = pd.DataFrame()
+            if rows_path is not None:
+                rows02, rows03 = prepare_rows(year, rows_path, Path(tmp), code_map)
+            update_stage02(dir02, year, remove, rows02)
+
+            group_remove, group_rows = groups.setdefault(group_label(year), (set(), []))
+            group_remove.update(remove)
+            if not rows03.empty:
+                group_rows.append(rows03)
+                rows_all.append(rows03)
+            remove_all.update(remove)
+
+    assign_establecimientos(dir03, rows_all)
+    for label, (remove, frames) in groups.items():
+        rows = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        update_stage03(dir03, label, remove, rows)
+
+    rows = pd.concat(rows_all, ignore_index=True) if rows_all else pd.DataFrame()
+    update_stage04(consolidado, remove_all, rows, args.chunksize)
+    contar_filas(entrada=len(remove_all), salida=len(rows))
+    print("[✓] Delta aplicado en las etapas 02–04")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,81 @@
 #!/usr/bin/env python3
-"""Asigna unidades de paisaje a las emisiones consolidadas según lat/lon."""
+"""Asigna unidades de paisaje a las emisiones consolidadas según lat/lon.
+
+Las coordenadas pasan antes por `calidad_coordenadas.evaluar_coordenadas`: las
+filas rechazadas (sin coordenadas, no numéricas, cero o fuera de la caja de la
+RM) no se prueban y quedan sin unidad, y las corregidas se prueban con la
+coordenada corregida. El código de cada fila queda en `calidad_coordenadas`.
+
+Por defecto usa `sjoin` (prueba `within` por punto) sobre la capa cargada con
+`capas_geo.cargar_capa`, que guarda una copia GeoParquet ya reproyectada. Con `--grilla` clasifica
+los puntos con la grilla precalculada de `grilla_poligonos.py`, guardada
+junto al GPKG y recalculada sólo si la capa cambia.
+"""
 from __future__ import annotations
 
 import argparse
 from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional
 
-import geopandas as gpd
-import pandas as pd
-from shapely.geometry import Point
+from calidad_coordenadas import CALIDAD_COL, evaluar_coordenadas, informar_calidad
+from capas_geo import cargar_capa
+from grilla_poligonos import RESOLUCION_M, GrillaPoligonos
+from instrumentacion import agregar_argumento_profile, contar_filas, instrumentar
+from lectura_csv import leer_csv_etapa
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
 
 DEFAULT_CONSOLIDADO = "../data/interim/04_emisiones_consolidadas/retc_RM_consolidado.csv"
 DEFAULT_Polygons = "../geo/insumos/UnidadesPaisajeRM/unidades-paisaje-V1.gpkg"
 
-LAT_COLS = ["latitud_nueva", "latitud"]
-LON_COLS = ["longitud_nueva", "longitud"]
 
+def assign_with_grid(df: pd.DataFrame, polygons_path: Path, resolution: float,
+                     lon: np.ndarray, lat: np.ndarray) -> pd.Series:
+    import pandas as pd
+
+    grid = GrillaPoligonos.desde_capa(polygons_path, "Nombre", resolution)
+    return pd.Series(grid.nombres_de(lon, lat), index=df.index)
+
+
+def assign_with_sjoin(df: pd.DataFrame, polygons_path: Path, unidad_col: str,
+                      lon: np.ndarray, lat: np.ndarray) -> pd.DataFrame:
+    # sólo las filas con coordenadas aceptadas pasan por la prueba `within`
+    import geopandas as gpd
+    import numpy as np
+    import pandas as pd
+
+    filas = np.flatnonzero(~np.isnan(lon))
+    gdf_points = gpd.GeoDataFrame(
+        {'_fila': filas},
+        geometry=gpd.points_from_xy(lon[filas], lat[filas]),
+        crs='EPSG:4326',
+    )
 
-def coalesce(series, fallbacks):
-    for col in fallbacks:
-        if col in series and pd.notna(series[col]):
-            val = series[col]
-            if isinstance(val, str) and val.strip():
-                return val.strip()
-    return None
+    gdf_polygons = cargar_capa(polygons_path)
 
+    gdf_joined = gpd.sjoin(gdf_points, gdf_polygons[['Nombre', 'geometry']], how='left', predicate='within')
 
-def build_geometry(row):
-    lat = coalesce(row, LAT_COLS)
-    lon = coalesce(row, LON_COLS)
-    if lat is None or lon is None:
-        return None
-    try:
-        return Point(float(lon), float(lat))  # lon, lat
-    except (TypeError, ValueError):
-        return None
+    # con polígonos solapados la fila se repite, como en el sjoin sobre el consolidado completo
+    asignadas = pd.DataFrame({'_fila': np.arange(len(df))}).merge(
+        pd.DataFrame(gdf_joined[['_fila', 'Nombre']]), on='_fila', how='left'
+    )
+    df_result = df.iloc[asignadas['_fila'].to_numpy()].reset_index(drop=True)
+    df_result[unidad_col] = asignadas['Nombre'].to_numpy(dtype=object)
+    return df_result
 
 
-def main() -> None:
+@instrumentar
+def main(argv: Optional[List[str]] = None) -> None:
     parser = argparse.ArgumentParser(description="Intersección con unidades del paisaje")
     parser.add_argument("--consolidado", default=DEFAULT_CONSOLIDADO, help="CSV consolidado RM")
     parser.add_argument("--poligonos", default=DEFAULT_Polygons, help="GPKG de unidades del paisaje")
     parser.add_argument("--unidad-col", default="unidad_paisaje", help="Nombre de la columna de salida")
-    args = parser.parse_args()
+    parser.add_argument("--grilla", action="store_true", help="Clasificar con la grilla precalculada de la capa")
+    parser.add_argument("--resolucion", type=float, default=RESOLUCION_M, help="Tamaño de celda de la grilla (m)")
+    agregar_argumento_profile(parser)
+    args = parser.parse_args(argv)
 
     consolidado_path = Path(args.consolidado).expanduser().resolve()
     polygons_path = Path(args.poligonos).expanduser().resolve()
@@ -51,27 +85,18 @@ def main() -> None:
     if not polygons_path.exists():
         raise SystemExit(f"No se encontró el archivo de polígonos: {polygons_path}")
 
-    df = pd.read_csv(consolidado_path, sep=';', dtype=str, encoding='utf-8', on_bad_lines='skip')
-    df.columns = [c.lstrip('\ufeff') for c in df.columns]
+    df = leer_csv_etapa(consolidado_path)
+    lon, lat, calidad = evaluar_coordenadas(df)
+    informar_calidad(df, calidad)
+    df[CALIDAD_COL] = calidad
 
-    df['geometry'] = df.apply(build_geometry, axis=1)
-    gdf_points = gpd.GeoDataFrame(df, geometry='geometry', crs='EPSG:4326')
-
-    gdf_polygons = gpd.read_file(polygons_path)
-    if gdf_polygons.crs is None:
-        gdf_polygons = gdf_polygons.set_crs('EPSG:4326')
+    if args.grilla:
+        df_result = df.copy()
+        df_result[args.unidad_col] = assign_with_grid(df, polygons_path, args.resolucion, lon, lat)
     else:
-        gdf_polygons = gdf_polygons.to_crs('EPSG:4326')
-
-    gdf_joined = gpd.sjoin(gdf_points, gdf_polygons[['Nombre', 'geometry']], how='left', op='within')
-
-    df_result = pd.DataFrame(gdf_joined.drop(columns=['index_right']))
-    df_result.rename(columns={'Nombre': args.unidad_col}, inplace=True)
-
-    if args.unidad_col not in df_result.columns:
-        df_result[args.unidad_col] = None
+        df_result = assign_with_sjoin(df, polygons_path, args.unidad_col, lon, lat)
 
-    df_result.drop(columns=['geometry'], inplace=True)
+    contar_filas(entrada=len(df), salida=len(df_result))
     df_result.to_csv(consolidado_path, index=False, sep=';', encoding='utf-8-sig')
     print(f"[✓] Unidades del paisaje asignadas en {consolidado_path}")
 
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""Control de calidad vectorizado de las coordenadas frente a la caja de la RM.
+
+Antes de construir geometrías, cada fila recibe un código en
+`calidad_coordenadas` y, si corresponde, la coordenada corregida:
+
+  - `ok`: dentro de `RM_BBOX` tal como viene,
+  - `corregida_coma`: sólo es un número con coma decimal (`-33,45`),
+  - `corregida_signo`: dentro de la caja al hacer negativas latitud y longitud,
+  - `corregida_intercambio`: latitud y longitud estaban intercambiadas (con o
+    sin signo),
+  - `corregida_escala`: se perdió el punto decimal (`-3345678` -> `-33.45678`),
+    con o sin intercambio,
+  - `sin_coordenadas`, `no_numerica`, `cero`, `fuera_rm`: rechazadas; quedan
+    como NaN y no pasan por las pruebas espaciales.
+
+Las correcciones se prueban en ese orden y se usa la primera que cae dentro de
+la caja. Las coordenadas se toman de `latitud_nueva`/`longitud_nueva` o, si
+faltan, de `latitud`/`longitud`.
+
+Como script, informa los conteos por año y los guarda en
+`outputs/tablas/resumenes/LBP_AIRE_<fecha>_calidad_coordenadas_por_ano.csv`:
+
+  python calidad_coordenadas.py --consolidado ../data/interim/04_emisiones_consolidadas/retc_RM_consolidado.csv
+"""
+from __future__ import annotations
+
+import argparse
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+from instrumentacion import agregar_argumento_profile, contar_filas, instrumentar
+from lectura_csv import leer_csv_etapa
+from numeros_retc import parse_numeric
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+LAT_COLS = ["latitud_nueva", "latitud"]
+LON_COLS = ["longitud_nueva", "longitud"]
+YEAR_COL = "año"
+
+# (lon_min, lat_min, lon_max, lat_max) de la Región Metropolitana, con ~5 km de margen
+RM_BBOX = (-71.77, -34.34, -69.71, -32.87)
+
+ACEPTADAS = ["ok", "corregida_coma", "corregida_signo", "corregida_intercambio", "corregida_escala"]
+RECHAZADAS = ["sin_coordenadas", "no_numerica", "cero", "fuera_rm"]
+CALIDAD_COL = "calidad_coordenadas"
+
+
+def coalesce_columns(df: pd.DataFrame, fallbacks: List[str]) -> pd.Series:
+    """Primer texto no vacío entre `fallbacks` (None si no hay)."""
+    import pandas as pd
+
+    result = pd.Series(None, index=df.index, dtype=object)
+    for col in fallbacks:
+        if col in df.columns:
+            text = df[col].astype(object).where(df[col].notna()).str.strip()
+            result = result.where(result.notna(), text.where(text != ""))
+    return result
+
+
+def _escalar(valores: np.ndarray) -> np.ndarray:
+    # deja dos dígitos enteros (33.x, 70.x) a los valores que perdieron el punto decimal
+    import numpy as np
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        digitos = np.floor(np.log10(np.abs(valores)))
+        return np.where(digitos >= 2, valores / 10.0 ** (digitos - 1), valores)
+
+
+def _en_caja(lat: np.ndarray, lon: np.ndarray, bbox) -> np.ndarray:
+    import numpy as np
+
+    lon_min, lat_min, lon_max, lat_max = bbox
+    with np.errstate(invalid="ignore"):
+        return (lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max)
+
+
+def evaluar_coordenadas(df: pd.DataFrame, bbox=RM_BBOX) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(lon, lat, calidad) por fila; lon/lat corregidas o NaN si se rechazan."""
+    import numpy as np
+    import pandas as pd
+
+    textos = {"lat": coalesce_columns(df, LAT_COLS), "lon": coalesce_columns(df, LON_COLS)}
+    numeros, con_coma = {}, np.zeros(len(df), dtype=bool)
+    for eje, texto in textos.items():
+        numeros[eje] = parse_numeric(texto)[0].to_numpy(dtype="float64")
+        estricto = pd.to_numeric(texto, errors="coerce").to_numpy(dtype="float64")
+        con_coma |= np.isnan(estricto) & ~np.isnan(numeros[eje])
+    lat, lon = numeros["lat"], numeros["lon"]
+
+    calidad = np.full(len(df), "fuera_rm", dtype=object)
+    lat_out = np.full(len(df), np.nan)
+    lon_out = np.full(len(df), np.nan)
+    pendientes = ~(np.isnan(lat) | np.isnan(lon)) & (lat != 0) & (lon != 0)
+
+    candidatos = [
+        ("ok", lat, lon),
+        ("corregida_signo", -np.abs(lat), -np.abs(lon)),
+        ("corregida_intercambio", lon, lat),
+        ("corregida_intercambio", -np.abs(lon), -np.abs(lat)),
+        ("corregida_escala", -np.abs(_escalar(lat)), -np.abs(_escalar(lon))),
+        ("corregida_escala", -np.abs(_escalar(lon)), -np.abs(_escalar(lat))),
+    ]
+    for codigo, cand_lat, cand_lon in candidatos:
+        acepta = pendientes & _en_caja(cand_lat, cand_lon, bbox)
+        calidad[acepta] = codigo
+        lat_out[acepta] = cand_lat[acepta]
+        lon_out[acepta] = cand_lon[acepta]
+        pendientes &= ~acepta
+
+    calidad[(calidad == "ok") & con_coma] = "corregida_coma"
+    calidad[(lat == 0) | (lon == 0)] = "cero"
+    faltan = textos["lat"].isna().to_numpy() | textos["lon"].isna().to_numpy()
+    calidad[~faltan & (np.isnan(lat) | np.isnan(lon))] = "no_numerica"
+    calidad[faltan] = "sin_coordenadas"
+    return lon_out, lat_out, calidad
+
+
+def resumen_por_ano(df: pd.DataFrame, calidad: np.ndarray) -> pd.DataFrame:
+    """Filas por año y código de calidad (columnas en el orden de ACEPTADAS + RECHAZADAS)."""
+    import pandas as pd
+
+    years = df[YEAR_COL].astype(object).fillna("") if YEAR_COL in df.columns else pd.Series("", index=df.index)
+    tabla = pd.crosstab(years.rename(YEAR_COL), pd.Series(calidad, index=df.index, name=CALIDAD_COL))
+    return tabla.reindex(columns=ACEPTADAS + RECHAZADAS, fill_value=0)
+
+
+def informar_calidad(df: pd.DataFrame, calidad: np.ndarray) -> pd.DataFrame:
+    """Imprime los conteos de calidad (total y por año, si hay correcciones o rechazos)."""
+    import pandas as pd
+
+    tabla = resumen_por_ano(df, calidad)
+    totales = tabla.sum()
+    aceptadas = int(totales[ACEPTADAS].sum())
+    detalle = ", ".join(f"{codigo}={int(n)}" for codigo, n in totales.items() if n and codigo != "ok")
+    print(f"[i] Coordenadas: {aceptadas}/{len(df)} utilizables" + (f" ({detalle})" if detalle else ""))
+    if int(totales.sum()) != int(totales["ok"]):
+        with pd.option_context("display.width", 200, "display.max_columns", None):
+            print(tabla[tabla.columns[tabla.sum() > 0]].to_string())
+    return tabla
+
+
+def resolve_output(default_dir: Path, explicit: Optional[str]) -> Path:
+    if explicit:
+        return Path(explicit).expanduser().resolve()
+    today = datetime.now().strftime("%Y%m%d")
+    default_dir.mkdir(parents=True, exist_ok=True)
+    return default_dir / f"LBP_AIRE_{today}_calidad_coordenadas_por_ano.csv"
+
+
+@instrumentar
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Calidad de coordenadas frente a la caja de la RM, por año")
+    parser.add_argument(
+        "--consolidado",
+        default="../data/interim/04_emisiones_consolidadas/retc_RM_consolidado.csv",
+        help="CSV consolidado RM",
+    )
+    parser.add_argument(
+        "--out",
+        default=None,
+        help="CSV de conteos (por defecto outputs/tablas/resumenes/LBP_AIRE_<fecha>_calidad_coordenadas_por_ano.csv)",
+    )
+    agregar_argumento_profile(parser)
+    args = parser.parse_args(argv)
+
+    consolidado_path = Path(args.consolidado).expanduser().resolve()
+    if not consolidado_path.exists():
+        raise SystemExit(f"No se encontró el consolidado: {consolidado_path}")
+
+    columnas = set(LAT_COLS + LON_COLS + [YEAR_COL])
+    df = leer_csv_etapa(consolidado_path, usecols=lambda c: c in columnas)
+    _, _, calidad = evaluar_coordenadas(df)
+    tabla = informar_calidad(df, calidad)
+
+    out_path = resolve_output(Path(__file__).resolve().parents[2] / "outputs" / "tablas" / "resumenes", args.out)
+    tabla.reset_index().to_csv(out_path, index=False, encoding="utf-8-sig")
+    contar_filas(entrada=len(df), salida=len(tabla))
+    print(f"[✓] Conteos por año en {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Carga de capas de polígonos con caché GeoParquet en EPSG:4326.
+
+`gpd.read_file` sobre un GPKG y la reproyección a EPSG:4326 se repetían en
+cada ejecución de los scripts geoespaciales. `cargar_capa` lo hace una vez y
+guarda junto a la capa:
+
+  - `<capa>.4326.parquet`: copia reproyectada, con geometrías inválidas
+    reparadas (`make_valid`) y sin geometrías vacías,
+  - `<capa>.4326.json`: hash SHA-256 de la capa original con que se generó.
+
+Mientras el hash coincida, las ejecuciones siguientes leen el GeoParquet. Sin
+pyarrow (`pip install pyarrow`) la capa se lee del original en cada ejecución,
+como antes.
+
+`indice_capa` devuelve el STRtree de la capa con las geometrías preparadas
+(`shapely.prepare`), que es lo que usan las pruebas `within`. El índice se
+construye en memoria al cargar (no es serializable), pero a partir de la
+copia ya reproyectada y validada.
+
+Desde los notebooks (`notebooks/20_geoespacial/`):
+
+    import sys; sys.path.append("../../codigo/src")
+    from pathlib import Path
+    from capas_geo import cargar_capa
+    capa = cargar_capa(Path("../../geo/insumos/UnidadesPaisajeRM/unidades-paisaje-V1.gpkg"))
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from functools import lru_cache
+from pathlib import Path
+
+CRS_CAPAS = "EPSG:4326"
+
+
+def hash_archivo(path: Path) -> str:
+    """SHA-256 del archivo; se calcula una vez por proceso mientras no cambie."""
+    estado = path.stat()
+    return _hash(str(path.resolve()), estado.st_mtime_ns, estado.st_size)
+
+
+@lru_cache(maxsize=None)
+def _hash(path: str, mtime_ns: int, size: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for bloque in iter(lambda: fh.read(1 << 24), b""):
+            digest.update(bloque)
+    return digest.hexdigest()
+
+
+def ruta_cache(capa: Path) -> Path:
+    return capa.with_name(f"{capa.stem}.4326.parquet")
+
+
+def ruta_firma(capa: Path) -> Path:
+    return capa.with_name(f"{capa.stem}.4326.json")
+
+
+def _preparar(gdf):
+    import shapely
+
+    gdf = gdf.set_crs(CRS_CAPAS) if gdf.crs is None else gdf.to_crs(CRS_CAPAS)
+    geometrias = gdf.geometry.to_numpy()
+    invalidas = ~shapely.is_valid(geometrias)
+    if invalidas.any():
+        print(f"[i] {int(invalidas.sum())} geometrías inválidas reparadas con make_valid")
+        gdf.loc[invalidas, gdf.geometry.name] = shapely.make_valid(geometrias[invalidas])
+    return gdf[~gdf.geometry.is_empty & gdf.geometry.notna()].reset_index(drop=True)
+
+
+def cargar_capa(capa: Path):
+    """GeoDataFrame de `capa` en EPSG:4326, desde la caché si está vigente."""
+    import geopandas as gpd
+
+    try:
+        import pyarrow  # noqa: F401  (requerido por to_parquet/read_parquet)
+    except ImportError:
+        return _preparar(gpd.read_file(capa))
+
+    firma = {"sha256": hash_archivo(capa), "crs": CRS_CAPAS}
+    cache = ruta_cache(capa)
+    firma_path = ruta_firma(capa)
+    if cache.exists() and firma_path.exists():
+        if json.loads(firma_path.read_text(encoding="utf-8")) == firma:
+            return gpd.read_parquet(cache)
+        print(f"[i] {capa.name} cambió; se regenera {cache.name}")
+
+    gdf = _preparar(gpd.read_file(capa))
+    gdf.to_parquet(cache, index=False)
+    firma_path.write_text(json.dumps(firma, indent=2), encoding="utf-8")
+    print(f"[✓] Caché de {capa.name}: {cache}")
+    return gdf
+
+
+def indice_capa(geometrias):
+    """STRtree de `geometrias` (p. ej. `gdf.geometry.to_numpy()`), preparadas para las pruebas de predicado."""
+    import shapely
+
+    shapely.prepare(geometrias)
+    return shapely.STRtree(geometrias)
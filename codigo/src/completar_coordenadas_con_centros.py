@@ -1,13 +1,26 @@
 #!/usr/bin/env python3
-"""Completa latitud/longitud en el consolidado usando centros comunales."""
+"""Completa latitud/longitud en el consolidado usando centros comunales.
+
+`latitud_nueva`/`longitud_nueva` conservan la coordenada original cuando es
+numérica y, si falta o no es un número, toman el centro de la comuna. Con
+`--sidecar` sólo se escriben `id_unico`, `latitud_nueva` y `longitud_nueva` en
+un CSV aparte (por defecto `<consolidado>.coordenadas.csv`) en lugar de
+reescribir el consolidado completo.
+"""
 from __future__ import annotations
 
 import argparse
 from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional
 
-import pandas as pd
+from instrumentacion import agregar_argumento_profile, contar_filas, instrumentar
+from lectura_csv import leer_csv_etapa
+from numeros_retc import parse_numeric
 
-NA_VALUES = {"", "na", "nan", "none", "null"}
+if TYPE_CHECKING:
+    import pandas as pd
+
+COORD_COLUMNS = ['id_unico', 'comuna', 'latitud', 'longitud']
 
 
 def normalize(text: str | None) -> str:
@@ -26,17 +39,54 @@ def normalize(text: str | None) -> str:
 
 
 def load_centers(path: Path) -> pd.DataFrame:
+    import pandas as pd
+
     df = pd.read_csv(path, dtype=str, encoding='utf-8')
     df['key'] = df['comuna'].map(normalize)
     df.rename(columns={'latitud': 'latitud_centro', 'longitud': 'longitud_centro'}, inplace=True)
-    return df
+    return df.drop_duplicates('key').set_index('key')
+
+
+def sidecar_path(consolidado_path: Path) -> Path:
+    return consolidado_path.with_name(f"{consolidado_path.stem}.coordenadas.csv")
+
+
+def complete_coordinates(df: pd.DataFrame, centros: pd.DataFrame) -> pd.DataFrame:
+    """Columnas `latitud_nueva`/`longitud_nueva` alineadas con `df`."""
+    import pandas as pd
 
+    # normalización y búsqueda del centro una vez por comuna distinta
+    codes, comunas = pd.factorize(df['comuna'].astype(object))
+    keys = pd.Index([normalize(c) for c in comunas])
+    result = pd.DataFrame(index=df.index)
+    for col in ('latitud', 'longitud'):
+        centro = centros[f'{col}_centro'].reindex(keys).to_numpy(dtype=object)
+        por_fila = pd.Series(None, index=df.index, dtype=object)
+        presentes = codes >= 0
+        por_fila[presentes] = centro[codes[presentes]]
+        if col in df.columns:
+            original = df[col].astype(object)
+            por_fila = original.where(parse_numeric(original)[0].notna(), por_fila)
+        result[f'{col}_nueva'] = por_fila
+    return result
 
-def main() -> None:
+
+@instrumentar
+def main(argv: Optional[List[str]] = None) -> None:
     parser = argparse.ArgumentParser(description="Completa coordenadas faltantes usando centros comunales")
     parser.add_argument('--centros', default='../data/raw/comunas/comunas_rm_centros.csv')
     parser.add_argument('--consolidado', default='../data/interim/04_emisiones_consolidadas/retc_RM_consolidado.csv')
-    args = parser.parse_args()
+    parser.add_argument(
+        '--sidecar',
+        nargs='?',
+        const=True,
+        default=None,
+        help='Escribir sólo id_unico y las coordenadas nuevas en este CSV (por defecto <consolidado>.coordenadas.csv)',
+    )
+    agregar_argumento_profile(parser)
+    args = parser.parse_args(argv)
+
+    import pandas as pd
 
     centros_path = Path(args.centros).expanduser().resolve()
     consolidado_path = Path(args.consolidado).expanduser().resolve()
@@ -47,22 +97,23 @@ def main() -> None:
         raise SystemExit(f'No se encuentra {consolidado_path}')
 
     centros = load_centers(centros_path)
-    df = pd.read_csv(consolidado_path, sep=';', dtype=str, encoding='utf-8', on_bad_lines='skip')
-    df['key_comuna'] = df['comuna'].map(normalize)
-
-    df = df.merge(centros[['key', 'latitud_centro', 'longitud_centro']], how='left', left_on='key_comuna', right_on='key')
-    df.drop(columns=['key'], inplace=True)
-
-    def choose(original, centro):
-        if pd.isna(original) or original.strip() in NA_VALUES:
-            return centro
-        return original
-
-    df['latitud_nueva'] = [choose(o, c) for o, c in zip(df.get('latitud', []), df['latitud_centro'])]
-    df['longitud_nueva'] = [choose(o, c) for o, c in zip(df.get('longitud', []), df['longitud_centro'])]
-
-    df.drop(columns=['latitud_centro', 'longitud_centro', 'key_comuna'], inplace=True)
-
+    if args.sidecar:
+        out_path = sidecar_path(consolidado_path) if args.sidecar is True else Path(args.sidecar).expanduser().resolve()
+        df = leer_csv_etapa(consolidado_path, usecols=lambda c: c in COORD_COLUMNS)
+        if 'id_unico' not in df.columns:
+            raise SystemExit(f'{consolidado_path.name} no tiene id_unico; ejecuta agregar_id_unico_rm.py')
+        nuevas = pd.concat([df[['id_unico']], complete_coordinates(df, centros)], axis=1)
+        contar_filas(entrada=len(df), salida=len(nuevas))
+        nuevas.to_csv(out_path, index=False, sep=';', encoding='utf-8-sig')
+        print(f'[✓] Coordenadas completadas en {out_path}')
+        return
+
+    df = leer_csv_etapa(consolidado_path)
+    nuevas = complete_coordinates(df, centros)
+    for col in nuevas.columns:
+        df[col] = nuevas[col]
+
+    contar_filas(entrada=len(df), salida=len(df))
     df.to_csv(consolidado_path, index=False, sep=';', encoding='utf-8-sig')
     print(f'[✓] Coordenadas completadas en {consolidado_path}')
 
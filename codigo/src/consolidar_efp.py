@@ -7,6 +7,8 @@ Consolida archivos EFP filtrados por RM en dos bloques:
   - 2019–2022 (EFP v2 con CIIU6, tipo/combustibles, emisiones)
 
 Luego une ambos en un consolidado 2005–2022 (rellenando columnas faltantes con vacío).
+Los esquemas se calculan sólo con los encabezados y cada archivo se lee una vez,
+por bloques, escribiendo a la vez en su tabla de años y en el consolidado.
 
 Pensado para ejecutarse desde `src/`.
 Lee de:   ../data/interim/filtrados_region/CSV
@@ -19,13 +21,25 @@ Uso:
 Opcionales:
   --indir  ../data/interim/filtrados_region/CSV
   --outbase EFP_RM   (prefijo para nombres de salida)
+  --chunksize 200000 (filas por bloque de lectura)
 """
 import argparse
 from pathlib import Path
-import pandas as pd
-
-def load_csv(path):
-    return pd.read_csv(path, dtype=str, encoding='utf-8', keep_default_na=False, na_values=[])
+from typing import Dict, List
+
+from instrumentacion import agregar_argumento_profile, instrumentar
+from union_esquemas import (
+    CHUNK_ROWS,
+    EntradaUnion,
+    SalidaUnion,
+    columnas_entrada,
+    escribir_union,
+    esquema_union,
+    leer_encabezado,
+)
+
+# Vacíos tal como vienen (no convertir "NA", "null", etc.)
+READ_OPTIONS = {'keep_default_na': False, 'na_values': []}
 
 RENAMES_COMMON = {
     'contaminante': 'contaminantes',
@@ -55,19 +69,23 @@ ORDER_2019_2022 = [
     'sistema'
 ]
 
-def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.rename(columns={c: str(c).strip() for c in df.columns})
-    for old, new in RENAMES_COMMON.items():
-        if old in df.columns and new not in df.columns:
-            df = df.rename(columns={old: new})
-    return df
+def column_renames(columns: List[str]) -> Dict[str, str]:
+    """Nombre original -> nombre normalizado (sin espacios y con RENAMES_COMMON)."""
+    renames = {}
+    stripped = [c.strip() for c in columns]
+    for original, name in zip(columns, stripped):
+        new = RENAMES_COMMON.get(name)
+        if new is not None and new not in stripped:
+            name = new
+        if name != original:
+            renames[original] = name
+    return renames
+
+def block_input(path: Path) -> EntradaUnion:
+    return EntradaUnion(path, column_renames(leer_encabezado(path)))
 
-def keep_and_order(df: pd.DataFrame, order: list) -> pd.DataFrame:
-    for c in order:
-        if c not in df.columns:
-            df[c] = ""
-    extras = [c for c in df.columns if c not in order]
-    return df[order + extras]
+def block_columns(inputs: List[EntradaUnion], order: list) -> list:
+    return esquema_union(order, *(columnas_entrada(e) for e in inputs))
 
 def collect_files(indir: Path, years):
     files = []
@@ -77,14 +95,8 @@ def collect_files(indir: Path, years):
             files.append(p)
     return files
 
-def concat_save(dfs, out_csv):
-    if not dfs:
-        return None
-    out = pd.concat(dfs, ignore_index=True)
-    out.to_csv(out_csv, index=False, encoding='utf-8-sig')
-    return out
-
-def main():
+@instrumentar
+def main(argv=None):
     ap = argparse.ArgumentParser()
     ap.add_argument(
         '--indir',
@@ -92,7 +104,9 @@ def main():
         help='Carpeta con CSV filtrados (RM)',
     )
     ap.add_argument('--outbase', default='EFP_RM', help='Prefijo para nombres de salida')
-    args = ap.parse_args()
+    ap.add_argument('--chunksize', type=int, default=CHUNK_ROWS, help='Filas por bloque de lectura')
+    agregar_argumento_profile(ap)
+    args = ap.parse_args(argv)
 
     indir = Path(args.indir).resolve()
     outdir = indir
@@ -103,36 +117,28 @@ def main():
     files_2005_2018 = collect_files(indir, y_2005_2018)
     files_2019_2022 = collect_files(indir, y_2019_2022)
 
-    dfs_2005_2018 = []
-    for f in files_2005_2018:
-        df = load_csv(f)
-        df = normalize_columns(df)
-        df = keep_and_order(df, ORDER_2005_2018)
-        dfs_2005_2018.append(df)
-
-    dfs_2019_2022 = []
-    for f in files_2019_2022:
-        df = load_csv(f)
-        df = normalize_columns(df)
-        df = keep_and_order(df, ORDER_2019_2022)
-        dfs_2019_2022.append(df)
+    inputs_2005_2018 = [block_input(f) for f in files_2005_2018]
+    inputs_2019_2022 = [block_input(f) for f in files_2019_2022]
+    cols_2005_2018 = block_columns(inputs_2005_2018, ORDER_2005_2018)
+    cols_2019_2022 = block_columns(inputs_2019_2022, ORDER_2019_2022)
 
     out_2005_2018 = outdir / f"{args.outbase}_2005_2018_consolidado.csv"
     out_2019_2022 = outdir / f"{args.outbase}_2019_2022_consolidado.csv"
-    c1 = concat_save(dfs_2005_2018, out_2005_2018)
-    c2 = concat_save(dfs_2019_2022, out_2019_2022)
-
-    if c1 is not None and c2 is not None:
-        all_cols = list(dict.fromkeys(list(c1.columns) + list(c2.columns)))
-        for df in (c1, c2):
-            for c in all_cols:
-                if c not in df.columns:
-                    df[c] = ""
-        c1 = c1[all_cols]
-        c2 = c2[all_cols]
-        combined = pd.concat([c1, c2], ignore_index=True)
+    outputs = []
+    if inputs_2005_2018:
+        outputs.append(SalidaUnion(out_2005_2018, cols_2005_2018, inputs_2005_2018))
+    if inputs_2019_2022:
+        outputs.append(SalidaUnion(out_2019_2022, cols_2019_2022, inputs_2019_2022))
+    if inputs_2005_2018 and inputs_2019_2022:
         out_both = outdir / f"{args.outbase}_2005_2022_consolidado.csv"
-        combined.to_csv(out_both, index=False, encoding='utf-8-sig')
+        outputs.append(
+            SalidaUnion(
+                out_both,
+                esquema_union(cols_2005_2018, cols_2019_2022),
+                inputs_2005_2018 + inputs_2019_2022,
+            )
+        )
+    escribir_union(outputs, chunksize=args.chunksize, **READ_OPTIONS)
 
     print("[✓] Consolidación lista.")
     print("  -", out_2005_2018 if files_2005_2018 else "(sin archivos 2005–2018)")
@@ -7,6 +7,9 @@ Consolida EFP 2005–2022 + RUEA 2023 desde una carpeta dada.
   renombres triviales para equiparar conceptos y una columna `fuente_esquema`.
 - Modo `minimo`: proyecta ambos a un set común mínimo (comparabilidad 2005–2023).
 
+El esquema de salida se calcula con los encabezados y ambos archivos se copian
+por bloques a la salida, sin cargarlos completos en memoria.
+
 Uso típico:
   python consolidar_global_2005_2023.py \
       --indir "../outputs/tablas/retc_consolidados/RETConsolidado_original"
@@ -16,21 +19,31 @@ Opcionales:
   --efp-name EFP_RM_2005_2022_consolidado.csv
   --r23-name ruea-efp-2023-ckan_RM.csv
   --out    nombre_de_salida.csv      (si no se indica, se infiere según el modo)
+  --chunksize 200000                 (filas por bloque de lectura)
 """
 import argparse
 from pathlib import Path
-import pandas as pd
+from typing import List
+
+from instrumentacion import agregar_argumento_profile, instrumentar
+from lectura_csv import detectar_encoding
+from union_esquemas import (
+    CHUNK_ROWS,
+    EntradaUnion,
+    SalidaUnion,
+    columnas_entrada,
+    escribir_union,
+    esquema_union,
+)
 
 # -----------------------------
 # Utilidades de carga
 # -----------------------------
 
-def read_csv_any(path: Path) -> pd.DataFrame:
-    # intenta utf-8, luego latin-1
-    try:
-        return pd.read_csv(path, dtype=str, encoding="utf-8")
-    except Exception:
-        return pd.read_csv(path, dtype=str, encoding="latin-1")
+def file_encoding(path: Path) -> str:
+    encoding, origen = detectar_encoding(path)
+    print(f"[i] {path.name}: encoding {encoding} ({origen})")
+    return encoding
 
 # -----------------------------
 # Renombres canónicos
@@ -64,45 +77,33 @@ CANON_EQUIV = [
 ]
 
 
-def ensure_columns(df: pd.DataFrame, cols: list) -> pd.DataFrame:
-    for c in cols:
-        if c not in df.columns:
-            df[c] = ""
-    return df
-
-
-def consolidate_full(df_efp: pd.DataFrame, df_r23: pd.DataFrame) -> pd.DataFrame:
-    # Renombres triviales
-    df_r23 = df_r23.rename(columns={k:v for k,v in RENAME_MAP_R23.items() if k in df_r23.columns})
-    df_efp = df_efp.rename(columns={k:v for k,v in RENAME_MAP_EFP.items() if k in df_efp.columns})
+def present_renames(columns: List[str], renames: dict) -> dict:
+    return {k: v for k, v in renames.items() if k in columns}
 
-    # Asegurar columnas canónicas
-    df_efp = ensure_columns(df_efp, CANON_EQUIV)
-    df_r23 = ensure_columns(df_r23, CANON_EQUIV)
 
-    # Marcar procedencia
-    df_efp["fuente_esquema"] = "EFP"
-    df_r23["fuente_esquema"] = "RUEA2023"
+def full_inputs(efp_path: Path, r23_path: Path):
+    """Entradas y columnas de salida del modo `full`."""
+    inputs = []
+    for path, renames, label in ((efp_path, RENAME_MAP_EFP, "EFP"), (r23_path, RENAME_MAP_R23, "RUEA2023")):
+        encoding = file_encoding(path)
+        entrada = EntradaUnion(path, {}, {"fuente_esquema": label}, encoding)
+        header = columnas_entrada(entrada)
+        entrada = entrada._replace(renombres=present_renames(header, renames))
+        inputs.append((entrada, esquema_union(columnas_entrada(entrada), CANON_EQUIV, ["fuente_esquema"])))
+    columns = esquema_union(*(cols for _, cols in inputs))
+    return [entrada for entrada, _ in inputs], columns
 
-    # Unión por superconjunto de columnas
-    all_cols = list(dict.fromkeys(df_efp.columns.tolist() + df_r23.columns.tolist()))
-    for df in (df_efp, df_r23):
-        for c in all_cols:
-            if c not in df.columns:
-                df[c] = ""
-    df_efp = df_efp[all_cols]
-    df_r23 = df_r23[all_cols]
-    return pd.concat([df_efp, df_r23], ignore_index=True)
 
+def min_inputs(efp_path: Path, r23_path: Path):
+    """Entradas y columnas de salida del modo `minimo` (sólo R23 se renombra)."""
+    efp = EntradaUnion(efp_path, encoding=file_encoding(efp_path))
+    r23 = EntradaUnion(r23_path, encoding=file_encoding(r23_path))
+    r23 = r23._replace(renombres=present_renames(columnas_entrada(r23), RENAME_MAP_R23))
+    return [efp, r23], list(MIN_COMMON)
 
-def consolidate_min(df_efp: pd.DataFrame, df_r23: pd.DataFrame) -> pd.DataFrame:
-    df_r23 = df_r23.rename(columns={k:v for k,v in RENAME_MAP_R23.items() if k in df_r23.columns})
-    df_efp = ensure_columns(df_efp, MIN_COMMON)
-    df_r23 = ensure_columns(df_r23, MIN_COMMON)
-    return pd.concat([df_efp[MIN_COMMON], df_r23[MIN_COMMON]], ignore_index=True)
 
-
-def main():
+@instrumentar
+def main(argv=None):
     ap = argparse.ArgumentParser(description="Consolida EFP_2005_2022 + RUEA_2023")
     ap.add_argument(
         "--indir",
@@ -113,7 +114,9 @@ def main():
     ap.add_argument("--r23-name", dest="r23_name", default="ruea-efp-2023-ckan_RM.csv")
     ap.add_argument("--modo", choices=["full","minimo"], default="full")
     ap.add_argument("--out", default=None, help="Nombre del archivo de salida (.csv)")
-    args = ap.parse_args()
+    ap.add_argument("--chunksize", type=int, default=CHUNK_ROWS, help="Filas por bloque de lectura")
+    agregar_argumento_profile(ap)
+    args = ap.parse_args(argv)
 
     indir = Path(args.indir).expanduser().resolve()
     efp_path = indir / args.efp_name
@@ -122,18 +125,16 @@ def main():
     if not efp_path.exists() or not r23_path.exists():
         raise SystemExit(f"No se encuentran ambos archivos en {indir}:\n  - {efp_path}\n  - {r23_path}")
 
-    df_efp = read_csv_any(efp_path)
-    df_r23 = read_csv_any(r23_path)
-
     if args.modo == "full":
         outname = args.out or "RUEA_global_2005_2023_full.csv"
-        out = consolidate_full(df_efp, df_r23)
+        inputs, columns = full_inputs(efp_path, r23_path)
     else:
         outname = args.out or "RUEA_global_2005_2023_minimo.csv"
-        out = consolidate_min(df_efp, df_r23)
+        inputs, columns = min_inputs(efp_path, r23_path)
 
     out_path = indir / outname
-    out.to_csv(out_path, index=False, encoding="utf-8-sig")
+    # una sola lectura por archivo; sólo el que tenga bytes no utf-8 más allá de la muestra se relee como latin-1
+    escribir_union([SalidaUnion(out_path, columns, inputs)], chunksize=args.chunksize)
     print(f"[✓] Consolidado guardado en: {out_path}")
 
 if __name__ == "__main__":
@@ -5,7 +5,7 @@ Características:
 - Usa `.` como separador decimal, eliminando separadores de miles.
 - Mantiene el separador de columnas `;`.
 - Fuerza la columna `unidad` a `t/año` si existe.
-- Inserta una fila inicial que indica el tipo de dato de cada columna (`numerico` o `texto`).
+- Escribe junto al CSV `<nombre>.esquema.json` con el tipo de dato de cada columna (`numerico` o `texto`).
 
 Uso:
   python convertir_excel_a_csv.py \
@@ -16,18 +16,23 @@ from __future__ import annotations
 
 import argparse
 import csv
+import math
 import re
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, List, Optional
 
-import pandas as pd
+from esquema_retc import escribir_esquema, inferir_tipos
+from instrumentacion import agregar_argumento_profile, instrumentar
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 NA_VALUES = {"", "na", "nan", "none", "null"}
 NUMBER_PATTERN = re.compile(r"^[+-]?[\d.,\s]+$")
 
 
 def normalize_value(value: Optional[str]) -> Optional[str]:
-    if value is None or (isinstance(value, float) and pd.isna(value)):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
         return None
     text = str(value).strip()
     if text.lower() in NA_VALUES:
@@ -55,21 +60,15 @@ def normalize_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     return normalized
 
 
-def detect_type(series: pd.Series) -> str:
-    sample = series.dropna()
-    if sample.empty:
-        return "texto"
-    numeric = pd.to_numeric(sample, errors="coerce")
-    if numeric.notna().all():
-        return "numerico"
-    return "texto"
-
-
-def main() -> None:
+@instrumentar
+def main(argv: Optional[List[str]] = None) -> None:
     parser = argparse.ArgumentParser(description="Convierte un Excel RETC a CSV estandarizado")
     parser.add_argument("--input", required=True, help="Ruta al archivo Excel de entrada")
     parser.add_argument("--output", required=True, help="Ruta de salida para el CSV")
-    args = parser.parse_args()
+    agregar_argumento_profile(parser)
+    args = parser.parse_args(argv)
+
+    import pandas as pd
 
     input_path = Path(args.input).expanduser().resolve()
     output_path = Path(args.output).expanduser().resolve()
@@ -80,11 +79,8 @@ def main() -> None:
     df = pd.read_excel(input_path, dtype=str)
     df = normalize_dataframe(df)
 
-    type_row = {col: detect_type(df[col]) for col in df.columns}
-    df_out = pd.concat([pd.DataFrame([type_row]), df], ignore_index=True)
-
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    df_out.to_csv(
+    df.to_csv(
         output_path,
         index=False,
         sep=';',
@@ -92,7 +88,9 @@ def main() -> None:
         quoting=csv.QUOTE_NONE,
         escapechar='\\',
     )
+    esquema_path = escribir_esquema(output_path, inferir_tipos(df), len(df))
     print(f"[✓] CSV generado en {output_path}")
+    print(f"[✓] Esquema de columnas en {esquema_path}")
 
 
 if __name__ == "__main__":
@@ -6,16 +6,24 @@
 - Fuerza la columna `unidad` (si existe) a `t/año`.
 - Exporta cada archivo como `retc_<año>.csv` en `data/interim/01_emisiones_por_ano` con separador `;`
   y campos entre comillas.
+- Escribe junto a cada CSV `retc_<año>.esquema.json` con el tipo (`numerico`/`texto`) de cada
+  columna, inferido sobre la columna completa.
 """
 from __future__ import annotations
 
 import argparse
 import csv
+import math
 import re
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 
-import pandas as pd
+from ejecucion_por_archivo import agregar_argumento_jobs, ejecutar_por_archivo, reportar_fallos
+from esquema_retc import escribir_esquema, inferir_tipos
+from instrumentacion import agregar_argumento_profile, contar_filas, instrumentar
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 RAW_PATTERN = re.compile(r"(\d{4})")
 NA_VALUES = {"", "na", "nan", "none", "null"}
@@ -29,11 +37,33 @@ def detect_year(path: Path) -> str:
     return matches[-1]
 
 
+def one_file_per_year(raw_files: List[Path]) -> List[Path]:
+    """Un archivo por año de salida: el último en orden, el que prevalecía al convertir en secuencia.
+
+    Con `--jobs` varios archivos del mismo año escribirían `retc_<año>.csv` a la
+    vez; los descartados se informan con `[!]`. Los archivos sin año se
+    conservan para que fallen y se informen en la conversión.
+    """
+    by_year: Dict[str, List[Path]] = {}
+    for path in raw_files:
+        try:
+            by_year.setdefault(detect_year(path), []).append(path)
+        except ValueError:
+            by_year.setdefault(path.name, []).append(path)
+    for year, paths in by_year.items():
+        if len(paths) > 1:
+            skipped = ", ".join(p.name for p in paths[:-1])
+            print(f"[!] {year}: varios archivos RAW; se usa {paths[-1].name} y se omite {skipped}")
+    return [paths[-1] for paths in by_year.values()]
+
+
 def load_raw(path: Path) -> pd.DataFrame:
+    import pandas as pd
+
     if path.suffix.lower() in {".xlsx", ".xls"}:
         return pd.read_excel(path, dtype=str)
     if path.suffix.lower() == ".csv":
-        encodings = ["utf-8", "utf-8-sig", "latin-1", "cp1252"]
+        encodings = ["utf-8-sig", "latin-1", "cp1252"]
         seps = [None, ";", ","]
         for enc in encodings:
             for sep in seps:
@@ -54,7 +84,7 @@ def load_raw(path: Path) -> pd.DataFrame:
 
 
 def normalize_cell(value: Optional[str]) -> Optional[str]:
-    if value is None or (isinstance(value, float) and pd.isna(value)):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
         return None
     text = str(value).strip()
     if text.lower() in NA_VALUES:
@@ -81,25 +111,14 @@ def normalize_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def detect_type(series: pd.Series) -> str:
-    sample = series.dropna().head(10)
-    if sample.empty:
-        return "texto"
-    numeric = pd.to_numeric(sample, errors="coerce")
-    if numeric.notna().all():
-        return "numerico"
-    return "texto"
-
-
 def convert_file(path: Path, outdir: Path) -> Path:
     year = detect_year(path)
     df = load_raw(path)
     df = normalize_dataframe(df)
-    type_row = {col: detect_type(df[col]) for col in df.columns}
+    contar_filas(entrada=len(df), salida=len(df))
     outdir.mkdir(parents=True, exist_ok=True)
     out_path = outdir / f"retc_{year}.csv"
-    df_out = pd.concat([pd.DataFrame([type_row]), df], ignore_index=True)
-    df_out.to_csv(
+    df.to_csv(
         out_path,
         index=False,
         sep=';',
@@ -107,10 +126,12 @@ def convert_file(path: Path, outdir: Path) -> Path:
         quoting=csv.QUOTE_NONE,
         escapechar='\\',
     )
+    escribir_esquema(out_path, inferir_tipos(df), len(df))
     return out_path
 
 
-def main() -> None:
+@instrumentar
+def main(argv: Optional[List[str]] = None) -> None:
     parser = argparse.ArgumentParser(description="Convierte archivos RAW del RETC a CSV normalizados")
     parser.add_argument(
         "--indir",
@@ -122,7 +143,9 @@ def main() -> None:
         default="../data/interim/01_emisiones_por_ano",
         help="Directorio de salida para los CSV normalizados",
     )
-    args = parser.parse_args()
+    agregar_argumento_jobs(parser)
+    agregar_argumento_profile(parser)
+    args = parser.parse_args(argv)
 
     indir = Path(args.indir).expanduser().resolve()
     outdir = Path(args.outdir).expanduser().resolve()
@@ -133,9 +156,10 @@ def main() -> None:
     if not raw_files:
         raise SystemExit("No se encontraron archivos RAW para convertir")
 
-    for raw_path in raw_files:
-        out_path = convert_file(raw_path, outdir)
+    resultados, fallos = ejecutar_por_archivo(convert_file, one_file_per_year(raw_files), outdir, jobs=args.jobs)
+    for raw_path, out_path in resultados:
         print(f"[✓] Convertido {raw_path.name} -> {out_path.name}")
+    reportar_fallos(fallos)
 
     print(f"[✓] Archivos normalizados disponibles en: {outdir}")
 
@@ -8,10 +8,9 @@ from __future__ import annotations
 
 import argparse
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, List, Optional
 
-import requests
-from bs4 import BeautifulSoup
+from instrumentacion import agregar_argumento_profile, instrumentar
 
 DEFAULT_URL = "https://datosretc.mma.gob.cl/dataset/emisiones-al-aire-de-fuente-puntuales"
 
@@ -24,6 +23,9 @@ def resolve_outdir(base: Path | None) -> Path:
 
 
 def discover_links(url: str) -> Iterable[str]:
+    import requests
+    from bs4 import BeautifulSoup
+
     resp = requests.get(url, timeout=60)
     resp.raise_for_status()
     soup = BeautifulSoup(resp.text, "html.parser")
@@ -39,6 +41,8 @@ def discover_links(url: str) -> Iterable[str]:
 
 
 def download_all(links: Iterable[str], outdir: Path) -> None:
+    import requests
+
     outdir.mkdir(parents=True, exist_ok=True)
     for link in links:
         target = outdir / Path(link).name
@@ -51,7 +55,8 @@ def download_all(links: Iterable[str], outdir: Path) -> None:
                     fh.write(chunk)
 
 
-def main() -> None:
+@instrumentar
+def main(argv: Optional[List[str]] = None) -> None:
     parser = argparse.ArgumentParser(description="Descargar archivos RETC EFP/RUEA")
     parser.add_argument("--url", default=DEFAULT_URL, help="URL del dataset RETC a recorrer")
     parser.add_argument(
@@ -60,7 +65,8 @@ def main() -> None:
         default=None,
         help="Carpeta de destino (por defecto data/raw/descargas_retc)",
     )
-    args = parser.parse_args()
+    agregar_argumento_profile(parser)
+    args = parser.parse_args(argv)
 
     outdir = resolve_outdir(Path(args.outdir).expanduser().resolve() if args.outdir else None)
 
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""Detecta registros agregados, eliminados y modificados entre dos publicaciones RETC.
+
+Compara año por año los CSV normalizados de la etapa 01 (`retc_<año>.csv`)
+de la publicación anterior y de la nueva:
+
+- cada registro se identifica con su `id_unico` de contenido
+  (`agregar_id_unico_rm.content_ids`: año, establecimiento, contaminante,
+  fuente y claves de combustible),
+- un hash de la fila completa distingue los registros modificados.
+
+Salidas en `--outdir`:
+  - `retc_<año>_delta.csv`: filas agregadas y modificadas (versión nueva), con
+    el esquema de la etapa 01 y `id_unico` como primera columna,
+  - `retc_<año>_claves.csv`: `id_unico;cambio` (agregada/modificada/eliminada),
+  - `resumen_delta.json`: conteos por año.
+
+`aplicar_delta_retc.py` usa esos archivos para actualizar las etapas 02–04.
+
+Uso:
+  python convertir_raw_a_csv_por_ano.py --indir <descarga nueva> --outdir ../data/interim/01_emisiones_por_ano_nuevo
+  python diferencias_retc.py --nuevo ../data/interim/01_emisiones_por_ano_nuevo
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from agregar_id_unico_rm import content_ids
+from esquema_retc import TEXTO, escribir_esquema, leer_esquema
+from instrumentacion import agregar_argumento_profile, contar_filas, instrumentar
+from lectura_csv import leer_csv_etapa
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+YEAR_FILE = re.compile(r"retc_(\d{4})")
+TYPE_LABELS = {"texto", "numerico"}
+SUMMARY_NAME = "resumen_delta.json"
+CAMBIOS = ("agregada", "modificada", "eliminada")
+
+
+def year_files(directory: Path) -> Dict[str, Path]:
+    """`retc_<año>.csv` de la etapa 01 indexados por año."""
+    files = {}
+    for path in sorted(directory.glob("retc_*.csv")):
+        match = YEAR_FILE.fullmatch(path.stem)
+        if match:
+            files[match.group(1)] = path
+    return files
+
+
+def drop_type_row(df: pd.DataFrame) -> pd.DataFrame:
+    """Quita la fila de tipos (`texto`/`numerico`) de salidas de la etapa 01 previas al `.esquema.json`."""
+    if df.empty:
+        return df
+    first = df.iloc[0].dropna()
+    if not first.empty and first.isin(TYPE_LABELS).all():
+        return df.iloc[1:].reset_index(drop=True)
+    return df
+
+
+def load_stage01(path: Optional[Path]) -> pd.DataFrame:
+    import pandas as pd
+
+    if path is None:
+        return pd.DataFrame()
+    return drop_type_row(leer_csv_etapa(path))
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """Hash de la fila completa, independiente del orden de las columnas."""
+    import pandas as pd
+
+    ordered = df[sorted(df.columns)].fillna('')
+    return pd.util.hash_pandas_object(ordered, index=False).to_numpy()
+
+
+def diff_frames(old: pd.DataFrame, new: pd.DataFrame, year: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Devuelve (filas nuevas/modificadas con `id_unico`, claves con su tipo de cambio)."""
+    import numpy as np
+    import pandas as pd
+
+    old_ids = content_ids(old, year) if len(old) else np.array([], dtype=str)
+    new_ids = content_ids(new, year) if len(new) else np.array([], dtype=str)
+    old_hash = row_hashes(old) if len(old) else np.array([], dtype=np.uint64)
+    new_hash = row_hashes(new) if len(new) else np.array([], dtype=np.uint64)
+
+    # posición de cada registro nuevo en la publicación anterior (-1 si no existía)
+    position = pd.Index(old_ids).get_indexer(new_ids)
+    added = position < 0
+    changed = np.zeros(len(new_ids), dtype=bool)
+    changed[~added] = old_hash[position[~added]] != new_hash[~added]
+    removed = ~pd.Index(old_ids).isin(new_ids)
+
+    delta = new[added | changed].copy()
+    delta.insert(0, 'id_unico', new_ids[added | changed])
+    claves = pd.concat(
+        [
+            pd.DataFrame({'id_unico': new_ids[added], 'cambio': CAMBIOS[0]}),
+            pd.DataFrame({'id_unico': new_ids[changed], 'cambio': CAMBIOS[1]}),
+            pd.DataFrame({'id_unico': old_ids[removed], 'cambio': CAMBIOS[2]}),
+        ],
+        ignore_index=True,
+    )
+    return delta, claves
+
+
+def write_stage_csv(df: pd.DataFrame, path: Path) -> None:
+    df.to_csv(path, index=False, sep=';', encoding='utf-8-sig', quoting=csv.QUOTE_NONE, escapechar='\\')
+
+
+def diff_year(year: str, old_path: Optional[Path], new_path: Optional[Path], outdir: Path) -> Dict[str, int]:
+    old = load_stage01(old_path)
+    new = load_stage01(new_path)
+    delta, claves = diff_frames(old, new, year)
+    contar_filas(entrada=len(old) + len(new), salida=len(delta))
+
+    if not delta.empty:
+        delta_path = outdir / f"retc_{year}_delta.csv"
+        write_stage_csv(delta, delta_path)
+        tipos = leer_esquema(new_path) if new_path is not None else {}
+        if tipos:
+            escribir_esquema(delta_path, {'id_unico': TEXTO, **tipos}, len(delta))
+    if not claves.empty:
+        claves.to_csv(outdir / f"retc_{year}_claves.csv", index=False, sep=';', encoding='utf-8-sig')
+
+    counts = claves['cambio'].value_counts()
+    return {
+        'filas_anterior': len(old),
+        'filas_nuevo': len(new),
+        **{f"{cambio}s": int(counts.get(cambio, 0)) for cambio in CAMBIOS},
+    }
+
+
+@instrumentar
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compara dos publicaciones RETC normalizadas (etapa 01)")
+    parser.add_argument(
+        "--anterior",
+        default="../data/interim/01_emisiones_por_ano",
+        help="CSV por año de la publicación ya procesada",
+    )
+    parser.add_argument("--nuevo", required=True, help="CSV por año de la publicación nueva (salida de la etapa 01)")
+    parser.add_argument(
+        "--outdir",
+        default="../data/interim/00_delta_retc",
+        help="Carpeta de salida del delta",
+    )
+    agregar_argumento_profile(parser)
+    args = parser.parse_args(argv)
+
+    old_dir = Path(args.anterior).expanduser().resolve()
+    new_dir = Path(args.nuevo).expanduser().resolve()
+    for directory in (old_dir, new_dir):
+        if not directory.is_dir():
+            raise SystemExit(f"No se encontró el directorio: {directory}")
+    outdir = Path(args.outdir).expanduser().resolve()
+    outdir.mkdir(parents=True, exist_ok=True)
+    # Un delta anterior en la misma carpeta no debe mezclarse con éste
+    for stale in [*outdir.glob("retc_*_delta.csv"), *outdir.glob("retc_*_claves.csv")]:
+        stale.unlink()
+
+    old_files = year_files(old_dir)
+    new_files = year_files(new_dir)
+    summary: Dict[str, Dict[str, int]] = {}
+    for year in sorted(set(old_files) | set(new_files)):
+        counts = diff_year(year, old_files.get(year), new_files.get(year), outdir)
+        summary[year] = counts
+        if counts['agregadas'] or counts['modificadas'] or counts['eliminadas']:
+            print(
+                f"[✓] {year}: +{counts['agregadas']} agregadas, ~{counts['modificadas']} modificadas, "
+                f"-{counts['eliminadas']} eliminadas"
+            )
+        else:
+            print(f"[=] {year}: sin cambios")
+
+    report = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'anterior': str(old_dir),
+        'nuevo': str(new_dir),
+        'anos': summary,
+    }
+    (outdir / SUMMARY_NAME).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f"[✓] Delta disponible en: {outdir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""Ejecución por archivo compartida por las etapas que recorren directorios.
+
+Cada etapa define una función `process_file(path, ...)` a nivel de módulo
+(serializable) y delega el recorrido en `ejecutar_por_archivo`, que:
+
+- usa un pool de procesos cuando `--jobs` es mayor que 1,
+- devuelve los resultados en el mismo orden que los archivos de entrada,
+- no se detiene ante el primer error: acumula los archivos fallidos para
+  informarlos todos al final con `reportar_fallos`,
+- registra métricas por archivo (`instrumentacion.medir`) y las suma a la
+  etapa activa aunque provengan de otro proceso.
+
+Las etapas que separan su `process_file` en leer/transformar/escribir pueden
+usar además `ejecutar_superpuesto` (`--superponer`): un hilo lee el archivo
+N+1 y otro escribe el N−1 mientras el hilo principal transforma el N, con
+colas acotadas para no tener más de unos pocos DataFrames en memoria.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from instrumentacion import etapa_actual, medicion_activa, medir
+
+Resultado = Tuple[Path, Any]
+Fallo = Tuple[Path, str]
+
+# Archivos que pueden esperar en cada cola (leídos sin transformar / transformados sin escribir)
+PROFUNDIDAD_COLA = 2
+_FIN = object()
+
+
+def agregar_argumento_jobs(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Archivos procesados en paralelo (0 = todos los núcleos)",
+    )
+
+
+def resolver_jobs(jobs: int, n_archivos: int) -> int:
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    return max(1, min(jobs, n_archivos))
+
+
+def agregar_argumento_superponer(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--superponer",
+        action="store_true",
+        help="Lee, transforma y escribe archivos distintos a la vez (hilos; alternativo a --jobs)",
+    )
+
+
+def describir_error(exc: BaseException) -> str:
+    return f"{type(exc).__name__}: {exc}"
+
+
+def _ejecutar_medido(
+    func: Callable[..., Any], etapa: str, path: Path, *args: Any
+) -> Tuple[Any, Dict[str, Any]]:
+    with medir("archivo", etapa, path.name) as medicion:
+        resultado = func(path, *args)
+    return resultado, medicion.registro
+
+
+def ejecutar_por_archivo(
+    func: Callable[..., Any],
+    paths: Sequence[Path],
+    *args: Any,
+    jobs: int = 1,
+) -> Tuple[List[Resultado], List[Fallo]]:
+    """Aplica `func(path, *args)` a cada archivo y separa resultados de fallos.
+
+    Ambas listas conservan el orden de `paths`, independiente de qué proceso
+    termine primero.
+    """
+    resultados: List[Resultado] = []
+    fallos: List[Fallo] = []
+    if not paths:
+        return resultados, fallos
+
+    etapa = etapa_actual(default=func.__module__)
+    workers = resolver_jobs(jobs, len(paths))
+    if workers == 1:
+        for path in paths:
+            try:
+                resultado, _ = _ejecutar_medido(func, etapa, path, *args)
+                resultados.append((path, resultado))
+            except Exception as exc:
+                fallos.append((path, describir_error(exc)))
+        return resultados, fallos
+
+    actual = medicion_activa()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_ejecutar_medido, func, etapa, path, *args) for path in paths]
+        for path, future in zip(paths, futures):
+            try:
+                resultado, registro = future.result()
+            except Exception as exc:
+                fallos.append((path, describir_error(exc)))
+                continue
+            resultados.append((path, resultado))
+            if actual is not None:
+                actual.incorporar(registro)
+    return resultados, fallos
+
+
+def ejecutar_superpuesto(
+    leer: Callable[[Path], Any],
+    transformar: Callable[..., Tuple[Optional[Any], Any]],
+    escribir: Callable[[Path, Any], None],
+    paths: Sequence[Path],
+    *args: Any,
+    profundidad: int = PROFUNDIDAD_COLA,
+) -> Tuple[List[Resultado], List[Fallo]]:
+    """Lectura, transformación y escritura superpuestas entre archivos.
+
+    - `leer(path)` corre en un hilo lector,
+    - `transformar(path, datos, *args)` corre en el hilo actual y devuelve
+      `(salida, resultado)`; si `salida` es None no se escribe nada,
+    - `escribir(path, salida)` corre en un hilo escritor.
+
+    Devuelve lo mismo que `ejecutar_por_archivo`. Las métricas se acumulan en
+    la etapa activa (no por archivo, porque los tres pasos de archivos
+    distintos ocurren a la vez).
+    """
+    resultados: Dict[Path, Any] = {}
+    errores: Dict[Path, str] = {}
+    leidos: queue.Queue = queue.Queue(maxsize=profundidad)
+    pendientes: queue.Queue = queue.Queue(maxsize=profundidad)
+
+    def lector() -> None:
+        for path in paths:
+            try:
+                leidos.put((path, leer(path), None))
+            except Exception as exc:
+                leidos.put((path, None, describir_error(exc)))
+        leidos.put(_FIN)
+
+    def escritor() -> None:
+        while True:
+            item = pendientes.get()
+            if item is _FIN:
+                return
+            path, salida = item
+            try:
+                escribir(path, salida)
+            except Exception as exc:
+                errores[path] = describir_error(exc)
+
+    hilos = [
+        threading.Thread(target=lector, name="lector", daemon=True),
+        threading.Thread(target=escritor, name="escritor", daemon=True),
+    ]
+    for hilo in hilos:
+        hilo.start()
+    try:
+        while True:
+            item = leidos.get()
+            if item is _FIN:
+                break
+            path, datos, error = item
+            if error is not None:
+                errores[path] = error
+                continue
+            try:
+                salida, resultado = transformar(path, datos, *args)
+            except Exception as exc:
+                errores[path] = describir_error(exc)
+                continue
+            resultados[path] = resultado
+            if salida is not None:
+                pendientes.put((path, salida))
+    finally:
+        pendientes.put(_FIN)
+        hilos[1].join()
+
+    return (
+        [(path, resultados[path]) for path in paths if path in resultados and path not in errores],
+        [(path, errores[path]) for path in paths if path in errores],
+    )
+
+
+def reportar_fallos(fallos: Sequence[Fallo]) -> None:
+    """Informa todos los archivos fallidos y termina con error si hubo alguno."""
+    if not fallos:
+        return
+    print(f"[✗] {len(fallos)} archivo(s) con error:")
+    for path, error in fallos:
+        print(f" - {path.name}: {error}")
+    raise SystemExit(1)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Agrega atributos de varias capas de polígonos al consolidado en una pasada.
+
+En lugar de leer, unir y reescribir el consolidado una vez por capa, se
+extraen sus coordenadas distintas (`latitud_nueva`/`longitud_nueva`, o
+`latitud`/`longitud`), se clasifican contra cada capa con un índice espacial
+(STRtree, o la grilla de `grilla_poligonos.py` con `--grilla`) y los atributos
+resultantes se expanden a todas las filas antes de una única escritura.
+
+Cada capa se indica como `RUTA:ATRIBUTO[=COLUMNA][,ATRIBUTO[=COLUMNA]...]`:
+
+  python enriquecer_espacial_rm.py \
+    --capa ../geo/insumos/UnidadesPaisajeRM/unidades-paisaje-V1.gpkg:Nombre=unidad_paisaje \
+    --capa ../geo/insumos/DPA/comunas.gpkg:COMUNA=comuna_dpa \
+    --capa ../geo/insumos/DPA/provincias.gpkg:PROVINCIA=provincia_dpa \
+    --capa ../geo/insumos/SNASPE/areas_protegidas.gpkg:NOMBRE=area_protegida,CATEGORIA=categoria_area
+
+Antes de clasificar, las coordenadas pasan por
+`calidad_coordenadas.evaluar_coordenadas`: las rechazadas quedan vacías en todas
+las capas y las corregidas se clasifican ya corregidas; el código de cada fila
+queda en `calidad_coordenadas`.
+
+Con `--coordenadas` las columnas `latitud_nueva`/`longitud_nueva` se toman del
+CSV de `completar_coordenadas_con_centros.py --sidecar`, unido por `id_unico`.
+
+Un punto que no cae en ningún polígono de una capa queda vacío en sus columnas;
+con polígonos solapados se usa el primero de la capa.
+"""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Tuple
+
+from asignar_unidad_paisaje_rm import DEFAULT_CONSOLIDADO, DEFAULT_Polygons
+from calidad_coordenadas import CALIDAD_COL, evaluar_coordenadas, informar_calidad
+from capas_geo import cargar_capa, indice_capa
+from grilla_poligonos import RESOLUCION_M, GrillaPoligonos, poligono_exacto
+from instrumentacion import agregar_argumento_profile, contar_filas, instrumentar
+from lectura_csv import leer_csv_etapa
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+DEFAULT_CAPAS = [f"{DEFAULT_Polygons}:Nombre=unidad_paisaje"]
+
+
+class Capa(NamedTuple):
+    path: Path
+    atributos: Dict[str, str]  # atributo de la capa -> columna de salida
+
+
+def parse_capa(spec: str) -> Capa:
+    ruta, sep, atributos = spec.rpartition(":")
+    if not sep or not ruta or not atributos:
+        raise SystemExit(f"--capa {spec!r}: se espera RUTA:ATRIBUTO[=COLUMNA][,...]")
+    mapping = {}
+    for item in atributos.split(","):
+        atributo, _, columna = item.strip().partition("=")
+        mapping[atributo.strip()] = (columna or atributo).strip()
+    return Capa(Path(ruta).expanduser().resolve(), mapping)
+
+
+def unique_coordinates(lon: np.ndarray, lat: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(lon únicas, lat únicas, índice de cada fila en ellas o -1 sin coordenadas)."""
+    import numpy as np
+
+    valid = ~(np.isnan(lon) | np.isnan(lat))
+    inverse = np.full(len(lon), -1, dtype=np.intp)
+    pares, posiciones = np.unique(np.column_stack([lon[valid], lat[valid]]), axis=0, return_inverse=True)
+    inverse[valid] = posiciones.reshape(-1)
+    return pares[:, 0], pares[:, 1], inverse
+
+
+def merge_coordinates(df: pd.DataFrame, path: Path) -> None:
+    """Reemplaza las coordenadas nuevas de `df` por las del sidecar, según `id_unico`."""
+    sidecar = leer_csv_etapa(path).drop_duplicates("id_unico").set_index("id_unico")
+    for col in ("latitud_nueva", "longitud_nueva"):
+        df[col] = df["id_unico"].map(sidecar[col])
+
+
+def layer_indices(capa: Capa, lon: np.ndarray, lat: np.ndarray, grid: bool, resolution: float):
+    """(tabla de atributos de la capa, índice del polígono de cada coordenada o -1)."""
+    import pandas as pd
+
+    if grid:
+        nombre = next(iter(capa.atributos))
+        grilla = GrillaPoligonos.desde_capa(capa.path, nombre, resolution)
+        return grilla.atributos, grilla.clasificar(lon, lat)
+
+    gdf = cargar_capa(capa.path)
+    arbol = indice_capa(gdf.geometry.to_numpy())
+    return pd.DataFrame(gdf.drop(columns=gdf.geometry.name)), poligono_exacto(arbol, lon, lat)
+
+
+@instrumentar
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Atributos de varias capas de polígonos en una sola pasada")
+    parser.add_argument("--consolidado", default=DEFAULT_CONSOLIDADO, help="CSV consolidado RM")
+    parser.add_argument(
+        "--capa",
+        action="append",
+        default=None,
+        help="RUTA:ATRIBUTO[=COLUMNA][,...] (repetible; por defecto, unidades del paisaje)",
+    )
+    parser.add_argument("--coordenadas", default=None, help="CSV id_unico;latitud_nueva;longitud_nueva (opcional)")
+    parser.add_argument("--grilla", action="store_true", help="Clasificar con la grilla precalculada de cada capa")
+    parser.add_argument("--resolucion", type=float, default=RESOLUCION_M, help="Tamaño de celda de la grilla (m)")
+    agregar_argumento_profile(parser)
+    args = parser.parse_args(argv)
+
+    import numpy as np
+
+    consolidado_path = Path(args.consolidado).expanduser().resolve()
+    capas = [parse_capa(spec) for spec in (args.capa or DEFAULT_CAPAS)]
+    if not consolidado_path.exists():
+        raise SystemExit(f"No se encontró el consolidado: {consolidado_path}")
+    for capa in capas:
+        if not capa.path.exists():
+            raise SystemExit(f"No se encontró la capa: {capa.path}")
+
+    df = leer_csv_etapa(consolidado_path)
+    if args.coordenadas:
+        merge_coordinates(df, Path(args.coordenadas).expanduser().resolve())
+    lon, lat, calidad = evaluar_coordenadas(df)
+    informar_calidad(df, calidad)
+    df[CALIDAD_COL] = calidad
+    lon, lat, inverse = unique_coordinates(lon, lat)
+    print(f"[i] {len(df)} filas, {len(lon)} coordenadas distintas")
+
+    con_coordenadas = inverse >= 0
+    for capa in capas:
+        tabla, indices = layer_indices(capa, lon, lat, args.grilla, args.resolucion)
+        faltantes = [a for a in capa.atributos if a not in tabla.columns]
+        if faltantes:
+            raise SystemExit(f"{capa.path.name} no tiene los atributos: {', '.join(faltantes)}")
+        dentro = indices >= 0
+        for atributo, columna in capa.atributos.items():
+            valores = np.full(len(lon), None, dtype=object)
+            valores[dentro] = tabla[atributo].to_numpy(dtype=object)[indices[dentro]]
+            por_fila = np.full(len(df), None, dtype=object)
+            por_fila[con_coordenadas] = valores[inverse[con_coordenadas]]
+            df[columna] = por_fila
+        print(f"[✓] {capa.path.name}: {int(dentro.sum())}/{len(lon)} coordenadas dentro de algún polígono "
+              f"-> {', '.join(capa.atributos.values())}")
+
+    contar_filas(entrada=len(df), salida=len(df))
+    df.to_csv(consolidado_path, index=False, sep=';', encoding='utf-8-sig')
+    print(f"[✓] Atributos espaciales agregados en {consolidado_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Definiciones de esquema compartidas por los scripts del pipeline.
+
+Cada lector declara aquí las columnas que realmente utiliza, de modo que
+`pd.read_csv` cargue sólo ese subconjunto (`usecols`) en lugar del esquema
+RUEA completo.
+
+Los CSV de las etapas 01–04 van acompañados de un archivo
+`<nombre>.esquema.json` con el tipo inferido de cada columna (`numerico` o
+`texto`). Con `dtypes_lectura` los lectores convierten las columnas de medida
+numéricas directamente en `read_csv`, sin pasar por texto.
+"""
+from __future__ import annotations
+
+import json
+from collections import defaultdict
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Mapping, Optional, Tuple
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Variantes aceptadas para la columna de año
+COLUMNAS_ANO: Tuple[str, ...] = ("año", "ano")
+
+# Columna consolidada de emisión en las tablas por contaminante
+COLUMNA_EMISION = "cantidad_toneladas"
+
+# Pares (principal, secundaria) que se fusionan en `reconstruir_emisiones_por_variable.py`
+PARES_FUSION: Tuple[Tuple[str, str], ...] = (
+    ("cantidad_toneladas", "emision_total"),
+    ("id_ciiu6", "ciiu6_id"),
+    ("rubro_id", "id_rubro_vu"),
+)
+
+# Columnas publicadas en los extractos por contaminante (orden de salida)
+COLUMNAS_EXTRACTO: Tuple[str, ...] = (
+    "año",
+    "razon_social",
+    "rut_razon_social",
+    "nombre_establecimiento",
+    "comuna",
+    "id_comuna",
+    "latitud",
+    "longitud",
+    "contaminantes",
+    "cantidad_toneladas",
+)
+
+# Columnas necesarias para totales/acumulados anuales
+COLUMNAS_TOTALES: Tuple[str, ...] = COLUMNAS_ANO + (COLUMNA_EMISION,)
+
+# Columnas que `exportar_extractos_por_variable.py` necesita leer
+COLUMNAS_LECTURA_EXTRACTO: Tuple[str, ...] = tuple(
+    dict.fromkeys(COLUMNAS_ANO + COLUMNAS_EXTRACTO)
+)
+
+# Columnas que `reconstruir_emisiones_por_variable.py` debe conservar para
+# alimentar a los lectores posteriores (extractos y totales).
+COLUMNAS_RECONSTRUCCION: Tuple[str, ...] = tuple(
+    dict.fromkeys(
+        COLUMNAS_LECTURA_EXTRACTO
+        + tuple(col for par in PARES_FUSION for col in par)
+        + ("unidad",)
+    )
+)
+
+
+def selector_columnas(columnas: Iterable[str]) -> Callable[[str], bool]:
+    """Devuelve un callable apto para `usecols` que tolera columnas ausentes y BOM."""
+    deseadas = frozenset(columnas)
+    return lambda col: str(col).lstrip("\ufeff") in deseadas
+
+
+# Columnas que pueden leerse como float cuando el esquema las marca numéricas.
+# Los códigos e identificadores (id_vu, id_comuna, ciiu, año...) siguen como
+# texto aunque sean numéricos, para no perder ceros a la izquierda ni
+# convertirlos en `13101.0` al reescribir.
+COLUMNAS_MEDIDA: Tuple[str, ...] = (
+    "cantidad_toneladas",
+    "emision_total",
+    "emision_primario",
+    "emision_combustible_primario",
+    "emision_combustible_secundario",
+    "emision_procesos",
+    "emision_retc",
+    "latitud",
+    "longitud",
+)
+
+NUMERICO = "numerico"
+TEXTO = "texto"
+SUFIJO_ESQUEMA = ".esquema.json"
+
+
+def ruta_esquema(csv_path: Path) -> Path:
+    return csv_path.with_name(csv_path.stem + SUFIJO_ESQUEMA)
+
+
+def inferir_tipos(df: pd.DataFrame) -> Dict[str, str]:
+    """Tipo de cada columna evaluando todos sus valores (no una muestra)."""
+    import pandas as pd
+
+    tipos = {}
+    for col in df.columns:
+        serie = df[col]
+        presentes = int(serie.notna().sum())
+        if presentes == 0:
+            tipos[col] = TEXTO
+            continue
+        convertibles = int(pd.to_numeric(serie, errors="coerce").notna().sum())
+        tipos[col] = NUMERICO if convertibles == presentes else TEXTO
+    return tipos
+
+
+def escribir_esquema(csv_path: Path, tipos: Mapping[str, str], filas: Optional[int] = None) -> Path:
+    path = ruta_esquema(csv_path)
+    contenido = {"archivo": csv_path.name, "filas": filas, "columnas": dict(tipos)}
+    path.write_text(json.dumps(contenido, ensure_ascii=False, indent=2), encoding="utf-8")
+    return path
+
+
+def leer_esquema(csv_path: Path) -> Dict[str, str]:
+    """Tipos por columna del sidecar; vacío si el CSV no tiene esquema."""
+    path = ruta_esquema(csv_path)
+    if not path.exists():
+        return {}
+    return dict(json.loads(path.read_text(encoding="utf-8")).get("columnas", {}))
+
+
+def combinar_esquemas(esquemas: Iterable[Mapping[str, str]]) -> Dict[str, str]:
+    """Una columna es numérica sólo si lo es en todos los esquemas donde aparece."""
+    combinado: Dict[str, str] = {}
+    for esquema in esquemas:
+        for col, tipo in esquema.items():
+            combinado[col] = tipo if combinado.get(col, tipo) == tipo else TEXTO
+    return combinado
+
+
+def dtypes_lectura(csv_path: Path, columnas: Iterable[str] = COLUMNAS_MEDIDA) -> Dict[str, object]:
+    """`dtype` para `read_csv`: float64 en las columnas de medida numéricas, texto en el resto."""
+    tipos = leer_esquema(csv_path)
+    numericas = {col: "float64" for col in columnas if tipos.get(col) == NUMERICO}
+    return defaultdict(lambda: str, numericas)
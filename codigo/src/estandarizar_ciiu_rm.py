@@ -4,11 +4,23 @@ from __future__ import annotations
 
 import argparse
 import csv
+import functools
 import unicodedata
 from pathlib import Path
-from typing import Dict, Set, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
 
-import pandas as pd
+from ejecucion_por_archivo import (
+    agregar_argumento_jobs,
+    agregar_argumento_superponer,
+    ejecutar_por_archivo,
+    ejecutar_superpuesto,
+    reportar_fallos,
+)
+from instrumentacion import agregar_argumento_profile, contar_filas, instrumentar
+from lectura_csv import leer_csv_etapa
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 METADATA_PATH = Path('metadata/ciiu_codigo_descripcion.csv')
 
@@ -16,6 +28,8 @@ NA_VALUES = {"", "na", "nan", "none", "null"}
 
 
 def load_ciiu_mapping(metadata_path: Path) -> Dict[str, str]:
+    import pandas as pd
+
     df = pd.read_csv(metadata_path, dtype=str, encoding='utf-8')
     mapping = {}
     for _, row in df.iterrows():
@@ -28,6 +42,8 @@ def load_ciiu_mapping(metadata_path: Path) -> Dict[str, str]:
 
 
 def prefer_value(row: pd.Series, columns) -> str | None:
+    import pandas as pd
+
     for col in columns:
         if col in row and pd.notna(row[col]) and row[col].strip() not in NA_VALUES:
             return row[col].strip()
@@ -161,7 +177,28 @@ def add_activity_column(df: pd.DataFrame, code_map: Dict[str, str], missing_code
     return df, macros_used
 
 
-def main() -> None:
+def transform_file(
+    csv_path: Path, df: pd.DataFrame, code_map: Dict[str, str]
+) -> Tuple[pd.DataFrame, Tuple[Set[str], Set[str]]]:
+    missing: Set[str] = set()
+    df, macros_used = add_activity_column(df, code_map, missing)
+    contar_filas(entrada=len(df), salida=len(df))
+    return df, (missing, macros_used)
+
+
+def write_file(csv_path: Path, df: pd.DataFrame, outdir: Path) -> None:
+    out_path = outdir / csv_path.name
+    df.to_csv(out_path, index=False, sep=';', encoding='utf-8-sig', quoting=csv.QUOTE_NONE, escapechar='\\')
+
+
+def process_file(csv_path: Path, outdir: Path, code_map: Dict[str, str]) -> Tuple[Set[str], Set[str]]:
+    df, result = transform_file(csv_path, leer_csv_etapa(csv_path), code_map)
+    write_file(csv_path, df, outdir)
+    return result
+
+
+@instrumentar
+def main(argv: Optional[List[str]] = None) -> None:
     parser = argparse.ArgumentParser(description="Estandariza códigos CIIU en tablas RM")
     parser.add_argument(
         "--indir",
@@ -178,7 +215,10 @@ def main() -> None:
         default=str(METADATA_PATH),
         help="Ruta del CSV con códigos CIIU normalizados",
     )
-    args = parser.parse_args()
+    agregar_argumento_jobs(parser)
+    agregar_argumento_superponer(parser)
+    agregar_argumento_profile(parser)
+    args = parser.parse_args(argv)
 
     metadata_path = Path(args.metadata).expanduser().resolve()
     if not metadata_path.exists():
@@ -193,12 +233,15 @@ def main() -> None:
     missing: Set[str] = set()
     macros_total: Set[str] = set()
 
-    for csv_path in sorted(indir.glob('retc*_RM.csv')):
-        df = pd.read_csv(csv_path, sep=';', dtype=str, encoding='utf-8', on_bad_lines='skip')
-        df, macros_used = add_activity_column(df, code_map, missing)
+    files = sorted(indir.glob('retc*_RM.csv'))
+    if args.superponer:
+        escribir = functools.partial(write_file, outdir=outdir)
+        resultados, fallos = ejecutar_superpuesto(leer_csv_etapa, transform_file, escribir, files, code_map)
+    else:
+        resultados, fallos = ejecutar_por_archivo(process_file, files, outdir, code_map, jobs=args.jobs)
+    for csv_path, (missing_file, macros_used) in resultados:
+        missing.update(missing_file)
         macros_total.update(macros_used)
-        out_path = outdir / csv_path.name
-        df.to_csv(out_path, index=False, sep=';', encoding='utf-8-sig', quoting=csv.QUOTE_NONE, escapechar='\\')
         print(f"[✓] Actualizado {csv_path.name}")
 
     if missing:
@@ -209,6 +252,7 @@ def main() -> None:
         print("[✓] Todos los códigos CIIU/rubro encontraron correspondencia")
 
     print("[i] Categorías macro detectadas:", ', '.join(sorted(macros_total)))
+    reportar_fallos(fallos)
 
 
 if __name__ == '__main__':
@@ -4,11 +4,23 @@ from __future__ import annotations
 
 import argparse
 import csv
+import functools
 import unicodedata
 from pathlib import Path
-from typing import Dict, Set
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
 
-import pandas as pd
+from ejecucion_por_archivo import (
+    agregar_argumento_jobs,
+    agregar_argumento_superponer,
+    ejecutar_por_archivo,
+    ejecutar_superpuesto,
+    reportar_fallos,
+)
+from instrumentacion import agregar_argumento_profile, contar_filas, instrumentar
+from lectura_csv import leer_csv_etapa
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 RAW_CANON: Dict[str, str] = {
     "Ammonia": "NH3",
@@ -109,7 +121,26 @@ def apply_canon(df: pd.DataFrame, missing: Set[str]) -> pd.DataFrame:
     return df
 
 
-def main() -> None:
+def transform_file(csv_path: Path, df: pd.DataFrame) -> Tuple[pd.DataFrame, Set[str]]:
+    missing: Set[str] = set()
+    df = apply_canon(df, missing)
+    contar_filas(entrada=len(df), salida=len(df))
+    return df, missing
+
+
+def write_file(csv_path: Path, df: pd.DataFrame, outdir: Path) -> None:
+    out_path = outdir / csv_path.name
+    df.to_csv(out_path, index=False, sep=';', encoding='utf-8-sig', quoting=csv.QUOTE_NONE, escapechar='\\')
+
+
+def process_file(csv_path: Path, outdir: Path) -> Set[str]:
+    df, missing = transform_file(csv_path, leer_csv_etapa(csv_path))
+    write_file(csv_path, df, outdir)
+    return missing
+
+
+@instrumentar
+def main(argv: Optional[List[str]] = None) -> None:
     parser = argparse.ArgumentParser(description="Estandariza los nombres de contaminantes en tablas RM")
     parser.add_argument(
         "--indir",
@@ -121,7 +152,10 @@ def main() -> None:
         default="../data/interim/03_emisiones_rm_fusionadas",
         help="Carpeta de salida (puede ser la misma)",
     )
-    args = parser.parse_args()
+    agregar_argumento_jobs(parser)
+    agregar_argumento_superponer(parser)
+    agregar_argumento_profile(parser)
+    args = parser.parse_args(argv)
 
     indir = Path(args.indir).expanduser().resolve()
     outdir = Path(args.outdir).expanduser().resolve()
@@ -129,11 +163,14 @@ def main() -> None:
 
     missing: Set[str] = set()
 
-    for csv_path in sorted(indir.glob('retc*_RM.csv')):
-        df = pd.read_csv(csv_path, sep=';', dtype=str, encoding='utf-8', on_bad_lines='skip')
-        df = apply_canon(df, missing)
-        out_path = outdir / csv_path.name
-        df.to_csv(out_path, index=False, sep=';', encoding='utf-8-sig', quoting=csv.QUOTE_NONE, escapechar='\\')
+    files = sorted(indir.glob('retc*_RM.csv'))
+    if args.superponer:
+        escribir = functools.partial(write_file, outdir=outdir)
+        resultados, fallos = ejecutar_superpuesto(leer_csv_etapa, transform_file, escribir, files)
+    else:
+        resultados, fallos = ejecutar_por_archivo(process_file, files, outdir, jobs=args.jobs)
+    for csv_path, missing_file in resultados:
+        missing.update(missing_file)
         print(f"[✓] Actualizado {csv_path.name}")
 
     if missing:
@@ -143,6 +180,8 @@ def main() -> None:
     else:
         print("[✓] Todos los contaminantes fueron mapeados")
 
+    reportar_fallos(fallos)
+
 
 if __name__ == "__main__":
     main()
@@ -13,23 +13,18 @@ from __future__ import annotations
 
 import argparse
 from pathlib import Path
-from typing import List
-
-import pandas as pd
-
-COLUMNS_TO_KEEP: List[str] = [
-    "año",
-    "ano",  # fallback
-    "razon_social",
-    "rut_razon_social",
-    "nombre_establecimiento",
-    "comuna",
-    "id_comuna",
-    "latitud",
-    "longitud",
-    "contaminantes",
-    "cantidad_toneladas",
-]
+from typing import TYPE_CHECKING, List, Optional
+
+from ejecucion_por_archivo import agregar_argumento_jobs, ejecutar_por_archivo, reportar_fallos
+from esquema_retc import COLUMNAS_EXTRACTO, COLUMNAS_LECTURA_EXTRACTO, selector_columnas
+from instrumentacion import agregar_argumento_profile, contar_filas, instrumentar
+from numeros_retc import parse_numeric
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# incluye `ano` como alternativa a `año`
+COLUMNS_TO_KEEP: List[str] = list(COLUMNAS_LECTURA_EXTRACTO)
 
 SKIP_FILES = {
     "diccionario_id_nombre_por_grupo.csv",
@@ -38,7 +33,9 @@ SKIP_FILES = {
 
 
 def load_csv(path: Path) -> pd.DataFrame:
-    return pd.read_csv(path, dtype=str)
+    import pandas as pd
+
+    return pd.read_csv(path, dtype=str, usecols=selector_columnas(COLUMNS_TO_KEEP))
 
 
 def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
@@ -47,55 +44,33 @@ def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
         df["año"] = df["ano"]
 
     if "cantidad_toneladas" in df.columns:
-        df["cantidad_toneladas"] = df["cantidad_toneladas"].apply(normalize_number)
+        df["cantidad_toneladas"] = parse_numeric(df["cantidad_toneladas"])[0]
     return df
 
 
-def normalize_number(value) -> str | None:
-    if pd.isna(value):
-        return None
-    text = str(value).strip()
-    if text == "" or text.lower() in {"na", "nan", "none"}:
-        return None
-    # si contiene coma y punto, asumir punto como separador de miles
-    if "," in text and "." in text:
-        text = text.replace(".", "")
-    text = text.replace(",", ".")
-    return text
-
-
 def extract_columns(df: pd.DataFrame) -> pd.DataFrame:
     available = [c for c in COLUMNS_TO_KEEP if c in df.columns]
     if "año" not in available:
         raise ValueError("No existe columna 'año' o 'ano' en el DataFrame")
     if "cantidad_toneladas" not in available:
         raise ValueError("No existe columna 'cantidad_toneladas' en el DataFrame")
-    desired = [c for c in [
-        "año",
-        "razon_social",
-        "rut_razon_social",
-        "nombre_establecimiento",
-        "comuna",
-        "id_comuna",
-        "latitud",
-        "longitud",
-        "contaminantes",
-        "cantidad_toneladas",
-    ] if c in available]
+    desired = [c for c in COLUMNAS_EXTRACTO if c in available]
     return df[desired]
 
 
-def process_file(path: Path, outdir: Path) -> None:
+def process_file(path: Path, outdir: Path) -> Path:
     df = load_csv(path)
     df = normalize_columns(df)
     subset = extract_columns(df)
+    contar_filas(entrada=len(df), salida=len(subset))
     out_path = outdir / path.name
     outdir.mkdir(parents=True, exist_ok=True)
     subset.to_csv(out_path, index=False, encoding="utf-8-sig")
-    print(f"[✓] Extracto generado: {out_path.name}")
+    return out_path
 
 
-def main() -> None:
+@instrumentar
+def main(argv: Optional[List[str]] = None) -> None:
     parser = argparse.ArgumentParser(description="Extrae columnas clave de emisiones por contaminante")
     parser.add_argument(
         "--indir",
@@ -107,7 +82,9 @@ def main() -> None:
         default="../data/interim/emisiones_por_variable_extractos",
         help="Carpeta de salida para los CSV con columnas clave",
     )
-    args = parser.parse_args()
+    agregar_argumento_jobs(parser)
+    agregar_argumento_profile(parser)
+    args = parser.parse_args(argv)
 
     indir = Path(args.indir).expanduser().resolve()
     outdir = Path(args.outdir).expanduser().resolve()
@@ -118,8 +95,10 @@ def main() -> None:
     if not files:
         raise SystemExit("No se encontraron CSV para procesar")
 
-    for path in files:
-        process_file(path, outdir)
+    resultados, fallos = ejecutar_por_archivo(process_file, files, outdir, jobs=args.jobs)
+    for _, out_path in resultados:
+        print(f"[✓] Extracto generado: {out_path.name}")
+    reportar_fallos(fallos)
 
     print(f"[✓] Extractos disponibles en: {outdir}")
 
@@ -0,0 +1,87 @@
+"""Exportación XLSX en modo de sólo escritura, con división automática en hojas.
+
+`DataFrame.to_excel` arma el libro completo en memoria antes de guardarlo y
+falla (o, en `filtrado_region_todo.py`, se omitía) cuando la tabla supera el
+máximo de filas de una hoja. `escribir_xlsx` usa el modo `write_only` de
+openpyxl, que vuelca cada fila a disco al agregarla, y reparte las filas en
+hojas numeradas (`Sheet1`, `Sheet2`, ...) de hasta `FILAS_POR_HOJA` filas de
+datos, cada una con su encabezado. Una tabla que cabe en una hoja produce el
+mismo nombre de hoja que `to_excel` (`Sheet1`).
+
+Acepta un DataFrame o un iterable de DataFrames con las mismas columnas (p. ej.
+un lector por bloques), de modo que la memoria queda acotada por el bloque.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Union
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+MAX_FILAS_EXCEL = 1_048_576  # filas por hoja en Excel, incluido el encabezado
+FILAS_POR_HOJA = MAX_FILAS_EXCEL - 1
+PREFIJO_HOJA = "Sheet"
+FILAS_POR_BLOQUE = 50_000
+
+Tabla = Union["pd.DataFrame", Iterable["pd.DataFrame"]]
+
+
+def _bloques(datos: Tabla) -> Iterator[pd.DataFrame]:
+    import pandas as pd
+
+    if isinstance(datos, pd.DataFrame):
+        for inicio in range(0, len(datos), FILAS_POR_BLOQUE):
+            yield datos.iloc[inicio:inicio + FILAS_POR_BLOQUE]
+        if datos.empty:
+            yield datos
+    else:
+        yield from datos
+
+
+def _filas(bloque: pd.DataFrame) -> Iterator[tuple]:
+    # tipos de Python y celdas vacías (None) en lugar de NaN/NA
+    valores = bloque.astype(object).where(bloque.notna(), None)
+    return valores.itertuples(index=False, name=None)
+
+
+def escribir_xlsx(
+    datos: Tabla,
+    path: Path,
+    filas_por_hoja: int = FILAS_POR_HOJA,
+    prefijo_hoja: str = PREFIJO_HOJA,
+) -> List[str]:
+    """Escribe `datos` en `path` y devuelve los nombres de las hojas creadas.
+
+    Si se necesita más de una hoja, se informa con `[i]`.
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError as exc:
+        raise SystemExit("openpyxl no está instalado (pip install openpyxl)") from exc
+
+    wb = Workbook(write_only=True)
+    hojas: List[str] = []
+    hoja = None
+    encabezado: Optional[List[str]] = None
+    en_hoja = filas_por_hoja  # fuerza la creación de la primera hoja
+
+    for bloque in _bloques(datos):
+        if encabezado is None:
+            encabezado = [str(col) for col in bloque.columns]
+        for fila in _filas(bloque):
+            if en_hoja >= filas_por_hoja:
+                hojas.append(f"{prefijo_hoja}{len(hojas) + 1}")
+                hoja = wb.create_sheet(hojas[-1])
+                hoja.append(encabezado)
+                en_hoja = 0
+            hoja.append(fila)
+            en_hoja += 1
+
+    if not hojas:
+        hojas.append(f"{prefijo_hoja}1")
+        wb.create_sheet(hojas[-1]).append(encabezado or [])
+    wb.save(path)
+    if len(hojas) > 1:
+        print(f"[i] {path.name}: tabla repartida en {len(hojas)} hojas ({hojas[0]}–{hojas[-1]})")
+    return hojas
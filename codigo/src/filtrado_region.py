@@ -11,11 +11,15 @@ Uso:
 Requisitos: pandas, openpyxl
     pip install pandas openpyxl
 """
+from __future__ import annotations
+
 import argparse
 import sys
 from pathlib import Path
 
-import pandas as pd
+from exportar_xlsx import escribir_xlsx
+from instrumentacion import agregar_argumento_profile, instrumentar
+from numeros_retc import parse_numeric
 
 EXPECTED_COLS = [
     "año","id_vu","declaracion_id","razon_social","rut_razon_social","nombre_establecimiento",
@@ -31,21 +35,6 @@ NUMERIC_COMMA_COLS = [
     "emision_combustible_primario","emision_combustible_secundario","emision_procesos","emision_total","emision_retc"
 ]
 
-def to_float_locale(val):
-    """Convierte strings con coma decimal (y notación científica con coma) a float. Deja NaN si no se puede."""
-    if pd.isna(val):
-        return pd.NA
-    if isinstance(val, (int, float)):
-        return val
-    s = str(val).strip()
-    if not s:
-        return pd.NA
-    s = s.replace(",", ".")
-    try:
-        return float(s)
-    except Exception:
-        return pd.NA
-
 def normalize_colnames(df):
     mapping = {c: c.strip() for c in df.columns}
     df = df.rename(columns=mapping)
@@ -54,16 +43,22 @@ def normalize_colnames(df):
     return df
 
 def normalize_text(s):
+    import pandas as pd
+
     if pd.isna(s):
         return ""
     return str(s).strip()
 
-def main():
+@instrumentar
+def main(argv=None):
     ap = argparse.ArgumentParser(description="Filtra RUEA por región")
     ap.add_argument("--input", required=True, help="Ruta al Excel de entrada (ckan_ruea_2023.xlsx)")
     ap.add_argument("--region", default="Metropolitana de Santiago", help="Nombre exacto de la región a filtrar")
     ap.add_argument("--outbase", default="ckan_ruea_2023_RM", help="Prefijo base de los archivos de salida")
-    args = ap.parse_args()
+    agregar_argumento_profile(ap)
+    args = ap.parse_args(argv)
+
+    import pandas as pd
 
     in_path = Path(args.input)
     if not in_path.exists():
@@ -89,7 +84,7 @@ def main():
 
     for col in NUMERIC_COMMA_COLS:
         if col in filtered.columns:
-            filtered[col] = filtered[col].map(to_float_locale)
+            filtered[col] = parse_numeric(filtered[col])[0]
 
     if "region_norm" in filtered.columns:
         filtered = filtered.drop(columns=["region_norm"])
@@ -101,7 +96,7 @@ def main():
     filtered = filtered[cols]
 
     try:
-        filtered.to_excel(out_xlsx, index=False)
+        escribir_xlsx(filtered, out_xlsx)
         filtered.to_csv(out_csv, index=False, encoding="utf-8-sig")
     except Exception as e:
         print(f"[✗] Error guardando salidas: {e}", file=sys.stderr)
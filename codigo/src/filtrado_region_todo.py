@@ -31,9 +31,15 @@ import csv
 import sys
 import re
 from pathlib import Path
-from typing import Dict, Optional, Tuple, List
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
-import pandas as pd
+from exportar_xlsx import escribir_xlsx
+from instrumentacion import agregar_argumento_profile, contar_filas, instrumentar
+from lectura_csv import mapa_diagnostico
+from numeros_retc import parse_numeric
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 # ------------------------------------------
 # Configuración de columnas esperadas
@@ -83,23 +89,9 @@ def norm_name(name: str) -> str:
         s = s.replace("__", "_")
     return s.strip("_")
 
-def to_float_locale(val):
-    if pd.isna(val):
-        return pd.NA
-    if isinstance(val, (int, float)):
-        return val
-    s = str(val).strip()
-    if s == "":
-        return pd.NA
-    s = s.replace(",", ".")
-    s = re.sub(r"\s+", "", s)
-    try:
-        return float(s)
-    except Exception:
-        return pd.NA
-
 def detect_encoding_and_delimiter(path: Path) -> Tuple[str, str]:
-    sample_bytes = path.read_bytes()[:131072]
+    with path.open("rb") as fh:
+        sample_bytes = fh.read(131072)
     text = None
     enc_used = None
     for enc in TRY_ENCODINGS:
@@ -119,24 +111,9 @@ def detect_encoding_and_delimiter(path: Path) -> Tuple[str, str]:
         delim = ";" if text.count(";") >= text.count(",") else ","
     return enc_used, delim
 
-def read_diagnostico_map(diag_csv: Path) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
-    """Lee diagnostico_headers.csv y retorna {archivo -> (encoding, separador)}"""
-    mapping = {}
-    if not diag_csv.exists():
-        return mapping
-    try:
-        df = pd.read_csv(diag_csv, dtype=str, encoding="utf-8")
-    except Exception:
-        df = pd.read_csv(diag_csv, dtype=str, encoding="latin-1")
-    for _, row in df.iterrows():
-        archivo = str(row.get("archivo", "")).strip()
-        enc = str(row.get("encoding_detectado", "") or "").strip() or None
-        sep = str(row.get("separador", "") or "").strip() or None
-        if archivo:
-            mapping[archivo] = (enc, sep)
-    return mapping
-
 def load_csv_with_diag(path: Path, diag_map: Dict[str, Tuple[Optional[str], Optional[str]]]) -> pd.DataFrame:
+    import pandas as pd
+
     enc, sep = diag_map.get(path.name, (None, None))
     if enc is None or sep is None:
         enc, sep = detect_encoding_and_delimiter(path)
@@ -147,6 +124,8 @@ def load_csv_with_diag(path: Path, diag_map: Dict[str, Tuple[Optional[str], Opti
         return pd.read_csv(path, sep=sep, dtype=str, encoding=enc, engine="python")
 
 def load_any(path: Path, diag_map: Dict[str, Tuple[Optional[str], Optional[str]]]) -> pd.DataFrame:
+    import pandas as pd
+
     if path.suffix.lower() == ".csv":
         return load_csv_with_diag(path, diag_map)
     else:
@@ -305,11 +284,11 @@ def process_one(path: Path, diag_map, region_target: str) -> Tuple[pd.DataFrame,
     if schema == "efp":
         for col in EFP_NUMERIC:
             if col in filtered.columns:
-                filtered[col] = filtered[col].map(to_float_locale)
+                filtered[col] = parse_numeric(filtered[col])[0]
     else:
         for col in RUEA2023_NUMERIC:
             if col in filtered.columns:
-                filtered[col] = filtered[col].map(to_float_locale)
+                filtered[col] = parse_numeric(filtered[col])[0]
 
     return filtered, schema
 
@@ -317,7 +296,8 @@ def process_one(path: Path, diag_map, region_target: str) -> Tuple[pd.DataFrame,
 # Main
 # ------------------------------------------
 
-def main():
+@instrumentar
+def main(argv=None):
     ap = argparse.ArgumentParser(description="Filtra todos los archivos RUEA/RUEA-EFP por región")
     ap.add_argument("--region", default="Metropolitana de Santiago", help="Región exacta a filtrar")
     ap.add_argument("--outprefix", default="", help="Prefijo opcional en archivos de salida")
@@ -327,7 +307,10 @@ def main():
         default=None,
         help="Ruta a la raíz del proyecto que contiene la carpeta 'data/' (opcional)",
     )
-    args = ap.parse_args()
+    agregar_argumento_profile(ap)
+    args = ap.parse_args(argv)
+
+    import pandas as pd
 
     # Rutas (por defecto relativas a src/, pero se puede forzar con --root)
     here = Path(__file__).resolve().parent
@@ -339,7 +322,7 @@ def main():
     diag_dir.mkdir(parents=True, exist_ok=True)
 
     diag_csv = diag_dir / "diagnostico_headers.csv"
-    diag_map = read_diagnostico_map(diag_csv)
+    diag_map = mapa_diagnostico(diag_csv)
 
     # Candidatos
     candidates: List[Path] = []
@@ -370,6 +353,7 @@ def main():
         try:
             filtered, schema = process_one(p, diag_map, args.region)
             rows_out = len(filtered)
+            contar_filas(entrada=rows_in, salida=rows_out)
             # nombres de salida
             base = p.stem
             suf = "RM" if args.region.strip().lower() == "metropolitana de santiago" else args.region.strip().replace(" ", "_")
@@ -377,7 +361,7 @@ def main():
             out_csv = out_dir / f"{base_out}.csv"
             out_xlsx = out_dir / f"{base_out}.xlsx"
             filtered.to_csv(out_csv, index=False, encoding="utf-8-sig")
-            filtered.to_excel(out_xlsx, index=False)
+            escribir_xlsx(filtered, out_xlsx)
             estado = "ok"
             # Acumular para consolidado
             if schema == "efp":
@@ -394,24 +378,17 @@ def main():
     resumen_df = pd.DataFrame(resumen_rows, columns=["archivo","filas_entrada","filas_RM","estado"])
     resumen_df.to_csv(out_dir / "resumen_filtrado_region.csv", index=False, encoding="utf-8-sig")
 
-    # Consolidados (si hay)
-    def maybe_to_excel(df: pd.DataFrame, path: Path) -> None:
-        max_rows_excel = 1_048_576
-        if len(df) > max_rows_excel:
-            print(f"[!] Omitiendo exportación XLSX ({path.name}) porque excede {max_rows_excel} filas (actual: {len(df)}).")
-            return
-        df.to_excel(path, index=False)
-
+    # Consolidados (si hay); sobre el máximo de filas de Excel se reparten en varias hojas
     if efp_consol:
         efp_all = pd.concat(efp_consol, ignore_index=True)
         efp_csv = out_dir / "ruea_efp_RM_consolidado.csv"
         efp_all.to_csv(efp_csv, index=False, encoding="utf-8-sig")
-        maybe_to_excel(efp_all, out_dir / "ruea_efp_RM_consolidado.xlsx")
+        escribir_xlsx(efp_all, out_dir / "ruea_efp_RM_consolidado.xlsx")
     if r2023_consol:
         r23_all = pd.concat(r2023_consol, ignore_index=True)
         r23_csv = out_dir / "ckan_ruea_2023_RM_consolidado.csv"
         r23_all.to_csv(r23_csv, index=False, encoding="utf-8-sig")
-        maybe_to_excel(r23_all, out_dir / "ckan_ruea_2023_RM_consolidado.xlsx")
+        escribir_xlsx(r23_all, out_dir / "ckan_ruea_2023_RM_consolidado.xlsx")
 
     print("[✓] Proceso completado.")
     print(f"    Entrada: {in_dir}")
@@ -3,7 +3,7 @@
 
 Detecta automáticamente la columna de región (buscando variantes que contengan
 "region" en el nombre) y escribe salidas en `02_emisiones_por_ano_rm` con el
-mismo esquema de columnas.
+mismo esquema de columnas (y una copia del `.esquema.json` de la etapa 01).
 """
 from __future__ import annotations
 
@@ -11,9 +11,15 @@ import argparse
 import csv
 import unicodedata
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, List, Optional
 
-import pandas as pd
+from ejecucion_por_archivo import agregar_argumento_jobs, ejecutar_por_archivo, reportar_fallos
+from esquema_retc import escribir_esquema, leer_esquema
+from instrumentacion import agregar_argumento_profile, contar_filas, instrumentar
+from lectura_csv import leer_csv_etapa
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 REGION_ALIASES = {
     "metropolitana de santiago",
@@ -68,20 +74,15 @@ def value_is_rm(value: object) -> bool:
 
 
 def process_file(path: Path, outdir: Path) -> Optional[Path]:
-    # leer pequeñas filas para detectar columna
-    preview = pd.read_csv(path, sep=';', nrows=10, dtype=str, encoding='utf-8', on_bad_lines='skip')
-    region_col = detect_region_column(preview)
+    df = leer_csv_etapa(path)
+    region_col = detect_region_column(df)
     if not region_col:
         print(f"[!] No se detectó columna de región en {path.name}; se omite")
         return None
 
-    df = pd.read_csv(path, sep=';', dtype=str, encoding='utf-8', on_bad_lines='skip')
-    if region_col not in df.columns:
-        print(f"[!] La columna detectada {region_col} no existe en {path.name}; se omite")
-        return None
-
     mask = df[region_col].map(value_is_rm)
     filtered = df[mask]
+    contar_filas(entrada=len(df), salida=len(filtered))
     if filtered.empty:
         print(f"[!] Sin registros de RM en {path.name}; se omite")
         return None
@@ -96,11 +97,14 @@ def process_file(path: Path, outdir: Path) -> Optional[Path]:
         quoting=csv.QUOTE_NONE,
         escapechar='\\',
     )
-    print(f"[✓] Filtrado RM -> {out_path.name}")
+    tipos = leer_esquema(path)
+    if tipos:
+        escribir_esquema(out_path, tipos, len(filtered))
     return out_path
 
 
-def main() -> None:
+@instrumentar
+def main(argv: Optional[List[str]] = None) -> None:
     parser = argparse.ArgumentParser(description="Filtra las emisiones anuales para Región Metropolitana")
     parser.add_argument(
         "--indir",
@@ -112,7 +116,9 @@ def main() -> None:
         default="../data/interim/02_emisiones_por_ano_rm",
         help="Directorio de salida para los CSV filtrados",
     )
-    args = parser.parse_args()
+    agregar_argumento_jobs(parser)
+    agregar_argumento_profile(parser)
+    args = parser.parse_args(argv)
 
     indir = Path(args.indir).expanduser().resolve()
     outdir = Path(args.outdir).expanduser().resolve()
@@ -123,8 +129,11 @@ def main() -> None:
     if not files:
         raise SystemExit("No se encontraron CSV anuales (retc_*.csv)")
 
-    for file in files:
-        process_file(file, outdir)
+    resultados, fallos = ejecutar_por_archivo(process_file, files, outdir, jobs=args.jobs)
+    for _, out_path in resultados:
+        if out_path is not None:
+            print(f"[✓] Filtrado RM -> {out_path.name}")
+    reportar_fallos(fallos)
 
     print(f"[✓] Filtrado completado. Archivos disponibles en: {outdir}")
 
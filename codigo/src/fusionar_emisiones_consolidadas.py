@@ -1,19 +1,31 @@
 #!/usr/bin/env python3
-"""Genera tabla única consolidada desde las tablas RM fusionadas."""
+"""Genera tabla única consolidada desde las tablas RM fusionadas.
+
+Cada tabla se lee por bloques y sólo con las columnas de `TARGET_COLUMNS`
+(más las candidatas a RUT); cada bloque proyectado se agrega directamente al
+CSV de salida, de modo que la memoria queda acotada por `--chunksize` y no por
+el tamaño del consolidado.
+"""
 from __future__ import annotations
 
 import argparse
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, Iterator, List, Optional
+
+from esquema_retc import TEXTO, combinar_esquemas, escribir_esquema, leer_esquema, selector_columnas
+from instrumentacion import agregar_argumento_profile, contar_filas, instrumentar
 
-import pandas as pd
+if TYPE_CHECKING:
+    import pandas as pd
 
 INPUT_DIR_DEFAULT = "../data/interim/03_emisiones_rm_fusionadas"
 OUTPUT_DIR_DEFAULT = "../data/interim/04_emisiones_consolidadas"
 OUTPUT_FILE = "retc_RM_consolidado.csv"
+CHUNK_ROWS = 200_000
 
 TARGET_COLUMNS = [
     "id_unico",
+    "id_establecimiento",
     "año",
     "contaminante_canon",
     "actividad_canon",
@@ -33,10 +45,22 @@ RUT_CANDIDATES = [
 ]
 
 
-def load_csv(path: Path) -> pd.DataFrame:
-    df = pd.read_csv(path, sep=';', dtype=str, encoding='utf-8', on_bad_lines='skip')
-    df.columns = [c.lstrip('\ufeff') for c in df.columns]
-    return df
+def iter_chunks(path: Path, chunksize: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    import pandas as pd
+
+    reader = pd.read_csv(
+        path,
+        sep=';',
+        dtype=str,
+        encoding='utf-8',
+        on_bad_lines='skip',
+        usecols=selector_columnas(TARGET_COLUMNS + RUT_CANDIDATES),
+        chunksize=chunksize,
+    )
+    with reader:
+        for chunk in reader:
+            chunk.columns = [c.lstrip('\ufeff') for c in chunk.columns]
+            yield chunk
 
 
 def ensure_rut_column(df: pd.DataFrame) -> pd.DataFrame:
@@ -58,31 +82,45 @@ def ensure_columns(df: pd.DataFrame) -> pd.DataFrame:
     return df[TARGET_COLUMNS]
 
 
-def main() -> None:
+@instrumentar
+def main(argv: Optional[List[str]] = None) -> None:
     parser = argparse.ArgumentParser(description="Consolida tablas RM en un único CSV")
     parser.add_argument("--indir", default=INPUT_DIR_DEFAULT, help="Carpeta con tablas fusionadas")
     parser.add_argument("--outdir", default=OUTPUT_DIR_DEFAULT, help="Carpeta de salida")
     parser.add_argument("--outfile", default=OUTPUT_FILE, help="Nombre del archivo de salida")
-    args = parser.parse_args()
+    parser.add_argument("--chunksize", type=int, default=CHUNK_ROWS, help="Filas leídas por bloque")
+    agregar_argumento_profile(parser)
+    args = parser.parse_args(argv)
+
+    import pandas as pd
 
     indir = Path(args.indir).expanduser().resolve()
     outdir = Path(args.outdir).expanduser().resolve()
     outdir.mkdir(parents=True, exist_ok=True)
 
-    frames: List[pd.DataFrame] = []
-    for csv_path in sorted(indir.glob('retc*_RM.csv')):
-        df = load_csv(csv_path)
-        df = ensure_columns(df)
-        frames.append(df)
-        print(f"[✓] Incorporado {csv_path.name} ({len(df)} filas)")
-
-    if not frames:
+    csv_paths = sorted(indir.glob('retc*_RM.csv'))
+    if not csv_paths:
         raise SystemExit("No se encontraron tablas para consolidar")
 
-    result = pd.concat(frames, ignore_index=True)
     out_path = outdir / args.outfile
-    result.to_csv(out_path, index=False, sep=';', encoding='utf-8-sig')
-    print(f"[✓] Consolidado generado en: {out_path} ({len(result)} filas)")
+    # Encabezado (con BOM) una sola vez; los bloques se agregan sin encabezado
+    pd.DataFrame(columns=TARGET_COLUMNS).to_csv(out_path, index=False, sep=';', encoding='utf-8-sig')
+    total = 0
+    for csv_path in csv_paths:
+        rows = 0
+        for chunk in iter_chunks(csv_path, args.chunksize):
+            chunk = ensure_columns(chunk)
+            chunk.to_csv(out_path, mode='a', header=False, index=False, sep=';', encoding='utf-8')
+            rows += len(chunk)
+        total += rows
+        print(f"[✓] Incorporado {csv_path.name} ({rows} filas)")
+
+    contar_filas(entrada=total, salida=total)
+    esquemas = [leer_esquema(path) for path in csv_paths]
+    if all(esquemas):
+        combinado = combinar_esquemas(esquemas)
+        escribir_esquema(out_path, {col: combinado.get(col, TEXTO) for col in TARGET_COLUMNS}, total)
+    print(f"[✓] Consolidado generado en: {out_path} ({total} filas)")
 
 
 if __name__ == '__main__':
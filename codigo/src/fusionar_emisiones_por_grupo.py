@@ -1,43 +1,165 @@
 #!/usr/bin/env python3
-"""Fusiona los CSV de emisiones RM según grupos de años compatibles."""
+"""Fusiona los CSV de emisiones RM según grupos de años compatibles.
+
+Si todos los años de un grupo comparten el mismo encabezado, los archivos se
+concatenan byte a byte (sin BOM ni encabezados repetidos) sin pasar por
+pandas; sólo cuando los esquemas difieren se fusiona con DataFrames. Los años
+que no forman grupo se copian por el mismo camino. Como en la lectura con
+pandas, las líneas con más campos que el encabezado se omiten y se informan
+con `[!]`, de modo que `--modo directo` y `--modo dataframe` producen las
+mismas filas. Los `.esquema.json` de cada año se combinan en el de la tabla
+fusionada.
+"""
 from __future__ import annotations
 
 import argparse
+import codecs
 import csv
 from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
 
-import pandas as pd
+from esquema_retc import combinar_esquemas, escribir_esquema, leer_esquema
+from instrumentacion import agregar_argumento_profile, contar_filas, instrumentar
+from lectura_csv import informar_omitidas, leer_csv_etapa
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
 
 GROUPS = {
     "2005_2015": list(range(2005, 2016)),
     "2016_2018": list(range(2016, 2019)),
 }
+BUFFER_BYTES = 16 * 1024 * 1024
+MODOS = ("directo", "dataframe")
 
 
 def load_csv(path: Path) -> pd.DataFrame:
-    return pd.read_csv(path, sep=';', dtype=str, encoding='utf-8', on_bad_lines='skip')
+    return leer_csv_etapa(path)
 
 
-def fuse_years(years, indir: Path) -> pd.DataFrame:
-    frames = []
+def year_paths(years, indir: Path) -> List[Path]:
+    paths = []
     for year in years:
         path = indir / f"retc_{year}_RM.csv"
         if not path.exists():
             raise FileNotFoundError(f"No existe {path}")
-        frames.append(load_csv(path))
-    return pd.concat(frames, ignore_index=True)
+        paths.append(path)
+    return paths
 
 
-def copy_year(year: int, indir: Path, outdir: Path) -> None:
+def fuse_years(years, indir: Path) -> pd.DataFrame:
+    import pandas as pd
+
+    return pd.concat([load_csv(path) for path in year_paths(years, indir)], ignore_index=True)
+
+
+def read_header(path: Path) -> bytes:
+    """Primera línea del archivo sin BOM ni salto de línea."""
+    with path.open('rb') as fh:
+        line = fh.readline()
+    line = line[len(codecs.BOM_UTF8):] if line.startswith(codecs.BOM_UTF8) else line
+    return line.rstrip(b'\r\n')
+
+
+def common_header(paths: Sequence[Path]) -> Optional[bytes]:
+    """Encabezado compartido por todos los archivos, o None si alguno difiere."""
+    headers = {read_header(path) for path in paths}
+    return headers.pop() if len(headers) == 1 else None
+
+
+def field_counts(data: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """(posición de cada fin de línea, campos de cada línea) de `data`, que termina en fin de línea.
+
+    `;` y saltos de línea precedidos por `\\` son parte del valor, como en la
+    lectura con `escapechar='\\'`.
+    """
+    import numpy as np
+
+    raw = np.frombuffer(data, dtype=np.uint8)
+    escaped = np.zeros(len(raw), dtype=bool)
+    escaped[1:] = raw[:-1] == ord('\\')
+    ends = np.flatnonzero((raw == ord('\n')) & ~escaped)
+    separators = np.flatnonzero((raw == ord(';')) & ~escaped)
+    return ends, np.diff(np.searchsorted(separators, ends), prepend=0) + 1
+
+
+def valid_lines(data: bytes, fields: int, first_line: int) -> Tuple[bytes, int, List[Optional[int]], int]:
+    """(líneas de `data` con a lo sumo `fields` campos, filas no vacías, números de las omitidas, líneas leídas)."""
+    import numpy as np
+
+    ends, counts = field_counts(data)
+    starts = np.r_[0, ends[:-1] + 1]
+    lengths = ends - starts - (np.frombuffer(data, dtype=np.uint8)[np.maximum(ends - 1, 0)] == ord('\r'))
+    bad = counts > fields
+    omitted: List[Optional[int]] = [first_line + int(i) for i in np.flatnonzero(bad)]
+    if omitted:
+        data = b''.join(data[a:b + 1] for a, b in zip(starts[~bad], ends[~bad]))
+    return data, int((~bad & (lengths > 0)).sum()), omitted, len(ends)
+
+
+def last_line_end(data: bytes) -> int:
+    """Posición siguiente al último salto de línea no escapado (0 si no hay)."""
+    pos = data.rfind(b'\n')
+    while pos > 0 and data[pos - 1:pos] == b'\\':
+        pos = data.rfind(b'\n', 0, pos - 1)
+    return pos + 1
+
+
+def concat_bytes(paths: Sequence[Path], header: bytes, dst: Path) -> int:
+    """Concatena los cuerpos de `paths` bajo un único encabezado; devuelve las filas escritas."""
+    fields = int(field_counts(header + b'\n')[1][0])
+    rows = 0
+    with dst.open('wb') as out:
+        out.write(codecs.BOM_UTF8 + header + b'\n')
+        for path in paths:
+            omitted: List[Optional[int]] = []
+            line = 2  # la 1 es el encabezado
+            pending = b''
+            with path.open('rb', buffering=0) as fh:
+                fh.readline()
+                while True:
+                    block = fh.read(BUFFER_BYTES)
+                    data = pending + block
+                    if block:
+                        # sólo líneas completas; el resto pasa al bloque siguiente
+                        cut = last_line_end(data)
+                        data, pending = data[:cut], data[cut:]
+                    elif data and not data.endswith(b'\n'):
+                        data += b'\n'
+                    if data:
+                        kept, written, bad, read = valid_lines(data, fields, line)
+                        out.write(kept)
+                        rows += written
+                        omitted += bad
+                        line += read
+                    if not block:
+                        break
+            informar_omitidas(path, omitted)
+    return rows
+
+
+def copy_year(year: int, indir: Path, outdir: Path, modo: str = "directo") -> None:
     src = indir / f"retc_{year}_RM.csv"
     dst = outdir / f"retc_{year}_RM.csv"
     dst.parent.mkdir(parents=True, exist_ok=True)
-    df = load_csv(src)
-    df.to_csv(dst, index=False, sep=';', encoding='utf-8-sig', quoting=csv.QUOTE_NONE, escapechar='\\')
+    if modo == "directo":
+        # Copia y no enlace duro: las etapas 03 siguientes reescriben el archivo en
+        # el mismo lugar y con un enlace modificarían también la salida de la etapa 02.
+        rows = concat_bytes([src], read_header(src), dst)
+        contar_filas(entrada=rows, salida=rows)
+    else:
+        df = load_csv(src)
+        contar_filas(entrada=len(df), salida=len(df))
+        df.to_csv(dst, index=False, sep=';', encoding='utf-8-sig', quoting=csv.QUOTE_NONE, escapechar='\\')
+    tipos = leer_esquema(src)
+    if tipos:
+        escribir_esquema(dst, tipos)
     print(f"[=] Copiado {src.name} -> {dst.name}")
 
 
-def main() -> None:
+@instrumentar
+def main(argv: Optional[List[str]] = None) -> None:
     parser = argparse.ArgumentParser(description="Fusiona emisiones RM por grupos de años")
     parser.add_argument(
         "--indir",
@@ -49,7 +171,14 @@ def main() -> None:
         default="../data/interim/03_emisiones_rm_fusionadas",
         help="Directorio de salida para las tablas fusionadas",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--modo",
+        choices=MODOS,
+        default="directo",
+        help="directo: concatena bytes si los encabezados coinciden; dataframe: siempre vía pandas",
+    )
+    agregar_argumento_profile(parser)
+    args = parser.parse_args(argv)
 
     indir = Path(args.indir).expanduser().resolve()
     outdir = Path(args.outdir).expanduser().resolve()
@@ -57,10 +186,23 @@ def main() -> None:
 
     fused_years = set()
     for label, years in GROUPS.items():
-        df = fuse_years(years, indir)
         out_path = outdir / f"retc_{label}_RM.csv"
-        df.to_csv(out_path, index=False, sep=';', encoding='utf-8-sig', quoting=csv.QUOTE_NONE, escapechar='\\')
-        print(f"[✓] Fusionado {label} -> {out_path.name} ({len(df)} filas)")
+        paths = year_paths(years, indir)
+        header = common_header(paths) if args.modo == "directo" else None
+        if header is not None:
+            rows = concat_bytes(paths, header, out_path)
+            contar_filas(entrada=rows, salida=rows)
+            print(f"[✓] Fusionado {label} -> {out_path.name} ({rows} filas, concatenación directa)")
+        else:
+            if args.modo == "directo":
+                print(f"[!] Encabezados distintos en {label}; se fusiona con pandas")
+            df = fuse_years(years, indir)
+            contar_filas(entrada=len(df), salida=len(df))
+            df.to_csv(out_path, index=False, sep=';', encoding='utf-8-sig', quoting=csv.QUOTE_NONE, escapechar='\\')
+            print(f"[✓] Fusionado {label} -> {out_path.name} ({len(df)} filas)")
+        tipos = [leer_esquema(path) for path in paths]
+        if all(tipos):
+            escribir_esquema(out_path, combinar_esquemas(tipos))
         fused_years.update(years)
 
     # Copiar el resto de años sin fusionar
@@ -68,7 +210,7 @@ def main() -> None:
         year = int(csv_path.stem.split('_')[1])
         if year in fused_years:
             continue
-        copy_year(year, indir, outdir)
+        copy_year(year, indir, outdir, args.modo)
 
     print(f"[✓] Tablas disponibles en: {outdir}")
 
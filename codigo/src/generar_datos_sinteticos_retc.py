@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""Genera archivos RETC sintéticos con la forma de las descargas del portal MMA.
+
+Produce `ruea-efp-<año>-ckan.(csv|xlsx)` para 2005–2022 con el esquema
+`filtrado_region_todo.EFP_EXPECTED` y `ckan_ruea_2023.(csv|xlsx)` con
+`filtrado_region_todo.RUEA2023_EXPECTED`, imitando lo que encontramos en los
+archivos reales:
+  - separador `;` y coma decimal (con separador de miles y notación científica),
+  - encodings mezclados (utf-8-sig, utf-8, cp1252),
+  - variantes de escritura de región, comuna y contaminante,
+  - algunos años en XLSX.
+
+Los establecimientos se reutilizan entre años para que las etapas de
+agregación y cruce tengan cardinalidades realistas.
+
+Uso:
+  python generar_datos_sinteticos_retc.py --filas 1000000 \
+    --outdir ../data/raw/sinteticos/descargas_retc
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+
+from estandarizar_contaminantes_rm import RAW_CANON
+from filtrado_region_todo import EFP_EXPECTED, RUEA2023_EXPECTED
+from instrumentacion import agregar_argumento_profile, instrumentar
+from normalizar_comunas_rm import CANON_COMUNAS
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+EFP_YEARS = list(range(2005, 2023))
+RUEA_YEAR = 2023
+ENCODINGS = ["utf-8-sig", "cp1252", "utf-8"]
+CHUNK_ROWS = 250_000
+MAX_XLSX_ROWS = 1_048_575  # límite de Excel menos la fila de encabezado
+
+# Variantes de región tal como aparecen en las descargas
+RM_REGIONS = [
+    "Metropolitana de Santiago",
+    "Región Metropolitana de Santiago",
+    "Metropolitana",
+    "RM",
+    "Region Metropolitana de Santiago (RM)",
+]
+OTHER_REGIONS = [
+    "Valparaíso",
+    "Biobío",
+    "Del Libertador Gral. Bernardo O'Higgins",
+    "Antofagasta",
+    "Los Lagos",
+]
+# Proporción aproximada de establecimientos RM frente al resto del país
+RM_SHARE = 0.4
+
+# Caja aproximada de la Región Metropolitana (lon_min, lat_min, lon_max, lat_max)
+RM_BBOX = (-71.72, -34.29, -69.77, -32.92)
+
+FUENTES = ["Caldera", "Grupo electrógeno", "Horno", "Proceso", "Turbina"]
+COMBUSTIBLES = ["Gas natural", "Petróleo diésel", "Leña", "GLP", "Carbón"]
+RUBROS = ["Industria manufacturera", "Generación eléctrica", "Minería", "Comercio", "Salud"]
+CIIU4 = ["C1010", "C2394", "D3510", "B0810", "G4730", "Q8610", "E3821"]
+
+
+def parse_scale(value: str) -> int:
+    """Interpreta escalas como `10k`, `1M` o `250000`."""
+    text = value.strip().lower().replace("_", "")
+    factor = 1
+    if text.endswith("k"):
+        factor, text = 1_000, text[:-1]
+    elif text.endswith("m"):
+        factor, text = 1_000_000, text[:-1]
+    return int(float(text) * factor)
+
+
+def comuna_variants() -> List[str]:
+    variants = []
+    for key, canon in CANON_COMUNAS.items():
+        variants.extend([canon, key, canon.upper()])
+    return variants
+
+
+def format_decimal_comma(values: np.ndarray, rng: np.random.Generator) -> pd.Series:
+    """Formatea floats con coma decimal, miles con punto y notación científica."""
+    import numpy as np
+    import pandas as pd
+
+    text = pd.Series(np.round(values, 4)).astype(str).str.replace(".", ",", regex=False)
+    big = values >= 1000
+    if big.any():
+        text[big] = [f"{v:,.3f}".replace(",", "X").replace(".", ",").replace("X", ".") for v in values[big]]
+    sci = rng.random(len(values)) < 0.02
+    if sci.any():
+        text[sci] = [f"{v:.3E}".replace(".", ",") for v in values[sci]]
+    return text
+
+
+def build_facilities(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    import numpy as np
+    import pandas as pd
+
+    comunas = np.array(comuna_variants())
+    ids = np.arange(1, n + 1)
+    in_rm = rng.random(n) < RM_SHARE
+    region = np.where(
+        in_rm,
+        rng.choice(RM_REGIONS, n),
+        rng.choice(OTHER_REGIONS, n),
+    )
+    lon = rng.uniform(RM_BBOX[0], RM_BBOX[2], n)
+    lat = rng.uniform(RM_BBOX[1], RM_BBOX[3], n)
+    ruts = [f"{76_000_000 + i * 37:,}".replace(",", ".") + f"-{i % 10}" for i in ids]
+    return pd.DataFrame(
+        {
+            "id_vu": ids.astype(str),
+            "razon_social": [f"Empresa Sintética {i} S.A." for i in ids],
+            "rut_razon_social": ruts,
+            "nombre_establecimiento": [f"Planta {i}" for i in ids],
+            "ciiu4": rng.choice(RUBROS, n),
+            "id_ciiu4": rng.choice(CIIU4, n),
+            "region": region,
+            "provincia": np.where(in_rm, "Santiago", "Otra"),
+            "comuna": rng.choice(comunas, n),
+            "id_comuna": (13101 + ids % 52).astype(str),
+            "latitud": format_decimal_comma(lat, rng),
+            "longitud": format_decimal_comma(lon, rng),
+        }
+    )
+
+
+def sample_rows(
+    facilities: pd.DataFrame,
+    n: int,
+    year: int,
+    columns: Sequence[str],
+    rng: np.random.Generator,
+) -> pd.DataFrame:
+    import numpy as np
+    import pandas as pd
+
+    idx = rng.integers(0, len(facilities), n)
+    base = facilities.iloc[idx].reset_index(drop=True)
+    contaminants = np.array(list(RAW_CANON))
+    cont_idx = rng.integers(0, len(contaminants), n)
+    emissions = rng.lognormal(mean=0.0, sigma=2.5, size=n)
+    emission_text = format_decimal_comma(emissions, rng)
+
+    data: Dict[str, object] = {
+        "año": str(year),
+        "rubro_vu": base["ciiu4"],
+        "id_rubro_vu": base["id_ciiu4"],
+        "rubro": base["ciiu4"],
+        "rubro_id": base["id_ciiu4"],
+        "ciiu4_id": base["id_ciiu4"],
+        "ciiu6": base["ciiu4"],
+        "ciiu6_id": base["id_ciiu4"] + "0",
+        "declaracion_id": (rng.integers(1, 10**7, n)).astype(str),
+        "codigo_unico_territorial": base["id_comuna"],
+        "cantidad_toneladas": emission_text,
+        "emision_total": emission_text,
+        "emision_combustible_primario": emission_text,
+        "emision_combustible_secundario": "",
+        "emision_procesos": "",
+        "emision_retc": emission_text,
+        "unidad": "ton/año",
+        "contaminantes": contaminants[cont_idx],
+        "contaminante": contaminants[cont_idx],
+        "id_contaminantes": cont_idx.astype(str),
+        "contaminante_id": cont_idx.astype(str),
+        "fuente_emisora_general": rng.choice(FUENTES, n),
+        "id_fuente_emisora": rng.integers(1, 50, n).astype(str),
+        "tipo_fuente": rng.choice(FUENTES, n),
+        "source_id": rng.integers(1, 10**6, n).astype(str),
+        "codigo_fuente": rng.integers(1, 10**4, n).astype(str),
+        "combustible_primario": rng.choice(COMBUSTIBLES, n),
+        "ccf8_primario": rng.integers(10**7, 10**8, n).astype(str),
+        "combustible_secundario": "",
+        "ccf8_secundario": "",
+        "ccf8_procesos": "",
+        "origen_data": "sintetico",
+        "tipo_outlier": "",
+    }
+    for col in columns:
+        if col not in data:
+            data[col] = base[col]
+    return pd.DataFrame({col: data[col] for col in columns})
+
+
+def write_table(
+    path: Path,
+    facilities: pd.DataFrame,
+    rows: int,
+    year: int,
+    columns: Sequence[str],
+    encoding: str,
+    rng: np.random.Generator,
+) -> Path:
+    if path.suffix == ".xlsx":
+        if rows > MAX_XLSX_ROWS:
+            print(f"[!] {path.name}: {rows} filas exceden el límite de Excel; se escribe CSV")
+            path = path.with_suffix(".csv")
+        else:
+            sample_rows(facilities, rows, year, columns, rng).to_excel(path, index=False)
+            return path
+
+    written = 0
+    first = True
+    while written < rows or first:
+        n = min(CHUNK_ROWS, rows - written)
+        chunk = sample_rows(facilities, n, year, columns, rng)
+        chunk.to_csv(
+            path,
+            mode="w" if first else "a",
+            header=first,
+            index=False,
+            sep=";",
+            # el BOM sólo se escribe en el primer bloque
+            encoding=encoding if first else encoding.replace("-sig", ""),
+            quoting=csv.QUOTE_MINIMAL,
+            errors="replace",
+        )
+        written += n
+        first = False
+    return path
+
+
+def generate(
+    outdir: Path,
+    total_rows: int,
+    seed: int = 42,
+    xlsx_years: Sequence[int] = (2021, RUEA_YEAR),
+) -> List[Path]:
+    """Escribe el conjunto completo 2005–2023 repartiendo `total_rows` entre los años."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    outdir.mkdir(parents=True, exist_ok=True)
+    years = EFP_YEARS + [RUEA_YEAR]
+    per_year = max(1, total_rows // len(years))
+    facilities = build_facilities(max(50, total_rows // 20), rng)
+
+    paths = []
+    for i, year in enumerate(years):
+        suffix = ".xlsx" if year in xlsx_years else ".csv"
+        if year == RUEA_YEAR:
+            name, columns = "ckan_ruea_2023", RUEA2023_EXPECTED
+        else:
+            name, columns = f"ruea-efp-{year}-ckan", EFP_EXPECTED
+        encoding = ENCODINGS[i % len(ENCODINGS)]
+        path = write_table(outdir / f"{name}{suffix}", facilities, per_year, year, columns, encoding, rng)
+        paths.append(path)
+    return paths
+
+
+@instrumentar
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Genera descargas RETC sintéticas para pruebas de rendimiento")
+    parser.add_argument(
+        "--outdir",
+        default="../data/raw/sinteticos/descargas_retc",
+        help="Carpeta de salida de los archivos sintéticos",
+    )
+    parser.add_argument("--filas", default="10k", help="Filas totales 2005–2023 (admite 10k, 1M, 10M)")
+    parser.add_argument("--semilla", type=int, default=42, help="Semilla del generador aleatorio")
+    parser.add_argument(
+        "--xlsx-anos",
+        default=f"2021,{RUEA_YEAR}",
+        help="Años exportados como XLSX (separados por coma; vacío = todo CSV)",
+    )
+    agregar_argumento_profile(parser)
+    args = parser.parse_args(argv)
+
+    outdir = Path(args.outdir).expanduser().resolve()
+    xlsx_years = [int(y) for y in args.xlsx_anos.split(",") if y.strip()]
+    paths = generate(outdir, parse_scale(args.filas), args.semilla, xlsx_years)
+    for path in paths:
+        print(f"[✓] Generado {path.name}")
+    print(f"[✓] Datos sintéticos disponibles en: {outdir}")
+
+
+if __name__ == "__main__":
+    main()
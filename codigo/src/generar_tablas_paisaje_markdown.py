@@ -5,19 +5,25 @@ from __future__ import annotations
 import argparse
 from collections import defaultdict
 from pathlib import Path
+from typing import List, Optional
 
-import pandas as pd
+from esquema_retc import dtypes_lectura
+from instrumentacion import agregar_argumento_profile, instrumentar
 
 DEFAULT_CONSOLIDADO = "../data/interim/04_emisiones_consolidadas/retc_RM_consolidado.csv"
 DEFAULT_OUTPUT = "../docs/tablas/emisiones_2023_por_paisaje.md"
 CHUNKSIZE = 200000
 
 
-def main() -> None:
+@instrumentar
+def main(argv: Optional[List[str]] = None) -> None:
     parser = argparse.ArgumentParser(description="Tablas Markdown emisiones 2023 por unidad de paisaje")
     parser.add_argument("--consolidado", default=DEFAULT_CONSOLIDADO)
     parser.add_argument("--output", default=DEFAULT_OUTPUT)
-    args = parser.parse_args()
+    agregar_argumento_profile(parser)
+    args = parser.parse_args(argv)
+
+    import pandas as pd
 
     consolidado_path = Path(args.consolidado).expanduser().resolve()
     output_path = Path(args.output).expanduser().resolve()
@@ -25,7 +31,7 @@ def main() -> None:
 
     acumulado = defaultdict(float)
 
-    for chunk in pd.read_csv(consolidado_path, sep=';', dtype=str, encoding='utf-8', on_bad_lines='skip', chunksize=CHUNKSIZE):
+    for chunk in pd.read_csv(consolidado_path, sep=';', dtype=dtypes_lectura(consolidado_path), encoding='utf-8', on_bad_lines='skip', chunksize=CHUNKSIZE):
         chunk = chunk[chunk['año'] == '2023']
         if chunk.empty:
             continue
@@ -4,27 +4,33 @@ from __future__ import annotations
 
 import argparse
 from pathlib import Path
+from typing import List, Optional
 
-import matplotlib.pyplot as plt
-import pandas as pd
+from esquema_retc import dtypes_lectura
+from instrumentacion import agregar_argumento_profile, instrumentar
 
 DEFAULT_CONSOLIDADO = "../data/interim/04_emisiones_consolidadas/retc_RM_consolidado.csv"
 DEFAULT_OUTDIR = "../outputs/graficos/emisiones_acumuladas_2023"
 DEFAULT_SUMMARY = "../outputs/tablas/datos_resumidos/LBP_AIRE_20250926_emisiones_comuna_contaminante_2023.csv"
 
 
-def main() -> None:
+@instrumentar
+def main(argv: Optional[List[str]] = None) -> None:
     parser = argparse.ArgumentParser(description="Emisiones 2023 por comuna y contaminante")
     parser.add_argument("--consolidado", default=DEFAULT_CONSOLIDADO)
     parser.add_argument("--outdir", default=DEFAULT_OUTDIR)
     parser.add_argument("--summary", default=DEFAULT_SUMMARY)
-    args = parser.parse_args()
+    agregar_argumento_profile(parser)
+    args = parser.parse_args(argv)
+
+    import matplotlib.pyplot as plt
+    import pandas as pd
 
     consolidado_path = Path(args.consolidado).expanduser().resolve()
     outdir = Path(args.outdir).expanduser().resolve()
     outdir.mkdir(parents=True, exist_ok=True)
 
-    chunks = pd.read_csv(consolidado_path, sep=';', dtype=str, encoding='utf-8', on_bad_lines='skip', chunksize=200000)
+    chunks = pd.read_csv(consolidado_path, sep=';', dtype=dtypes_lectura(consolidado_path), encoding='utf-8', on_bad_lines='skip', chunksize=200000)
     rows = []
     for chunk in chunks:
         chunk = chunk[chunk['año'] == '2023']
@@ -6,15 +6,17 @@ import argparse
 import math
 from collections import defaultdict, Counter
 from pathlib import Path
+from typing import List, Optional
 
-import matplotlib.pyplot as plt
-import pandas as pd
+from esquema_retc import dtypes_lectura
+from instrumentacion import agregar_argumento_profile, instrumentar
 
 CHUNKSIZE = 200000
 MIN_POSITIVE = 1e-20  # evita log(0)
 
 
-def main() -> None:
+@instrumentar
+def main(argv: Optional[List[str]] = None) -> None:
     parser = argparse.ArgumentParser(description="Distribución de emisiones por contaminante")
     parser.add_argument(
         "--input",
@@ -31,7 +33,11 @@ def main() -> None:
         default="../outputs/tablas/datos_resumidos/LBP_AIRE_20250926_resumen_distribucion_emisiones.csv",
         help="Ruta del CSV resumido",
     )
-    args = parser.parse_args()
+    agregar_argumento_profile(parser)
+    args = parser.parse_args(argv)
+
+    import matplotlib.pyplot as plt
+    import pandas as pd
 
     input_path = Path(args.input).expanduser().resolve()
     outdir = Path(args.outdir).expanduser().resolve()
@@ -43,7 +49,7 @@ def main() -> None:
     values = defaultdict(list)
     zero_counts = Counter()
 
-    for chunk in pd.read_csv(input_path, sep=';', dtype=str, encoding='utf-8', on_bad_lines='skip', chunksize=CHUNKSIZE):
+    for chunk in pd.read_csv(input_path, sep=';', dtype=dtypes_lectura(input_path), encoding='utf-8', on_bad_lines='skip', chunksize=CHUNKSIZE):
         chunk['emision_total'] = pd.to_numeric(chunk['emision_total'], errors='coerce')
         chunk = chunk.dropna(subset=['emision_total', 'contaminante_canon'])
         zero_counts.update(chunk[chunk['emision_total'] <= 0]['contaminante_canon'])
@@ -23,27 +23,19 @@ Requisitos:
   pip install pandas matplotlib
 """
 
+from __future__ import annotations
+
 import argparse
 import re
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import matplotlib.pyplot as plt
-from matplotlib.ticker import MaxNLocator
-import pandas as pd
-
+from instrumentacion import agregar_argumento_profile, instrumentar
+from lectura_csv import leer_csv_detectado
+from numeros_retc import parse_numeric
 
-def to_float(s):
-    """Convierte string con coma/punto/científica a float (None si vacío)."""
-    if s is None:
-        return None
-    s = str(s).strip()
-    if s == "" or s.lower() in {"na", "nan", "none"}:
-        return None
-    s = s.replace(",", ".")
-    try:
-        return float(s)
-    except Exception:
-        return None
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 def safe_name(s: str) -> str:
@@ -67,14 +59,10 @@ def detect_format(df: pd.DataFrame, force_pivot=False, force_long=False) -> str:
     return "pivot"
 
 
-def load_csv_any(path: Path) -> pd.DataFrame:
-    try:
-        return pd.read_csv(path, dtype=str)
-    except Exception:
-        return pd.read_csv(path, dtype=str, encoding="latin-1")
-
-
 def plot_series(x_years, y_vals, title, out_png):
+    import matplotlib.pyplot as plt
+    from matplotlib.ticker import MaxNLocator
+
     plt.figure(figsize=(8, 4.5))
     plt.plot(x_years, y_vals, marker="o")
     ax = plt.gca()
@@ -88,7 +76,8 @@ def plot_series(x_years, y_vals, title, out_png):
     plt.close()
 
 
-def main():
+@instrumentar
+def main(argv=None):
     ap = argparse.ArgumentParser(description="Graficar emisiones por año por grupo/contaminante")
     ap.add_argument("--in", dest="infile", required=True, help="CSV de entrada (pivot o largo)")
     ap.add_argument("--outdir", required=True, help="Carpeta de salida para PNG")
@@ -98,13 +87,16 @@ def main():
     ap.add_argument("--start", type=int, default=None, help="Año inicio (opcional)")
     ap.add_argument("--end", type=int, default=None, help="Año fin (opcional)")
     ap.add_argument("--zip", action="store_true", help="Comprimir todos los PNG a un ZIP")
-    args = ap.parse_args()
+    agregar_argumento_profile(ap)
+    args = ap.parse_args(argv)
+
+    import pandas as pd
 
     infile = Path(args.infile).expanduser().resolve()
     outdir = Path(args.outdir).expanduser().resolve()
     outdir.mkdir(parents=True, exist_ok=True)
 
-    df = load_csv_any(infile)
+    df = leer_csv_detectado(infile)
     fmt = detect_format(df, force_pivot=args.pivot, force_long=args.longitudinal)
 
     targets = None
@@ -132,7 +124,7 @@ def main():
             group_cols = [c for c in group_cols if c in targets]
 
         for col in group_cols:
-            y = df[col].map(to_float)
+            y = parse_numeric(df[col])[0]
             if y.notna().any():
                 out_png = outdir / f"{safe_name(col)}.png"
                 title = f"{col} — Emisión total por año (t/año)"
@@ -147,7 +139,7 @@ def main():
                              f"Encontradas: {df.columns.tolist()}")
         df = df.rename(columns=lower)
         df["año"] = pd.to_numeric(df["año"].astype(str).str.extract(r"(\d{4})", expand=False), errors="coerce")
-        df["emision_total_ton_anio"] = df["emision_total_ton_anio"].map(to_float)
+        df["emision_total_ton_anio"] = parse_numeric(df["emision_total_ton_anio"])[0]
         df = df.dropna(subset=["año"]).sort_values("año")
         df["año"] = df["año"].astype(int)
 
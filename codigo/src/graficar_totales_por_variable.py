@@ -19,10 +19,14 @@ import argparse
 import re
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable
+from typing import TYPE_CHECKING, Iterable, List, Optional
 
-import matplotlib.pyplot as plt
-import pandas as pd
+from esquema_retc import COLUMNAS_TOTALES, selector_columnas
+from instrumentacion import agregar_argumento_profile, instrumentar
+from numeros_retc import parse_numeric
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 SKIP_FILES = {
     "diccionario_id_nombre_por_grupo.csv",
@@ -35,27 +39,15 @@ def safe_name(name: str) -> str:
 
 
 def to_year(series: pd.Series) -> pd.Series:
-    return pd.to_numeric(series.astype(str).str.extract(r"(\d{4})", expand=False), errors="coerce")
-
-
-def to_float(series: pd.Series) -> pd.Series:
-    return pd.to_numeric(series.apply(normalize_number), errors="coerce")
-
+    import pandas as pd
 
-def normalize_number(value):
-    if pd.isna(value):
-        return None
-    text = str(value).strip()
-    if text == "" or text.lower() in {"na", "nan", "none"}:
-        return None
-    if "," in text and "." in text:
-        text = text.replace(".", "")
-    text = text.replace(",", ".")
-    return text
+    return pd.to_numeric(series.astype(str).str.extract(r"(\d{4})", expand=False), errors="coerce")
 
 
 def aggregate_file(path: Path) -> pd.DataFrame:
-    df = pd.read_csv(path, dtype=str)
+    import pandas as pd
+
+    df = pd.read_csv(path, dtype=str, usecols=selector_columnas(COLUMNAS_TOTALES))
     if "año" not in df.columns and "ano" not in df.columns:
         raise ValueError(f"El archivo {path.name} no contiene columna año/ano")
     year_col = "año" if "año" in df.columns else "ano"
@@ -64,7 +56,7 @@ def aggregate_file(path: Path) -> pd.DataFrame:
     # Usar columna consolidada `cantidad_toneladas`
     if "cantidad_toneladas" not in df.columns:
         raise ValueError(f"El archivo {path.name} no tiene columna cantidad_toneladas tras la fusión")
-    df["emision"] = to_float(df["cantidad_toneladas"])
+    df["emision"] = parse_numeric(df["cantidad_toneladas"])[0]
 
     aggregated = (
         df.dropna(subset=["year"])
@@ -76,6 +68,8 @@ def aggregate_file(path: Path) -> pd.DataFrame:
 
 
 def plot_series(df: pd.DataFrame, out_png: Path, contaminant: str) -> None:
+    import matplotlib.pyplot as plt
+
     if df.empty:
         return
     plt.figure(figsize=(8, 4.5))
@@ -98,7 +92,8 @@ def resolve_summary_path(default_dir: Path, summary: str | None) -> Path:
     return default_dir / f"LBP_AIRE_{date_tag}_totales_por_variable.csv"
 
 
-def main() -> None:
+@instrumentar
+def main(argv: Optional[List[str]] = None) -> None:
     parser = argparse.ArgumentParser(description="Gráficos de emisiones totales por contaminante")
     parser.add_argument(
         "--indir",
@@ -115,7 +110,10 @@ def main() -> None:
         default=None,
         help="Ruta del CSV de resumen (por defecto outputs/tablas/datos_resumidos/LBP_AIRE_<fecha>_totales_por_variable.csv)",
     )
-    args = parser.parse_args()
+    agregar_argumento_profile(parser)
+    args = parser.parse_args(argv)
+
+    import pandas as pd
 
     indir = Path(args.indir).expanduser().resolve()
     outdir = Path(args.outdir).expanduser().resolve()
@@ -0,0 +1,202 @@
+"""Grilla de consulta precalculada para clasificar puntos en una capa de polígonos.
+
+Con `sjoin(..., predicate='within')` cada punto pasa por una prueba exacta
+contra los polígonos candidatos. `GrillaPoligonos` rasteriza la capa una vez
+sobre su extensión, en EPSG:4326 como los puntos, con celdas de un tamaño fijo
+en metros (10 m por defecto) convertido a grados en la latitud media de la
+capa:
+
+  - celda completamente dentro de un único polígono -> índice del polígono,
+  - celda que no toca ningún polígono               -> `FUERA`,
+  - celda que cruza un borde (o polígonos solapados) -> `BORDE`.
+
+Clasificar un punto es entonces un índice de arreglo NumPy; sólo los puntos en
+celdas `BORDE` pasan por la prueba exacta `within` (con un STRtree). El
+resultado es el mismo que el de la prueba exacta salvo con polígonos
+solapados, donde se asigna el primero de la capa en lugar de duplicar la fila,
+y en puntos situados exactamente sobre el contorno exterior de la capa.
+
+La rasterización subdivide bloques de celdas de mayor a menor: un bloque que
+cae entero dentro de un polígono o fuera de todos se resuelve de una vez, de
+modo que el costo crece con el largo de los bordes y no con el área.
+
+La capa se lee con `capas_geo.cargar_capa` (caché GeoParquet en EPSG:4326) y
+la grilla se guarda junto a ella (`<capa>.grilla_<res>m.npz`) con el hash
+SHA-256 del archivo y los parámetros usados; si la capa cambia, se recalcula.
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+from capas_geo import cargar_capa, hash_archivo, indice_capa
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+RESOLUCION_M = 10.0
+METROS_POR_GRADO = 111_320.0
+FUERA = -1
+BORDE = -2
+_PENDIENTE = -3
+BLOQUE_INICIAL = 256  # celdas por lado de los bloques del primer nivel
+
+
+def ruta_grilla(capa: Path, resolucion: float) -> Path:
+    return capa.with_name(f"{capa.stem}.grilla_{resolucion:g}m.npz")
+
+
+def paso_grados(resolucion: float, ymin: float, ymax: float) -> Tuple[float, float]:
+    """(paso en longitud, paso en latitud) equivalentes a `resolucion` metros."""
+    import numpy as np
+
+    latitud_media = np.radians((ymin + ymax) / 2)
+    return resolucion / (METROS_POR_GRADO * np.cos(latitud_media)), resolucion / METROS_POR_GRADO
+
+
+def _clasificar_bloques(arbol, cajas, final: bool) -> np.ndarray:
+    """Código de cada caja: polígono, FUERA, BORDE o _PENDIENTE (subdividir)."""
+    import numpy as np
+
+    codigos = np.full(len(cajas), BORDE if final else _PENDIENTE, dtype=np.int32)
+    tocadas = np.bincount(arbol.query(cajas, predicate="intersects")[0], minlength=len(cajas))
+    dentro, poligono = arbol.query(cajas, predicate="within")
+    # una caja que además toca otro polígono (borde compartido) se deja a la prueba exacta
+    unico = tocadas[dentro] == 1
+    codigos[dentro[unico]] = poligono[unico]
+    codigos[tocadas == 0] = FUERA
+    return codigos
+
+
+def poligono_exacto(arbol, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Prueba `within` exacta: índice del primer polígono de la capa que contiene cada punto."""
+    import numpy as np
+    import shapely
+
+    resultado = np.full(len(x), FUERA, dtype=np.int32)
+    punto, poligono = arbol.query(shapely.points(x, y), predicate="within")
+    # con polígonos solapados se conserva el primero de la capa
+    orden = np.lexsort((poligono, punto))
+    punto, poligono = punto[orden], poligono[orden]
+    primero = np.r_[True, punto[1:] != punto[:-1]] if len(punto) else np.zeros(0, dtype=bool)
+    resultado[punto[primero]] = poligono[primero]
+    return resultado
+
+
+class GrillaPoligonos:
+    """Grilla de códigos de polígono sobre la extensión de una capa."""
+
+    def __init__(self, geometrias, nombres: List[str], codigos: np.ndarray, origen: Tuple[float, float],
+                 paso: Tuple[float, float], firma: dict, atributos: Optional[pd.DataFrame] = None) -> None:
+        import numpy as np
+
+        self.geometrias = np.asarray(geometrias, dtype=object)
+        self.nombres = np.asarray(nombres, dtype=object)
+        self.codigos = codigos
+        self.origen = origen
+        self.paso = paso
+        self.firma = firma
+        self.atributos = atributos  # tabla de la capa sin geometría (si se cargó desde archivo)
+        self.arbol = indice_capa(self.geometrias)
+
+    @classmethod
+    def construir(cls, geometrias, nombres: List[str], resolucion: float, firma: dict,
+                  atributos: Optional[pd.DataFrame] = None) -> "GrillaPoligonos":
+        import numpy as np
+        import shapely
+
+        arbol = indice_capa(geometrias)
+        xmin, ymin, xmax, ymax = shapely.total_bounds(geometrias)
+        paso_x, paso_y = paso_grados(resolucion, ymin, ymax)
+        celdas_x = max(1, int(np.ceil((xmax - xmin) / paso_x)))
+        celdas_y = max(1, int(np.ceil((ymax - ymin) / paso_y)))
+
+        # bloques de 2^k celdas por lado; la grilla se rellena hasta un múltiplo del bloque
+        bloque = 1
+        while bloque < BLOQUE_INICIAL and bloque < max(celdas_x, celdas_y):
+            bloque *= 2
+        tipo = np.int16 if len(nombres) < np.iinfo(np.int16).max else np.int32
+        niveles = np.full((-(-celdas_y // bloque), -(-celdas_x // bloque)), _PENDIENTE, dtype=tipo)
+        while True:
+            lado_x, lado_y = bloque * paso_x, bloque * paso_y
+            filas, columnas = np.nonzero(niveles == _PENDIENTE)
+            if len(filas):
+                cajas = shapely.box(
+                    xmin + columnas * lado_x, ymin + filas * lado_y,
+                    xmin + (columnas + 1) * lado_x, ymin + (filas + 1) * lado_y,
+                )
+                niveles[filas, columnas] = _clasificar_bloques(arbol, cajas, final=bloque == 1)
+            if bloque == 1:
+                break
+            niveles = niveles.repeat(2, axis=0).repeat(2, axis=1)
+            bloque //= 2
+
+        codigos = np.ascontiguousarray(niveles[:celdas_y, :celdas_x])
+        return cls(geometrias, nombres, codigos, (float(xmin), float(ymin)), (paso_x, paso_y), firma, atributos)
+
+    @classmethod
+    def desde_capa(cls, capa: Path, columna: str, resolucion: float = RESOLUCION_M) -> "GrillaPoligonos":
+        """Carga la grilla guardada junto a `capa` o la construye y la guarda."""
+        import numpy as np
+        import pandas as pd
+
+        firma = {"sha256": hash_archivo(capa), "resolucion": resolucion}
+        gdf = cargar_capa(capa)
+        geometrias = gdf.geometry.to_numpy()
+        nombres = gdf[columna].tolist()
+        atributos = pd.DataFrame(gdf.drop(columns=gdf.geometry.name))
+
+        destino = ruta_grilla(capa, resolucion)
+        if destino.exists():
+            with np.load(destino, allow_pickle=False) as datos:
+                if json.loads(str(datos["firma"])) == firma:
+                    print(f"[=] Grilla vigente: {destino.name}")
+                    origen = tuple(float(v) for v in datos["origen"])
+                    paso = tuple(float(v) for v in datos["paso"])
+                    return cls(geometrias, nombres, datos["codigos"], origen, paso, firma, atributos)
+            print(f"[i] {destino.name} no corresponde a la capa actual; se recalcula")
+
+        grilla = cls.construir(geometrias, nombres, resolucion, firma, atributos)
+        np.savez_compressed(
+            destino,
+            codigos=grilla.codigos,
+            origen=np.array(grilla.origen),
+            paso=np.array(grilla.paso),
+            firma=json.dumps(firma),
+        )
+        bordes = int((grilla.codigos == BORDE).sum())
+        print(f"[✓] Grilla {grilla.codigos.shape[1]}x{grilla.codigos.shape[0]} guardada en {destino} "
+              f"({bordes} celdas de borde)")
+        return grilla
+
+    def clasificar(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Índice del polígono que contiene cada punto (`FUERA` si ninguno); x = lon, y = lat."""
+        import numpy as np
+
+        x = np.asarray(x, dtype="float64")
+        y = np.asarray(y, dtype="float64")
+        resultado = np.full(len(x), FUERA, dtype=np.int32)
+        with np.errstate(invalid="ignore"):
+            columna = np.floor((x - self.origen[0]) / self.paso[0])
+            fila = np.floor((y - self.origen[1]) / self.paso[1])
+        alto, ancho = self.codigos.shape
+        en_grilla = (columna >= 0) & (columna < ancho) & (fila >= 0) & (fila < alto)
+        indices = np.flatnonzero(en_grilla)
+        resultado[indices] = self.codigos[fila[indices].astype(np.intp), columna[indices].astype(np.intp)]
+
+        exactos = np.flatnonzero(resultado == BORDE)
+        if len(exactos):
+            resultado[exactos] = poligono_exacto(self.arbol, x[exactos], y[exactos])
+        return resultado
+
+    def nombres_de(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Nombre del polígono de cada punto (None fuera de la capa)."""
+        import numpy as np
+
+        indices = self.clasificar(x, y)
+        nombres = np.full(len(indices), None, dtype=object)
+        dentro = indices >= 0
+        nombres[dentro] = self.nombres[indices[dentro]]
+        return nombres
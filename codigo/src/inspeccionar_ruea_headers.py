@@ -17,6 +17,8 @@ Uso:
 Requisitos: pandas, openpyxl
     pip install pandas openpyxl
 """
+from __future__ import annotations
+
 import argparse
 import csv
 import sys
@@ -24,7 +26,7 @@ import unicodedata
 from pathlib import Path
 from collections import Counter, defaultdict
 
-import pandas as pd
+from instrumentacion import agregar_argumento_profile, instrumentar
 
 TRY_ENCODINGS = ["utf-8-sig", "utf-8", "cp1252", "latin-1", "iso-8859-1"]
 
@@ -78,17 +80,23 @@ def read_csv_header(path: Path):
     return enc, delim, [h.strip() for h in header]
 
 def read_xlsx_header(path: Path):
+    import pandas as pd
+
     df = pd.read_excel(path, dtype=str, nrows=0)
     return list(df.columns)
 
-def main():
+@instrumentar
+def main(argv=None):
     ap = argparse.ArgumentParser(description="Inspecciona encabezados y codificación de archivos RUEA-EFP")
     ap.add_argument(
         "--root",
         default=None,
         help="Directorio raíz del proyecto (por defecto, la raíz del repo)",
     )
-    args = ap.parse_args()
+    agregar_argumento_profile(ap)
+    args = ap.parse_args(argv)
+
+    import pandas as pd
 
     root = Path(args.root).resolve() if args.root else Path(__file__).resolve().parents[2]
     in_dir = root / "data" / "raw" / "descargas_retc"
@@ -0,0 +1,276 @@
+"""Instrumentación ligera de etapas: tiempos, memoria, filas y bytes.
+
+Uso en un script:
+
+    from instrumentacion import agregar_argumento_profile, contar_filas, instrumentar
+
+    @instrumentar
+    def main(argv: Optional[List[str]] = None) -> None:
+        parser = argparse.ArgumentParser(...)
+        agregar_argumento_profile(parser)
+        args = parser.parse_args(argv)
+        ...
+        contar_filas(entrada=len(df), salida=len(result))
+
+Cada ejecución agrega una línea JSON por etapa (y una por archivo cuando se
+usa `ejecucion_por_archivo`) a `outputs/metricas/metricas_pipeline.jsonl`.
+La variable de entorno `RETC_METRICAS` permite cambiar esa ruta o
+desactivar el registro con `RETC_METRICAS=off`.
+
+Con `--profile` el script además guarda un perfil cProfile (`.prof`) o, si la
+ruta termina en `.html`, un reporte de pyinstrument.
+"""
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:  # no disponible en Windows
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+METRICAS_DEFAULT = REPO_ROOT / "outputs" / "metricas" / "metricas_pipeline.jsonl"
+PERFILES_DIR = REPO_ROOT / "outputs" / "metricas" / "perfiles"
+ENV_METRICAS = "RETC_METRICAS"
+
+
+class Medicion:
+    """Acumula los contadores de una etapa o de un archivo mientras está activa."""
+
+    def __init__(self, tipo: str, etapa: str, archivo: Optional[str] = None) -> None:
+        self.tipo = tipo
+        self.etapa = etapa
+        self.archivo = archivo
+        self.filas_entrada: Optional[int] = None
+        self.filas_salida: Optional[int] = None
+        self.bytes_leidos: Optional[int] = None
+        self.bytes_escritos: Optional[int] = None
+        self.lineas_omitidas: Optional[int] = None
+        self.registro: Dict[str, Any] = {}
+
+    def sumar_filas(self, entrada: Optional[int] = None, salida: Optional[int] = None) -> None:
+        if entrada is not None:
+            self.filas_entrada = (self.filas_entrada or 0) + int(entrada)
+        if salida is not None:
+            self.filas_salida = (self.filas_salida or 0) + int(salida)
+
+    def sumar_bytes(self, leidos: Optional[int] = None, escritos: Optional[int] = None) -> None:
+        if leidos is not None:
+            self.bytes_leidos = (self.bytes_leidos or 0) + int(leidos)
+        if escritos is not None:
+            self.bytes_escritos = (self.bytes_escritos or 0) + int(escritos)
+
+    def sumar_omitidas(self, lineas: Optional[int]) -> None:
+        if lineas is not None:
+            self.lineas_omitidas = (self.lineas_omitidas or 0) + int(lineas)
+
+    def incorporar(self, registro: Dict[str, Any]) -> None:
+        """Suma filas, bytes y líneas omitidas de un registro producido en otro proceso."""
+        self.sumar_filas(registro.get("filas_entrada"), registro.get("filas_salida"))
+        self.sumar_bytes(registro.get("bytes_leidos"), registro.get("bytes_escritos"))
+        self.sumar_omitidas(registro.get("lineas_omitidas"))
+
+
+_activas: List[Medicion] = []
+
+
+def medicion_activa() -> Optional[Medicion]:
+    return _activas[-1] if _activas else None
+
+
+def contar_filas(entrada: Optional[int] = None, salida: Optional[int] = None) -> None:
+    """Registra filas leídas/escritas en la medición más interna activa."""
+    actual = medicion_activa()
+    if actual is not None:
+        actual.sumar_filas(entrada, salida)
+
+
+def contar_omitidas(lineas: int) -> None:
+    """Registra líneas mal formadas que el lector CSV descartó."""
+    actual = medicion_activa()
+    if actual is not None:
+        actual.sumar_omitidas(lineas)
+
+
+def ruta_metricas() -> Optional[Path]:
+    valor = os.environ.get(ENV_METRICAS)
+    if valor is None:
+        return METRICAS_DEFAULT
+    if valor.strip().lower() in {"", "0", "off", "no"}:
+        return None
+    return Path(valor).expanduser()
+
+
+def registrar(registro: Dict[str, Any]) -> None:
+    """Agrega un registro al log JSON-lines (una escritura por línea)."""
+    path = ruta_metricas()
+    if path is None:
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as fh:
+        fh.write(json.dumps(registro, ensure_ascii=False, default=str) + "\n")
+
+
+def _leer_io() -> Tuple[Optional[int], Optional[int]]:
+    """Bytes leídos/escritos por el proceso (rchar/wchar de /proc, sólo Linux)."""
+    try:
+        valores = dict(
+            line.split(":", 1) for line in Path("/proc/self/io").read_text().splitlines()
+        )
+        return int(valores["rchar"]), int(valores["wchar"])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+def _cpu_hijos() -> float:
+    if resource is None:
+        return 0.0
+    uso = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return uso.ru_utime + uso.ru_stime
+
+
+def _rss_max_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    propio = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    hijos = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(max(propio, hijos) / divisor, 1)
+
+
+def _delta(fin: Optional[int], inicio: Optional[int]) -> Optional[int]:
+    if fin is None or inicio is None:
+        return None
+    return fin - inicio
+
+
+@contextmanager
+def medir(tipo: str, etapa: str, archivo: Optional[str] = None, escribir: bool = True) -> Iterator[Medicion]:
+    """Mide el bloque y, al salir, emite el registro (también si falla)."""
+    medicion = Medicion(tipo, etapa, archivo)
+    padre = medicion_activa()
+    inicio_fecha = datetime.now().isoformat(timespec="seconds")
+    inicio = time.perf_counter()
+    cpu_inicio = time.process_time()
+    cpu_hijos_inicio = _cpu_hijos()
+    leidos_inicio, escritos_inicio = _leer_io()
+    estado = "ok"
+    _activas.append(medicion)
+    try:
+        yield medicion
+    except SystemExit as exc:
+        if exc.code not in (None, 0):
+            estado = "error"
+        raise
+    except BaseException:
+        estado = "error"
+        raise
+    finally:
+        _activas.pop()
+        leidos_fin, escritos_fin = _leer_io()
+        medicion.sumar_bytes(_delta(leidos_fin, leidos_inicio), _delta(escritos_fin, escritos_inicio))
+        cpu = (time.process_time() - cpu_inicio) + (_cpu_hijos() - cpu_hijos_inicio)
+        medicion.registro = {
+            "tipo": tipo,
+            "etapa": etapa,
+            "archivo": archivo,
+            "inicio": inicio_fecha,
+            "pid": os.getpid(),
+            "estado": estado,
+            "segundos": round(time.perf_counter() - inicio, 4),
+            "cpu_segundos": round(cpu, 4),
+            "rss_max_mb": _rss_max_mb(),
+            "filas_entrada": medicion.filas_entrada,
+            "filas_salida": medicion.filas_salida,
+            "bytes_leidos": medicion.bytes_leidos,
+            "bytes_escritos": medicion.bytes_escritos,
+            "lineas_omitidas": medicion.lineas_omitidas,
+        }
+        # En el mismo proceso los bytes ya quedan en el contador del padre
+        if padre is not None:
+            padre.sumar_filas(medicion.filas_entrada, medicion.filas_salida)
+            padre.sumar_omitidas(medicion.lineas_omitidas)
+        if escribir:
+            registrar(medicion.registro)
+
+
+def etapa_actual(default: str = "") -> str:
+    actual = medicion_activa()
+    return actual.etapa if actual is not None else default
+
+
+def agregar_argumento_profile(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="auto",
+        default=None,
+        metavar="RUTA",
+        help="Guarda un perfil de ejecución (.prof de cProfile o .html de pyinstrument)",
+    )
+
+
+def ruta_perfil(etapa: str, argv: Optional[List[str]] = None) -> Optional[Path]:
+    pre = argparse.ArgumentParser(add_help=False)
+    agregar_argumento_profile(pre)
+    known, _ = pre.parse_known_args(sys.argv[1:] if argv is None else argv)
+    if known.profile is None:
+        return None
+    if known.profile == "auto":
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return PERFILES_DIR / f"{etapa}_{stamp}.prof"
+    return Path(known.profile).expanduser().resolve()
+
+
+def perfilar(func: Callable[..., Any], destino: Path, *args: Any, **kwargs: Any) -> Any:
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    if destino.suffix.lower() == ".html":
+        try:
+            from pyinstrument import Profiler
+        except ImportError as exc:
+            raise SystemExit("pyinstrument no está instalado (pip install pyinstrument)") from exc
+        profiler = Profiler()
+        profiler.start()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.stop()
+            destino.write_text(profiler.output_html(), encoding="utf-8")
+            print(f"[i] Perfil guardado en {destino}")
+
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profiler.disable()
+        profiler.dump_stats(str(destino))
+        print(f"[i] Perfil guardado en {destino}")
+
+
+def instrumentar(main: Callable[..., Any]) -> Callable[..., Any]:
+    """Decorador para `main()`: mide la etapa completa y atiende `--profile`."""
+    etapa = Path(main.__code__.co_filename).stem
+
+    @functools.wraps(main)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        argv = args[0] if args else kwargs.get("argv")
+        destino = ruta_perfil(etapa, argv)
+        with medir("etapa", etapa):
+            if destino is None:
+                return main(*args, **kwargs)
+            return perfilar(main, destino, *args, **kwargs)
+
+    return wrapper
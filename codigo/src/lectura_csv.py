@@ -0,0 +1,228 @@
+"""Lectura de los CSV `;` de las etapas 01–04 con backend intercambiable.
+
+Los CSV del pipeline se escriben con `;`, `utf-8-sig`, sin comillas y con
+`\\` como carácter de escape. `leer_csv_etapa` los lee con esas mismas reglas
+usando uno de dos backends, elegido con la variable de entorno `RETC_LECTOR`
+(o con `python retc.py --lector arrow ...`):
+
+  - `pandas` (por defecto): `pd.read_csv` con el motor C,
+  - `arrow`: el lector CSV multihilo de pyarrow; devuelve un DataFrame con
+    columnas `ArrowDtype` (texto `string[pyarrow]`, medidas `double[pyarrow]`).
+
+En ambos casos las líneas con un número de campos distinto al del encabezado
+se descartan como antes (`on_bad_lines='skip'`), pero ya no en silencio: se
+informan con `[!]` y se suman a `lineas_omitidas` en las métricas.
+
+Para los CSV de otras fuentes (descargas, consolidados, tablas resumidas),
+`leer_csv_detectado` decide el encoding una sola vez, con el diagnóstico de
+`inspeccionar_ruea_headers.py` si incluye el archivo o con una muestra acotada
+de su inicio, y parsea el archivo completo una sola vez. Sólo si aparece un
+byte no utf-8 más allá de la muestra se vuelve a leer ese archivo como
+latin-1 (con `[!]`), en lugar de corromper el texto.
+"""
+from __future__ import annotations
+
+import codecs
+import csv
+import os
+import re
+import warnings
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from instrumentacion import contar_omitidas
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+ENV_LECTOR = "RETC_LECTOR"
+LECTORES = ("pandas", "arrow")
+MAX_LINEAS_INFORMADAS = 5
+MUESTRA_ENCODING = 1 << 20  # bytes del inicio del archivo usados para decidir el encoding
+DIAGNOSTICO_CSV = (
+    Path(__file__).resolve().parents[2]
+    / "data" / "interim" / "diagnostico_archivos_originales" / "diagnostico_headers.csv"
+)
+
+Columnas = Union[Iterable[str], Callable[[str], bool], None]
+
+_LINEA_OMITIDA = re.compile(r"Skipping line (\d+)")
+
+
+def lector_activo() -> str:
+    lector = os.environ.get(ENV_LECTOR, "pandas").strip().lower() or "pandas"
+    if lector not in LECTORES:
+        raise SystemExit(f"{ENV_LECTOR}={lector} no es válido (opciones: {', '.join(LECTORES)})")
+    return lector
+
+
+def leer_encabezado(path: Path) -> List[str]:
+    with path.open("r", encoding="utf-8-sig", newline="") as fh:
+        fila = next(csv.reader(fh, delimiter=";", escapechar="\\"), [])
+    return [col.lstrip("\ufeff") for col in fila]
+
+
+def _seleccionar(nombres: List[str], usecols: Columnas) -> List[str]:
+    if usecols is None:
+        return nombres
+    if callable(usecols):
+        return [col for col in nombres if usecols(col)]
+    deseadas = set(usecols)
+    return [col for col in nombres if col in deseadas]
+
+
+def _leer_pandas(path: Path, usecols: Columnas, dtype: Any) -> Tuple[pd.DataFrame, List[Optional[int]]]:
+    import pandas as pd
+
+    with warnings.catch_warnings(record=True) as avisos:
+        warnings.simplefilter("always", pd.errors.ParserWarning)
+        df = pd.read_csv(
+            path,
+            sep=";",
+            dtype=dtype,
+            usecols=usecols,
+            encoding="utf-8",
+            escapechar="\\",
+            on_bad_lines="warn",
+        )
+    omitidas: List[Optional[int]] = []
+    for aviso in avisos:
+        if issubclass(aviso.category, pd.errors.ParserWarning):
+            omitidas += [int(n) for n in _LINEA_OMITIDA.findall(str(aviso.message))]
+        else:
+            warnings.showwarning(aviso.message, aviso.category, aviso.filename, aviso.lineno)
+    return df, omitidas
+
+
+def _leer_arrow(path: Path, usecols: Columnas, dtype: Any) -> Tuple[pd.DataFrame, List[Optional[int]]]:
+    import pandas as pd
+
+    try:
+        import pyarrow as pa
+        from pyarrow import csv as pa_csv
+    except ImportError as exc:
+        raise SystemExit(f"pyarrow no está instalado (pip install pyarrow) y {ENV_LECTOR}=arrow") from exc
+
+    nombres = leer_encabezado(path)
+    incluidas = _seleccionar(nombres, usecols)
+    tipos = {}
+    for col in incluidas:
+        tipo = dtype.get(col, str) if hasattr(dtype, "get") else dtype
+        tipos[col] = pa.float64() if str(tipo) == "float64" else pa.string()
+
+    omitidas: List[Optional[int]] = []
+
+    def omitir(fila) -> str:
+        omitidas.append(fila.number)
+        return "skip"
+
+    # Los nombres vienen del encabezado ya leído sin BOM; Arrow sólo parsea los datos
+    tabla = pa_csv.read_csv(
+        path,
+        read_options=pa_csv.ReadOptions(column_names=nombres, skip_rows=1, use_threads=True),
+        parse_options=pa_csv.ParseOptions(delimiter=";", escape_char="\\", invalid_row_handler=omitir),
+        convert_options=pa_csv.ConvertOptions(
+            column_types=tipos,
+            include_columns=incluidas,
+            strings_can_be_null=True,
+        ),
+    )
+    return tabla.to_pandas(types_mapper=pd.ArrowDtype), omitidas
+
+
+def informar_omitidas(path: Path, omitidas: List[Optional[int]]) -> None:
+    if not omitidas:
+        return
+    numeros = [str(n) for n in sorted(n for n in omitidas if n is not None)[:MAX_LINEAS_INFORMADAS]]
+    if len(numeros) < len(omitidas):
+        numeros.append("...")
+    detalle = f" (líneas {', '.join(numeros)})" if numeros[0] != "..." else ""
+    print(f"[!] {path.name}: {len(omitidas)} líneas mal formadas omitidas{detalle}")
+    contar_omitidas(len(omitidas))
+
+
+def leer_csv_etapa(path: Path, usecols: Columnas = None, dtype: Any = str) -> pd.DataFrame:
+    """Lee un CSV de las etapas 01–04 con el backend de `RETC_LECTOR`.
+
+    `usecols` admite una lista o un callable (como `selector_columnas`) y
+    `dtype` un tipo único o un mapeo por columna (como `dtypes_lectura`).
+    """
+    if lector_activo() == "arrow":
+        df, omitidas = _leer_arrow(path, usecols, dtype)
+    else:
+        df, omitidas = _leer_pandas(path, usecols, dtype)
+    df.columns = [str(c).lstrip("\ufeff") for c in df.columns]
+    informar_omitidas(path, omitidas)
+    return df
+
+
+@lru_cache(maxsize=None)
+def mapa_diagnostico(diag_csv: Path = DIAGNOSTICO_CSV) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+    """Lee diagnostico_headers.csv y retorna {archivo -> (encoding, separador)}"""
+    import pandas as pd
+
+    mapping: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+    if not diag_csv.exists():
+        return mapping
+    with diag_csv.open("rb") as fh:
+        encoding = "utf-8" if _decodifica(fh.read(), "utf-8", final=True) else "latin-1"
+    df = pd.read_csv(diag_csv, dtype=str, encoding=encoding, keep_default_na=False)
+    for row in df.to_dict("records"):
+        archivo = str(row.get("archivo", "")).strip()
+        enc = str(row.get("encoding_detectado", "")).strip() or None
+        sep = str(row.get("separador", "")).strip() or None
+        if archivo:
+            mapping[archivo] = (enc, sep)
+    return mapping
+
+
+def _decodifica(datos: bytes, encoding: str, final: bool = False) -> bool:
+    # sin `final`, una secuencia multibyte cortada al final de la muestra no es un error
+    try:
+        codecs.getincrementaldecoder(encoding)().decode(datos, final=final)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def es_utf8(encoding: str) -> bool:
+    return codecs.lookup(encoding).name in ("utf-8", "utf-8-sig")
+
+
+def detectar_encoding(path: Path, diag_csv: Optional[Path] = DIAGNOSTICO_CSV) -> Tuple[str, str]:
+    """(encoding, origen) de `path` sin leerlo completo.
+
+    Usa el encoding del diagnóstico si el archivo figura en él; si no,
+    `utf-8` cuando los primeros `MUESTRA_ENCODING` bytes decodifican como tal
+    y `latin-1` en caso contrario.
+    """
+    if diag_csv is not None:
+        encoding, _ = mapa_diagnostico(diag_csv).get(path.name, (None, None))
+        if encoding:
+            return encoding, "diagnóstico"
+    with path.open("rb") as fh:
+        muestra = fh.read(MUESTRA_ENCODING)
+    final = len(muestra) < MUESTRA_ENCODING
+    return ("utf-8" if _decodifica(muestra, "utf-8", final) else "latin-1"), "muestra"
+
+
+def leer_csv_detectado(path: Path, diag_csv: Optional[Path] = DIAGNOSTICO_CSV, **opciones: Any) -> pd.DataFrame:
+    """`pd.read_csv(path, dtype=str, **opciones)` con el encoding de `detectar_encoding`.
+
+    El archivo se parsea una sola vez salvo que, más allá de la muestra,
+    aparezca un byte que no es utf-8: entonces se informa con `[!]` y sólo
+    ese archivo se vuelve a leer como latin-1.
+    """
+    import pandas as pd
+
+    encoding, origen = detectar_encoding(path, diag_csv)
+    print(f"[i] {path.name}: encoding {encoding} ({origen})")
+    opciones.setdefault("dtype", str)
+    try:
+        return pd.read_csv(path, encoding=encoding, **opciones)
+    except UnicodeDecodeError:
+        if not es_utf8(encoding):
+            raise
+    print(f"[!] {path.name}: bytes no válidos en {encoding} después de la muestra; se relee como latin-1")
+    return pd.read_csv(path, encoding="latin-1", **opciones)
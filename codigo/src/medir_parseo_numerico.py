@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Microbenchmark de `numeros_retc.parse_numeric` frente a los conversores por valor.
+
+Los conversores que reemplazó `parse_numeric` se conservan aquí, tal como
+estaban en cada script, sólo como referencia de tiempo y de resultado. Para
+cada uno se mide la conversión de una columna sintética con los formatos que
+aparecen en las publicaciones RETC (coma decimal, puntos de miles, notación
+científica con coma, espacios, `-` y vacíos) y se cuentan las filas en que el
+resultado difiere del de `parse_numeric`.
+
+Uso:
+  python medir_parseo_numerico.py --filas 1M --repeticiones 3
+  python medir_parseo_numerico.py --salida ../../outputs/tablas/rendimiento/parseo_numerico.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import time
+import unicodedata
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+from generar_datos_sinteticos_retc import parse_scale
+from instrumentacion import agregar_argumento_profile, instrumentar
+from numeros_retc import parse_numeric
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def agregar_emision_total(value):
+    if value is None:
+        return None
+    text = str(value).strip()
+    if text.lower() in {"", "na", "nan", "none", "null"}:
+        return None
+    norm = unicodedata.normalize("NFKC", text).replace(" ", "")
+    if "," in norm and "." in norm:
+        norm = norm.replace(".", "")
+    norm = norm.replace(",", ".").replace("·", "").strip()
+    return norm or None
+
+
+def extractos_totales_acumulado(value):
+    import pandas as pd
+
+    if pd.isna(value):
+        return None
+    text = str(value).strip()
+    if text == "" or text.lower() in {"na", "nan", "none"}:
+        return None
+    if "," in text and "." in text:
+        text = text.replace(".", "")
+    return text.replace(",", ".")
+
+
+def emisiones_por_grupo(s):
+    if s is None:
+        return None
+    s = str(s).strip()
+    if s == "" or s.lower() in {"na", "nan", "none"}:
+        return None
+    try:
+        return float(s.replace(",", "."))
+    except Exception:
+        return None
+
+
+def filtrado_region_todo(val):
+    import pandas as pd
+
+    if pd.isna(val):
+        return pd.NA
+    s = str(val).strip()
+    if s == "":
+        return pd.NA
+    s = re.sub(r"\s+", "", s.replace(",", "."))
+    try:
+        return float(s)
+    except Exception:
+        return pd.NA
+
+
+CONVERSORES: Dict[str, Callable] = {
+    "agregar_emision_total_rm.normalize_number": agregar_emision_total,
+    "exportar_extractos/graficar_totales/graficar_acumulado.normalize_number": extractos_totales_acumulado,
+    "graficar_emisiones_por_grupo.to_float": emisiones_por_grupo,
+    "filtrado_region_todo.to_float_locale": filtrado_region_todo,
+}
+
+MUESTRAS = ["0,25", "1.234,5", "1,5E-03", "12", "3.75", " 4 500 ", "-", "", "NA", None, "0,000012"]
+
+
+def columna_sintetica(filas: int, semilla: int) -> pd.Series:
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(semilla)
+    valores = rng.gamma(0.6, 3.0, size=filas).round(4)
+    texto = pd.Series(valores.astype(str)).str.replace(".", ",", regex=False)
+    especiales = rng.random(filas) < 0.1
+    texto[especiales] = rng.choice(np.array(MUESTRAS, dtype=object), size=int(especiales.sum()))
+    return texto
+
+
+def cronometrar(func: Callable[[], pd.Series], repeticiones: int) -> tuple:
+    mejor = float("inf")
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = func()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+@instrumentar
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compara parse_numeric con los conversores por valor")
+    parser.add_argument("--filas", default="200k", help="Filas de la columna sintética (admite k/M)")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Se informa el mejor tiempo")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", default=None, help="JSON opcional con los resultados")
+    agregar_argumento_profile(parser)
+    args = parser.parse_args(argv)
+
+    import numpy as np
+    import pandas as pd
+
+    filas = parse_scale(args.filas)
+    serie = columna_sintetica(filas, args.semilla)
+    print(f"[i] {filas} filas, {serie.nunique()} valores distintos")
+
+    base, (esperado, invalidos) = cronometrar(lambda: parse_numeric(serie), args.repeticiones)
+    resultados = [{"conversor": "numeros_retc.parse_numeric", "segundos": base, "aceleracion": 1.0, "difieren": 0}]
+    print(f"[✓] numeros_retc.parse_numeric: {base:.3f} s ({int(invalidos.sum())} no convertibles)")
+
+    for nombre, func in CONVERSORES.items():
+        # como en los scripts originales, el texto normalizado se pasa luego a pd.to_numeric
+        segundos, valores = cronometrar(
+            lambda: pd.to_numeric(serie.map(func), errors="coerce").astype("float64"), args.repeticiones
+        )
+        difieren = int((~np.isclose(valores, esperado, equal_nan=True)).sum())
+        resultados.append(
+            {"conversor": nombre, "segundos": segundos, "aceleracion": segundos / base, "difieren": difieren}
+        )
+        print(f"[✓] {nombre}: {segundos:.3f} s (x{segundos / base:.1f}, {difieren} filas distintas)")
+
+    if args.salida:
+        salida = Path(args.salida).expanduser().resolve()
+        salida.parent.mkdir(parents=True, exist_ok=True)
+        salida.write_text(json.dumps({"filas": filas, "resultados": resultados}, indent=2), encoding="utf-8")
+        print(f"[✓] Resultados en {salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""Mide el rendimiento de extremo a extremo de las etapas del pipeline RETC.
+
+Para cada escala solicitada genera un conjunto sintético
+(`generar_datos_sinteticos_retc.py`), ejecuta cada script de etapa como
+subproceso sobre ese conjunto y registra tiempo de pared, tiempo de CPU y
+memoria máxima (RSS) del proceso hijo. El resultado se escribe como JSON y
+CSV en `outputs/tablas/rendimiento/` para comparar entre commits.
+
+Las etapas son las de `retc.PIPELINE` (01–04), las que trabajan sobre el
+consolidado 04 (coordenadas, capas espaciales, rásters, gráficos) y la rama
+global (filtrado de todas las descargas, consolidados EFP/2023, tablas y
+gráficos por contaminante). Las entradas que el generador no produce (centros
+comunales, una capa de paisaje en grilla, el pivot de totales) se preparan
+antes de cada etapa, fuera del tiempo medido.
+
+Uso:
+  python medir_rendimiento_pipeline.py --escalas 10k,1M
+  python medir_rendimiento_pipeline.py --escalas 10M --etapas convertir,filtrar --jobs 8
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from generar_datos_sinteticos_retc import RM_BBOX, generate, parse_scale
+from instrumentacion import ENV_METRICAS, agregar_argumento_profile, instrumentar
+from normalizar_comunas_rm import CANON_COMUNAS
+from retc import ETAPAS, PIPELINE
+
+SRC_DIR = Path(__file__).resolve().parent
+REPO_ROOT = SRC_DIR.parents[1]
+DEFAULT_OUTDIR = REPO_ROOT / "outputs" / "tablas" / "rendimiento"
+
+CONSOLIDADO = "{w}/04_emisiones_consolidadas/retc_RM_consolidado.csv"
+FILTRADOS = "{w}/global/data/interim/filtrados_region"
+
+# argumentos de cada etapa (relativos a la carpeta de trabajo) y si acepta --jobs
+ARGUMENTOS: Dict[str, Tuple[List[str], bool]] = {
+    "convertir": (["--indir", "{raw}", "--outdir", "{w}/01_emisiones_por_ano"], True),
+    "filtrar": (["--indir", "{w}/01_emisiones_por_ano", "--outdir", "{w}/02_emisiones_por_ano_rm"], True),
+    "fusionar_grupos": (["--indir", "{w}/02_emisiones_por_ano_rm", "--outdir", "{w}/03_emisiones_rm_fusionadas"], False),
+    "contaminantes": (["--indir", "{w}/03_emisiones_rm_fusionadas", "--outdir", "{w}/03_emisiones_rm_fusionadas"], True),
+    "ciiu": (["--indir", "{w}/03_emisiones_rm_fusionadas", "--outdir", "{w}/03_emisiones_rm_fusionadas",
+              "--metadata", "{w}/ciiu_codigo_descripcion.csv"], True),
+    "comunas": (["--indir", "{w}/03_emisiones_rm_fusionadas", "--outdir", "{w}/03_emisiones_rm_fusionadas"], True),
+    "emision_total": (["--indir", "{w}/03_emisiones_rm_fusionadas"], True),
+    "id_unico": (["--indir", "{w}/03_emisiones_rm_fusionadas"], True),
+    "establecimientos": (["--indir", "{w}/03_emisiones_rm_fusionadas"], True),
+    "consolidar": (["--indir", "{w}/03_emisiones_rm_fusionadas", "--outdir", "{w}/04_emisiones_consolidadas"], False),
+    # sobre el consolidado 04
+    "coordenadas": (["--centros", "{w}/comunas_rm_centros.csv", "--consolidado", CONSOLIDADO], False),
+    "calidad_coordenadas": (["--consolidado", CONSOLIDADO, "--out", "{w}/calidad_coordenadas.csv"], False),
+    "paisaje": (["--consolidado", CONSOLIDADO, "--poligonos", "{w}/unidades_paisaje.gpkg"], False),
+    "enriquecer": (["--consolidado", CONSOLIDADO, "--capa", "{w}/unidades_paisaje.gpkg:Nombre=unidad_enriquecida"], False),
+    "tablas_paisaje": (["--consolidado", CONSOLIDADO, "--output", "{w}/tablas_paisaje.md"], False),
+    "proximidad": (["--consolidado", CONSOLIDADO, "--lat", "-33.45", "--lon", "-70.66", "--k", "10",
+                    "--out", "{w}/proximidad.csv"], False),
+    "rasterizar": (["--consolidado", CONSOLIDADO, "--outdir", "{w}/mapas"], False),
+    "graficar_comunas": (["--consolidado", CONSOLIDADO, "--outdir", "{w}/graficos/comunas",
+                          "--summary", "{w}/graficos/comunas.csv"], False),
+    "graficar_distribucion": (["--input", CONSOLIDADO, "--outdir", "{w}/graficos/distribucion",
+                               "--summary", "{w}/graficos/distribucion.csv"], False),
+    # rama global: descargas filtradas -> consolidado 2005–2023 -> tablas por contaminante
+    "filtrado_region_todo": (["--root", "{w}/global"], False),
+    "consolidar_efp": (["--indir", FILTRADOS], False),
+    "consolidar_global": (["--indir", FILTRADOS, "--r23-name", "ckan_ruea_2023_RM.csv"], False),
+    "separar_grupos": (["--in", FILTRADOS + "/RUEA_global_2005_2023_full.csv",
+                        "--outdir", "{w}/emisiones_por_variable"], False),
+    "reconstruir": (["--indir", "{w}/emisiones_por_variable", "--outdir", "{w}/emisiones_por_variable_fusionadas"], True),
+    "extractos": (["--indir", "{w}/emisiones_por_variable_fusionadas",
+                   "--outdir", "{w}/emisiones_por_variable_extractos"], True),
+    "graficar_totales": (["--indir", "{w}/emisiones_por_variable_fusionadas", "--outdir", "{w}/graficos/totales",
+                          "--summary", "{w}/graficos/totales.csv"], False),
+    "graficar_acumulado": (["--indir", "{w}/emisiones_por_variable_extractos", "--outdir", "{w}/graficos/acumulado",
+                            "--summary", "{w}/graficos/acumulado.csv"], False),
+    "graficar_grupos": (["--in", "{w}/graficos/totales_pivot.csv", "--outdir", "{w}/graficos/grupos"], False),
+}
+
+# etapas 01–04 en el orden de `retc.py pipeline`, seguidas de las que usan sus salidas
+POSTERIORES = [
+    "coordenadas", "calidad_coordenadas", "paisaje", "enriquecer", "tablas_paisaje", "proximidad", "rasterizar",
+    "graficar_comunas", "graficar_distribucion",
+    "filtrado_region_todo", "consolidar_efp", "consolidar_global", "separar_grupos", "reconstruir", "extractos",
+    "graficar_totales", "graficar_acumulado", "graficar_grupos",
+]
+# (nombre, script, argumentos, acepta --jobs); falla al importar si una etapa nueva de
+# `retc.PIPELINE` no tiene argumentos en ARGUMENTOS
+STAGES = [(name, f"{ETAPAS[name][0]}.py", *ARGUMENTOS[name]) for name in PIPELINE + POSTERIORES]
+
+CIIU_METADATA = """codigo,descripcion
+C1010,Procesamiento y conservación de carne
+C2394,Fabricación de cemento
+D3510,Generación de energía eléctrica
+B0810,Extracción de piedra y arena
+G4730,Venta al por menor de combustibles
+Q8610,Actividades de hospitales
+E3821,Tratamiento de desechos
+"""
+
+
+def write_centers(workdir: Path, raw: Path) -> None:
+    """Centros comunales en una grilla regular dentro de la caja de los datos sintéticos."""
+    lon_min, lat_min, lon_max, lat_max = RM_BBOX
+    comunas = sorted(set(CANON_COMUNAS.values()))
+    lado = int(len(comunas) ** 0.5) + 1
+    filas = ["comuna,latitud,longitud"]
+    for i, comuna in enumerate(comunas):
+        lat = lat_min + (i // lado + 0.5) * (lat_max - lat_min) / lado
+        lon = lon_min + (i % lado + 0.5) * (lon_max - lon_min) / lado
+        filas.append(f"{comuna},{lat:.5f},{lon:.5f}")
+    (workdir / "comunas_rm_centros.csv").write_text("\n".join(filas) + "\n", encoding="utf-8")
+
+
+def write_landscape_layer(workdir: Path, raw: Path, cells: int = 4) -> None:
+    """Capa de unidades del paisaje sintética: `cells` x `cells` rectángulos sobre la caja."""
+    path = workdir / "unidades_paisaje.gpkg"
+    if path.exists():
+        return
+    import geopandas as gpd
+    from shapely.geometry import box
+
+    lon_min, lat_min, lon_max, lat_max = RM_BBOX
+    dx, dy = (lon_max - lon_min) / cells, (lat_max - lat_min) / cells
+    geometrias = [
+        box(lon_min + i * dx, lat_min + j * dy, lon_min + (i + 1) * dx, lat_min + (j + 1) * dy)
+        for i in range(cells) for j in range(cells)
+    ]
+    nombres = [f"Unidad {k + 1}" for k in range(len(geometrias))]
+    gpd.GeoDataFrame({"Nombre": nombres}, geometry=geometrias, crs="EPSG:4326").to_file(path, driver="GPKG")
+
+
+def link_downloads(workdir: Path, raw: Path) -> None:
+    """`filtrado_region_todo.py --root` espera `data/raw/descargas_retc` bajo la raíz."""
+    destino = workdir / "global" / "data" / "raw" / "descargas_retc"
+    if destino.exists():
+        return
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        destino.symlink_to(raw, target_is_directory=True)
+    except OSError:
+        shutil.copytree(raw, destino)
+
+
+def pivot_totals(workdir: Path, raw: Path) -> None:
+    """Resumen de `graficar_totales` en formato pivot (año x contaminante) para `graficar_grupos`."""
+    import pandas as pd
+
+    resumen = workdir / "graficos" / "totales.csv"
+    if not resumen.exists():
+        return
+    df = pd.read_csv(resumen, encoding="utf-8-sig")
+    pivot = df.pivot_table(index="year", columns="contaminante", values="emision", aggfunc="sum")
+    pivot.rename_axis("año").reset_index().to_csv(resumen.with_name("totales_pivot.csv"), index=False, encoding="utf-8-sig")
+
+
+# entradas que el generador sintético no produce; se preparan antes de la etapa, fuera del tiempo medido
+PREPARAR: Dict[str, Callable[[Path, Path], None]] = {
+    "coordenadas": write_centers,
+    "paisaje": write_landscape_layer,
+    "enriquecer": write_landscape_layer,
+    "filtrado_region_todo": link_downloads,
+    "graficar_grupos": pivot_totals,
+}
+
+
+def run_stage(cmd: List[str], log_path: Path, metrics_path: Optional[Path] = None) -> Dict[str, object]:
+    """Ejecuta un subproceso y devuelve tiempo de pared, CPU y RSS máximo."""
+    env = dict(os.environ)
+    if metrics_path is not None:
+        # las métricas de la etapa quedan en la carpeta de trabajo, no en outputs/metricas
+        env[ENV_METRICAS] = str(metrics_path)
+    start = time.perf_counter()
+    with log_path.open("w", encoding="utf-8") as log:
+        proc = subprocess.Popen(cmd, cwd=SRC_DIR, stdout=log, stderr=subprocess.STDOUT, env=env)
+        if hasattr(os, "wait4"):
+            _, status, usage = os.wait4(proc.pid, 0)
+            proc.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+            cpu = usage.ru_utime + usage.ru_stime
+            # ru_maxrss está en KiB en Linux y en bytes en macOS
+            rss_mb = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+        else:
+            proc.wait()
+            cpu, rss_mb = None, None
+    return {
+        "segundos": round(time.perf_counter() - start, 3),
+        "cpu_segundos": round(cpu, 3) if cpu is not None else None,
+        "rss_max_mb": round(rss_mb, 1) if rss_mb is not None else None,
+        "codigo_salida": proc.returncode,
+    }
+
+
+def stage_counters(metrics_path: Path) -> Dict[str, object]:
+    """Filas y bytes que la propia etapa registró vía `instrumentacion`."""
+    if not metrics_path.exists():
+        return {}
+    stage = None
+    for line in metrics_path.read_text(encoding="utf-8").splitlines():
+        record = json.loads(line)
+        if record.get("tipo") == "etapa":
+            stage = record
+    if stage is None:
+        return {}
+    keys = ("filas_entrada", "filas_salida", "bytes_leidos", "bytes_escritos", "lineas_omitidas")
+    return {key: stage.get(key) for key in keys}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SRC_DIR, capture_output=True, text=True, check=True
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def benchmark_scale(rows: int, workdir: Path, stages: List[str], jobs: int, seed: int) -> List[Dict[str, object]]:
+    raw = workdir / "raw"
+    start = time.perf_counter()
+    generate(raw, rows, seed)
+    gen_seconds = round(time.perf_counter() - start, 3)
+    print(f"[i] {rows} filas sintéticas generadas en {gen_seconds} s")
+    (workdir / "ciiu_codigo_descripcion.csv").write_text(CIIU_METADATA, encoding="utf-8")
+    raw_bytes = sum(p.stat().st_size for p in raw.iterdir())
+
+    records = []
+    for name, script, template, accepts_jobs in STAGES:
+        if name not in stages:
+            continue
+        if name in PREPARAR:
+            PREPARAR[name](workdir, raw)
+        args = [a.format(raw=raw, w=workdir) for a in template]
+        if accepts_jobs:
+            args += ["--jobs", str(jobs)]
+        metrics_path = workdir / f"{name}.metricas.jsonl"
+        result = run_stage([sys.executable, script, *args], workdir / f"{name}.log", metrics_path)
+        status = "ok" if result["codigo_salida"] == 0 else "error"
+        print(f"[{'✓' if status == 'ok' else '✗'}] {name}: {result['segundos']} s")
+        records.append(
+            {
+                "escala_filas": rows,
+                "bytes_raw": raw_bytes,
+                "etapa": name,
+                "estado": status,
+                **result,
+                **stage_counters(metrics_path),
+            }
+        )
+        if status != "ok":
+            print(f"[!] Revisa {workdir / f'{name}.log'}; se detiene esta escala")
+            break
+    return records
+
+
+@instrumentar
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark del pipeline RETC con datos sintéticos")
+    parser.add_argument("--escalas", default="10k,1M,10M", help="Filas totales por corrida (separadas por coma)")
+    parser.add_argument(
+        "--etapas",
+        default=",".join(s[0] for s in STAGES),
+        help="Etapas a medir (separadas por coma)",
+    )
+    parser.add_argument("--jobs", type=int, default=1, help="Valor de --jobs para las etapas que lo aceptan")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--workdir", default=None, help="Carpeta de trabajo (por defecto temporal)")
+    parser.add_argument("--conservar", action="store_true", help="No borrar la carpeta de trabajo")
+    parser.add_argument("--outdir", default=str(DEFAULT_OUTDIR), help="Carpeta del reporte JSON/CSV")
+    agregar_argumento_profile(parser)
+    args = parser.parse_args(argv)
+
+    import pandas as pd
+
+    stages = [s.strip() for s in args.etapas.split(",") if s.strip()]
+    unknown = set(stages) - {s[0] for s in STAGES}
+    if unknown:
+        raise SystemExit(f"Etapas desconocidas: {', '.join(sorted(unknown))}")
+
+    base = Path(args.workdir).expanduser().resolve() if args.workdir else Path(tempfile.mkdtemp(prefix="retc_bench_"))
+    records: List[Dict[str, object]] = []
+    try:
+        for scale in args.escalas.split(","):
+            rows = parse_scale(scale)
+            workdir = base / f"filas_{rows}"
+            if workdir.exists():
+                shutil.rmtree(workdir)
+            workdir.mkdir(parents=True)
+            records.extend(benchmark_scale(rows, workdir, stages, args.jobs, args.semilla))
+    finally:
+        if not args.conservar:
+            shutil.rmtree(base, ignore_errors=True)
+
+    outdir = Path(args.outdir).expanduser().resolve()
+    outdir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    meta = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "cpus": os.cpu_count(),
+        "jobs": args.jobs,
+    }
+    json_path = outdir / f"LBP_AIRE_{stamp}_benchmark_pipeline.json"
+    json_path.write_text(json.dumps({"entorno": meta, "resultados": records}, ensure_ascii=False, indent=2), encoding="utf-8")
+    csv_path = json_path.with_suffix(".csv")
+    pd.DataFrame([{**meta, **r} for r in records]).to_csv(csv_path, index=False, encoding="utf-8-sig")
+    print(f"[✓] Reporte JSON: {json_path}")
+    print(f"[✓] Reporte CSV: {csv_path}")
+
+
+if __name__ == "__main__":
+    main()
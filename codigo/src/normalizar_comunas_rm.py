@@ -4,11 +4,23 @@ from __future__ import annotations
 
 import argparse
 import csv
+import functools
 import unicodedata
 from pathlib import Path
-from typing import Dict, Set
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
 
-import pandas as pd
+from ejecucion_por_archivo import (
+    agregar_argumento_jobs,
+    agregar_argumento_superponer,
+    ejecutar_por_archivo,
+    ejecutar_superpuesto,
+    reportar_fallos,
+)
+from instrumentacion import agregar_argumento_profile, contar_filas, instrumentar
+from lectura_csv import leer_csv_etapa
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 # Lista canónica de comunas de la Región Metropolitana
 CANON_COMUNAS: Dict[str, str] = {
@@ -79,7 +91,47 @@ def normalize(text: str | None) -> str:
     return s
 
 
-def main() -> None:
+def transform_file(csv_path: Path, df: pd.DataFrame) -> Tuple[Optional[pd.DataFrame], Optional[Set[str]]]:
+    """Normaliza un archivo; devuelve (tabla, comunas sin mapeo) o (None, None) si se omite."""
+    import pandas as pd
+
+    missing: Set[str] = set()
+    if 'comuna' not in df.columns:
+        return None, None
+
+    normalized = []
+    for val in df['comuna']:
+        norm = normalize(val)
+        if norm in NA_VALUES or norm == "":
+            normalized.append(val)
+            continue
+        canon = CANON_COMUNAS.get(norm)
+        if canon is None:
+            missing.add(val if pd.notna(val) else "")
+            normalized.append(val)
+        else:
+            normalized.append(canon)
+
+    df['comuna'] = normalized
+    contar_filas(entrada=len(df), salida=len(df))
+    return df, missing
+
+
+def write_file(csv_path: Path, df: pd.DataFrame, outdir: Path) -> None:
+    out_path = outdir / csv_path.name
+    df.to_csv(out_path, index=False, sep=';', encoding='utf-8-sig', quoting=csv.QUOTE_NONE, escapechar='\\')
+
+
+def process_file(csv_path: Path, outdir: Path) -> Optional[Set[str]]:
+    """Normaliza un archivo; devuelve las comunas sin mapeo o None si se omite."""
+    df, missing = transform_file(csv_path, leer_csv_etapa(csv_path))
+    if df is not None:
+        write_file(csv_path, df, outdir)
+    return missing
+
+
+@instrumentar
+def main(argv: Optional[List[str]] = None) -> None:
     parser = argparse.ArgumentParser(description="Normaliza nombres de comuna en tablas RM")
     parser.add_argument(
         "--indir",
@@ -91,7 +143,10 @@ def main() -> None:
         default="../data/interim/03_emisiones_rm_fusionadas",
         help="Directorio de salida (puede ser el mismo)",
     )
-    args = parser.parse_args()
+    agregar_argumento_jobs(parser)
+    agregar_argumento_superponer(parser)
+    agregar_argumento_profile(parser)
+    args = parser.parse_args(argv)
 
     indir = Path(args.indir).expanduser().resolve()
     outdir = Path(args.outdir).expanduser().resolve()
@@ -99,29 +154,17 @@ def main() -> None:
 
     missing: Set[str] = set()
 
-    for csv_path in sorted(indir.glob('retc*_RM.csv')):
-        df = pd.read_csv(csv_path, sep=';', dtype=str, encoding='utf-8', on_bad_lines='skip')
-        df.columns = [c.lstrip('\ufeff') for c in df.columns]
-        if 'comuna' not in df.columns:
+    files = sorted(indir.glob('retc*_RM.csv'))
+    if args.superponer:
+        escribir = functools.partial(write_file, outdir=outdir)
+        resultados, fallos = ejecutar_superpuesto(leer_csv_etapa, transform_file, escribir, files)
+    else:
+        resultados, fallos = ejecutar_por_archivo(process_file, files, outdir, jobs=args.jobs)
+    for csv_path, missing_file in resultados:
+        if missing_file is None:
             print(f"[!] {csv_path.name} no contiene columna 'comuna', se omite")
             continue
-
-        normalized = []
-        for val in df['comuna']:
-            norm = normalize(val)
-            if norm in NA_VALUES or norm == "":
-                normalized.append(val)
-                continue
-            canon = CANON_COMUNAS.get(norm)
-            if canon is None:
-                missing.add(val if pd.notna(val) else "")
-                normalized.append(val)
-            else:
-                normalized.append(canon)
-
-        df['comuna'] = normalized
-        out_path = outdir / csv_path.name
-        df.to_csv(out_path, index=False, sep=';', encoding='utf-8-sig', quoting=csv.QUOTE_NONE, escapechar='\\')
+        missing.update(missing_file)
         print(f"[✓] Comunas normalizadas en {csv_path.name}")
 
     if missing:
@@ -131,6 +174,8 @@ def main() -> None:
     else:
         print("[✓] Todas las comunas fueron normalizadas correctamente")
 
+    reportar_fallos(fallos)
+
 
 if __name__ == '__main__':
     main()
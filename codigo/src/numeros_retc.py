@@ -0,0 +1,89 @@
+"""Conversión vectorizada de cantidades RETC escritas en formato local.
+
+Las publicaciones mezclan coma y punto decimal, separadores de miles, espacios
+(incluidos los no separables), el punto medio `·` y notación científica con
+coma (`1,5E-03`). `parse_numeric` aplica las mismas reglas a una Series
+completa:
+
+  - normalización NFKC y eliminación de espacios y `·`,
+  - `""`, `-`, `na`, `nan`, `none` y `null` se consideran vacíos,
+  - con coma y punto a la vez, el punto es separador de miles (`1.234,5`),
+  - varios puntos o varias comas sin el otro signo son separadores de miles
+    (`1.234.567`, `1,234,567`),
+  - una coma sola es la coma decimal (`0,25`, `1,5E-03`).
+
+Las reglas se evalúan una vez por valor distinto y el resultado se expande a
+todas las filas, por lo que las columnas con muchos valores repetidos se
+convierten sin recorrer cada fila.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+VALORES_VACIOS = frozenset({"", "-", "na", "nan", "none", "null"})
+
+
+def _normalizar(texto: pd.Series) -> pd.Series:
+    """Lleva cada texto a la forma que entiende `pd.to_numeric`."""
+    texto = (
+        texto.str.normalize("NFKC")
+        .str.replace(r"[\s·]+", "", regex=True)
+        .str.replace("−", "-", regex=False)
+    )
+    comas = texto.str.count(",")
+    puntos = texto.str.count(r"\.")
+    miles_punto = ((comas > 0) & (puntos > 0)) | ((comas == 0) & (puntos > 1))
+    texto = texto.mask(miles_punto, texto.str.replace(".", "", regex=False))
+    miles_coma = (comas > 1) & (puntos == 0)
+    texto = texto.mask(miles_coma, texto.str.replace(",", "", regex=False))
+    return texto.str.replace(",", ".", regex=False)
+
+
+def _convertir_unicos(texto: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """(números, no convertibles) para valores de texto distintos entre sí."""
+    import numpy as np
+    import pandas as pd
+
+    # Primer intento sólo con la coma decimal: cubre casi todos los valores, y
+    # los que contienen un único separador dan lo mismo que con las reglas completas.
+    numeros = pd.to_numeric(texto.str.replace(",", ".", regex=False), errors="coerce").to_numpy(dtype="float64")
+    invalidos = np.zeros(len(texto), dtype=bool)
+    pendientes = np.flatnonzero(np.isnan(numeros))
+    if len(pendientes):
+        resto = _normalizar(texto.iloc[pendientes])
+        vacios = resto.str.lower().isin(VALORES_VACIOS).to_numpy()
+        numeros[pendientes] = pd.to_numeric(resto.where(~vacios), errors="coerce").to_numpy(dtype="float64")
+        invalidos[pendientes] = np.isnan(numeros[pendientes]) & ~vacios
+    return numeros, invalidos
+
+
+def parse_numeric(serie: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """Convierte `serie` a float64.
+
+    Devuelve (valores, no_convertibles): los vacíos y los textos que no
+    representan un número quedan como NaN, y `no_convertibles` marca sólo los
+    segundos. Ambas Series conservan el índice de `serie`.
+    """
+    import numpy as np
+    import pandas as pd
+    from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+    if is_numeric_dtype(serie) and not is_bool_dtype(serie):
+        return serie.astype("float64"), pd.Series(False, index=serie.index, name=serie.name)
+
+    codigos, unicos = pd.factorize(serie)
+    numeros, invalidos = _convertir_unicos(pd.Series(unicos, dtype=object).astype(str))
+
+    presentes = codigos >= 0
+    valores = np.full(len(serie), np.nan)
+    valores[presentes] = numeros[codigos[presentes]]
+    no_convertibles = np.zeros(len(serie), dtype=bool)
+    no_convertibles[presentes] = invalidos[codigos[presentes]]
+    return (
+        pd.Series(valores, index=serie.index, name=serie.name),
+        pd.Series(no_convertibles, index=serie.index, name=serie.name),
+    )
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""Índice de proximidad sobre las coordenadas distintas de los establecimientos.
+
+Responde consultas como "emisiones de PM2_5 a menos de 5 km de este punto" o
+"los 5 establecimientos más cercanos a esta estación" sin cargar el
+consolidado completo. El índice se arma una vez por consolidado:
+
+  - cada coordenada distinta aceptada por `calidad_coordenadas` es un
+    establecimiento (con su `rut` y `comuna` más frecuentes),
+  - las emisiones se suman por establecimiento, año y `contaminante_canon`,
+  - las coordenadas se llevan a la esfera unitaria (x, y, z), donde la
+    distancia euclidiana (cuerda) es monótona con la distancia de haversine,
+    y se indexan con `scipy.spatial.cKDTree`.
+
+Se guarda junto al consolidado (`<consolidado>.proximidad.npz`) con el hash
+SHA-256 del CSV y se recalcula si éste cambia; el árbol se reconstruye al
+cargar (milisegundos para algunos miles de establecimientos). Sin scipy
+(`pip install scipy`) las consultas calculan la distancia a todos los
+establecimientos, con el mismo resultado.
+
+  python proximidad_establecimientos.py --lat -33.45 --lon -70.66 --radio 5 --contaminante PM2_5
+  python proximidad_establecimientos.py --lat -33.45 --lon -70.66 --k 5 --año 2023
+
+Desde un notebook:
+
+    from proximidad_establecimientos import IndiceProximidad
+    indice = IndiceProximidad.desde_consolidado(Path(".../retc_RM_consolidado.csv"))
+    indice.within_radius(-70.66, -33.45, 5, contaminante="PM2_5")
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+from calidad_coordenadas import LAT_COLS, LON_COLS, YEAR_COL, evaluar_coordenadas, informar_calidad
+from capas_geo import hash_archivo
+from esquema_retc import selector_columnas
+from instrumentacion import agregar_argumento_profile, contar_filas, instrumentar
+from lectura_csv import leer_csv_etapa
+from numeros_retc import parse_numeric
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+DEFAULT_CONSOLIDADO = "../data/interim/04_emisiones_consolidadas/retc_RM_consolidado.csv"
+RADIO_TIERRA_KM = 6371.0088
+CONTAMINANTE_COL = "contaminante_canon"
+EMISION_COL = "emision_total"
+DESCRIPTORES = ["rut", "comuna"]
+
+
+def ruta_indice(consolidado: Path) -> Path:
+    return consolidado.with_name(f"{consolidado.stem}.proximidad.npz")
+
+
+def a_esfera(lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+    """Coordenadas (x, y, z) en la esfera unitaria."""
+    import numpy as np
+
+    lon, lat = np.radians(np.asarray(lon, dtype="float64")), np.radians(np.asarray(lat, dtype="float64"))
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+def km_a_cuerda(km: float) -> float:
+    import numpy as np
+
+    return 2.0 * np.sin(km / (2.0 * RADIO_TIERRA_KM))
+
+
+def cuerda_a_km(cuerda: np.ndarray) -> np.ndarray:
+    import numpy as np
+
+    return 2.0 * RADIO_TIERRA_KM * np.arcsin(np.clip(cuerda / 2.0, 0.0, 1.0))
+
+
+class _ArbolNumpy:
+    """Sustituto de cKDTree por fuerza bruta (sin scipy)."""
+
+    def __init__(self, puntos: np.ndarray) -> None:
+        self.puntos = puntos
+
+    def _distancias(self, punto: np.ndarray) -> np.ndarray:
+        import numpy as np
+
+        return np.sqrt(((self.puntos - punto) ** 2).sum(axis=1))
+
+    def query_ball_point(self, punto: np.ndarray, r: float) -> List[int]:
+        import numpy as np
+
+        return np.flatnonzero(self._distancias(punto) <= r).tolist()
+
+    def query(self, punto: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        import numpy as np
+
+        distancias = self._distancias(punto)
+        orden = np.argsort(distancias, kind="stable")[:k]
+        return distancias[orden], orden
+
+
+def _arbol(puntos: np.ndarray):
+    try:
+        from scipy.spatial import cKDTree
+    except ImportError:
+        return _ArbolNumpy(puntos)
+    return cKDTree(puntos)
+
+
+def _mas_frecuente(df: pd.DataFrame, clave: str, columna: str, n: int) -> np.ndarray:
+    import numpy as np
+
+    valores = np.full(n, "", dtype=object)
+    if columna in df.columns:
+        conteos = df[[clave, columna]].dropna().value_counts().reset_index()
+        primeros = conteos.drop_duplicates(clave)
+        valores[primeros[clave].to_numpy()] = primeros[columna].to_numpy(dtype=object)
+    return valores
+
+
+class IndiceProximidad:
+    """Establecimientos (coordenadas distintas) con sus emisiones por año y contaminante."""
+
+    def __init__(self, lon: np.ndarray, lat: np.ndarray, descriptores: pd.DataFrame,
+                 emisiones: pd.DataFrame, firma: dict) -> None:
+        import numpy as np
+
+        self.lon = np.asarray(lon, dtype="float64")
+        self.lat = np.asarray(lat, dtype="float64")
+        self.descriptores = descriptores  # una fila por establecimiento: rut, comuna
+        self.emisiones = emisiones  # establecimiento, año, contaminante_canon, emision_total, registros
+        self.firma = firma
+        self.arbol = _arbol(a_esfera(self.lon, self.lat))
+
+    @classmethod
+    def construir(cls, df: pd.DataFrame, firma: dict) -> "IndiceProximidad":
+        import numpy as np
+        import pandas as pd
+
+        lon, lat, calidad = evaluar_coordenadas(df)
+        informar_calidad(df, calidad)
+        aceptadas = ~np.isnan(lon)
+        pares, establecimiento = np.unique(
+            np.column_stack([lon[aceptadas], lat[aceptadas]]), axis=0, return_inverse=True
+        )
+        filas = df.loc[aceptadas].copy()
+        filas["establecimiento"] = establecimiento.reshape(-1)
+        filas[EMISION_COL] = parse_numeric(filas[EMISION_COL])[0]
+
+        emisiones = (
+            filas.groupby(["establecimiento", YEAR_COL, CONTAMINANTE_COL], sort=True)[EMISION_COL]
+            .agg(["sum", "size"])
+            .rename(columns={"sum": EMISION_COL, "size": "registros"})
+            .reset_index()
+        )
+        descriptores = pd.DataFrame(
+            {col: _mas_frecuente(filas, "establecimiento", col, len(pares)) for col in DESCRIPTORES}
+        )
+        return cls(pares[:, 0], pares[:, 1], descriptores, emisiones, firma)
+
+    @classmethod
+    def desde_consolidado(cls, consolidado: Path) -> "IndiceProximidad":
+        """Carga el índice guardado junto a `consolidado` o lo construye y lo guarda."""
+        import numpy as np
+        import pandas as pd
+
+        firma = {"sha256": hash_archivo(consolidado)}
+        destino = ruta_indice(consolidado)
+        if destino.exists():
+            with np.load(destino, allow_pickle=False) as datos:
+                if json.loads(str(datos["firma"])) == firma:
+                    print(f"[=] Índice vigente: {destino.name}")
+                    descriptores = pd.DataFrame({col: datos[col].astype(object) for col in DESCRIPTORES})
+                    emisiones = pd.DataFrame({
+                        "establecimiento": datos["establecimiento"],
+                        YEAR_COL: datos[YEAR_COL].astype(object),
+                        CONTAMINANTE_COL: datos[CONTAMINANTE_COL].astype(object),
+                        EMISION_COL: datos[EMISION_COL],
+                        "registros": datos["registros"],
+                    })
+                    return cls(datos["lon"], datos["lat"], descriptores, emisiones, firma)
+            print(f"[i] {destino.name} no corresponde al consolidado actual; se recalcula")
+
+        columnas = LAT_COLS + LON_COLS + DESCRIPTORES + [YEAR_COL, CONTAMINANTE_COL, EMISION_COL]
+        df = leer_csv_etapa(consolidado, usecols=selector_columnas(columnas))
+        faltantes = [c for c in (YEAR_COL, CONTAMINANTE_COL, EMISION_COL) if c not in df.columns]
+        if faltantes:
+            raise SystemExit(f"{consolidado.name} no tiene las columnas: {', '.join(faltantes)}")
+        indice = cls.construir(df, firma)
+
+        emisiones = indice.emisiones
+        np.savez_compressed(
+            destino,
+            lon=indice.lon,
+            lat=indice.lat,
+            establecimiento=emisiones["establecimiento"].to_numpy(dtype=np.int64),
+            registros=emisiones["registros"].to_numpy(dtype=np.int64),
+            firma=json.dumps(firma),
+            **{EMISION_COL: emisiones[EMISION_COL].to_numpy(dtype="float64")},
+            **{col: emisiones[col].fillna("").to_numpy(dtype=str) for col in (YEAR_COL, CONTAMINANTE_COL)},
+            **{col: indice.descriptores[col].fillna("").to_numpy(dtype=str) for col in DESCRIPTORES},
+        )
+        contar_filas(entrada=len(df), salida=len(indice.lon))
+        print(f"[✓] Índice de {len(indice.lon)} establecimientos guardado en {destino}")
+        return indice
+
+    def _filtrar(self, establecimientos: np.ndarray, contaminante: Optional[str], año: Optional[str]) -> pd.DataFrame:
+        emisiones = self.emisiones[self.emisiones["establecimiento"].isin(establecimientos)]
+        if contaminante is not None:
+            emisiones = emisiones[emisiones[CONTAMINANTE_COL] == contaminante]
+        if año is not None:
+            emisiones = emisiones[emisiones[YEAR_COL] == str(año)]
+        return emisiones
+
+    def en_radio(self, lon: float, lat: float, radio_km: float) -> np.ndarray:
+        """Índices de los establecimientos a menos de `radio_km` (distancia de haversine)."""
+        import numpy as np
+
+        cercanos = self.arbol.query_ball_point(a_esfera([lon], [lat])[0], km_a_cuerda(radio_km))
+        return np.sort(np.asarray(cercanos, dtype=np.intp))
+
+    def within_radius(self, lon: float, lat: float, radio_km: float,
+                      contaminante: Optional[str] = None, año: Optional[str] = None) -> pd.DataFrame:
+        """Emisión total por contaminante y año de los establecimientos a menos de `radio_km`."""
+        emisiones = self._filtrar(self.en_radio(lon, lat, radio_km), contaminante, año)
+        return (
+            emisiones.groupby([CONTAMINANTE_COL, YEAR_COL], sort=True)
+            .agg(**{
+                EMISION_COL: (EMISION_COL, "sum"),
+                "establecimientos": ("establecimiento", "nunique"),
+                "registros": ("registros", "sum"),
+            })
+            .reset_index()
+        )
+
+    def k_nearest(self, lon: float, lat: float, k: int = 5,
+                  contaminante: Optional[str] = None, año: Optional[str] = None) -> pd.DataFrame:
+        """Los `k` establecimientos más cercanos, con su emisión por contaminante y año."""
+        import numpy as np
+        import pandas as pd
+
+        k = min(k, len(self.lon))
+        if k == 0:
+            return pd.DataFrame(columns=["rango", "distancia_km", "latitud", "longitud", *DESCRIPTORES,
+                                         CONTAMINANTE_COL, YEAR_COL, EMISION_COL, "registros"])
+        cuerdas, cercanos = self.arbol.query(a_esfera([lon], [lat])[0], k=k)
+        cercanos = np.atleast_1d(cercanos)
+        establecimientos = self.descriptores.iloc[cercanos].reset_index(drop=True)
+        establecimientos.insert(0, "establecimiento", cercanos)
+        establecimientos.insert(1, "rango", np.arange(1, k + 1))
+        establecimientos.insert(2, "distancia_km", cuerda_a_km(np.atleast_1d(cuerdas)))
+        establecimientos.insert(3, "latitud", self.lat[cercanos])
+        establecimientos.insert(4, "longitud", self.lon[cercanos])
+        resultado = establecimientos.merge(self._filtrar(cercanos, contaminante, año), on="establecimiento", how="left")
+        return resultado.drop(columns=["establecimiento"]).sort_values(
+            ["rango", CONTAMINANTE_COL, YEAR_COL], kind="stable"
+        ).reset_index(drop=True)
+
+
+@instrumentar
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Emisiones de establecimientos cercanos a un punto")
+    parser.add_argument("--consolidado", default=DEFAULT_CONSOLIDADO, help="CSV consolidado RM")
+    parser.add_argument("--lat", type=float, default=None, help="Latitud de la consulta (sin punto sólo se construye el índice)")
+    parser.add_argument("--lon", type=float, default=None, help="Longitud de la consulta")
+    parser.add_argument("--radio", type=float, default=None, help="Radio en km: emisión total dentro del radio")
+    parser.add_argument("--k", type=int, default=None, help="Número de establecimientos más cercanos")
+    parser.add_argument("--contaminante", default=None, help="Filtrar por contaminante_canon (p. ej. PM2_5)")
+    parser.add_argument("--año", dest="ano", default=None, help="Filtrar por año")
+    parser.add_argument("--out", default=None, help="CSV de salida (por defecto se imprime)")
+    agregar_argumento_profile(parser)
+    args = parser.parse_args(argv)
+
+    import pandas as pd
+
+    consolidado_path = Path(args.consolidado).expanduser().resolve()
+    if not consolidado_path.exists():
+        raise SystemExit(f"No se encontró el consolidado: {consolidado_path}")
+    indice = IndiceProximidad.desde_consolidado(consolidado_path)
+    if args.lat is None and args.lon is None:
+        return
+    if args.lat is None or args.lon is None:
+        raise SystemExit("Indica --lat y --lon")
+    if (args.radio is None) == (args.k is None):
+        raise SystemExit("Indica --radio o --k junto con --lat/--lon")
+
+    lon, lat = args.lon, args.lat
+    if args.radio is not None:
+        print(f"[i] {len(indice.en_radio(lon, lat, args.radio))} establecimientos "
+              f"a menos de {args.radio:g} km de ({lat}, {lon})")
+        resultado = indice.within_radius(lon, lat, args.radio, args.contaminante, args.ano)
+    else:
+        resultado = indice.k_nearest(lon, lat, args.k, args.contaminante, args.ano)
+
+    if args.out:
+        out_path = Path(args.out).expanduser().resolve()
+        resultado.to_csv(out_path, index=False, encoding="utf-8-sig")
+        print(f"[✓] Resultado en {out_path}")
+    else:
+        with pd.option_context("display.width", 200, "display.max_columns", None, "display.max_rows", 200):
+            print(resultado.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""Rásters de densidad de emisiones por contaminante y año para `outputs/mapas`.
+
+Suma `emision_total` en una grilla regular métrica (UTM 19S, EPSG:32719) sobre
+la caja de la RM (`calidad_coordenadas.RM_BBOX`), de modo que todas las capas
+y ejecuciones quedan alineadas. Todas las capas contaminante × año se
+acumulan en una sola pasada: cada fila aporta a la celda `capa * celdas +
+celda` de un único `np.bincount`.
+
+Con `--suavizado` (desviación estándar en metros) cada capa se convoluciona con
+un kernel gaussiano mediante FFT (`numpy.fft.rfft2`, todas las capas a la vez);
+el kernel suma 1, así que la emisión total se conserva salvo la que cae fuera
+de la caja. Los valores se escriben como densidad (t/año por km²).
+
+Salidas en `outputs/mapas/densidad_emisiones/`, con el prefijo
+`LBP_AIRE_<DATETIME>_`:
+
+  - `..._densidad_emisiones.npz`: arreglo (capas, filas, columnas) en float32,
+    con `contaminante`, `año`, `transform` (a, b, c, d, e, f de GDAL) y `crs`,
+  - `..._densidad_<contaminante>_<año>.tif`: GeoTIFF comprimido por capa (si
+    rasterio está instalado; `pip install rasterio`),
+  - `..._densidad_<contaminante>_<año>.png`: vista previa del último año de cada
+    contaminante (`--png-todos` para todas las capas, `--sin-png` para ninguna).
+
+Las coordenadas pasan por `calidad_coordenadas.evaluar_coordenadas`; las
+rechazadas no se rasterizan.
+
+  python rasterizar_emisiones_rm.py --resolucion 1000 --suavizado 2000 --contaminante PM2_5 --año 2023
+"""
+from __future__ import annotations
+
+import argparse
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
+
+from calidad_coordenadas import LAT_COLS, LON_COLS, RM_BBOX, YEAR_COL, evaluar_coordenadas, informar_calidad
+from esquema_retc import selector_columnas
+from instrumentacion import agregar_argumento_profile, contar_filas, instrumentar
+from lectura_csv import leer_csv_etapa
+from numeros_retc import parse_numeric
+
+if TYPE_CHECKING:
+    import numpy as np
+
+DEFAULT_CONSOLIDADO = "../data/interim/04_emisiones_consolidadas/retc_RM_consolidado.csv"
+DEFAULT_OUTDIR = "../outputs/mapas/densidad_emisiones"
+CRS_METRICO = "EPSG:32719"
+RESOLUCION_M = 1000.0
+CONTAMINANTE_COL = "contaminante_canon"
+EMISION_COL = "emision_total"
+
+
+def safe_name(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", name).strip("_") or "contaminante"
+
+
+def proyectar(lon: np.ndarray, lat: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    try:
+        from pyproj import Transformer
+    except ImportError as exc:
+        raise SystemExit("pyproj no está instalado (pip install pyproj)") from exc
+    return Transformer.from_crs("EPSG:4326", CRS_METRICO, always_xy=True).transform(lon, lat)
+
+
+class Grilla:
+    """Grilla norte-arriba sobre la caja de la RM proyectada."""
+
+    def __init__(self, resolucion: float, bbox=RM_BBOX) -> None:
+        import numpy as np
+
+        lon_min, lat_min, lon_max, lat_max = bbox
+        # las esquinas no bastan en UTM: se proyecta el contorno de la caja
+        borde_lon = np.r_[np.linspace(lon_min, lon_max, 50), np.full(50, lon_max),
+                          np.linspace(lon_max, lon_min, 50), np.full(50, lon_min)]
+        borde_lat = np.r_[np.full(50, lat_min), np.linspace(lat_min, lat_max, 50),
+                          np.full(50, lat_max), np.linspace(lat_max, lat_min, 50)]
+        x, y = proyectar(borde_lon, borde_lat)
+        self.resolucion = resolucion
+        self.x0 = np.floor(np.min(x) / resolucion) * resolucion
+        self.y0 = np.ceil(np.max(y) / resolucion) * resolucion
+        self.columnas = int(np.ceil((np.max(x) - self.x0) / resolucion))
+        self.filas = int(np.ceil((self.y0 - np.min(y)) / resolucion))
+
+    @property
+    def celdas(self) -> int:
+        return self.filas * self.columnas
+
+    @property
+    def transform(self) -> Tuple[float, float, float, float, float, float]:
+        """Coeficientes (a, b, c, d, e, f) de la transformación afín de GDAL/rasterio."""
+        return (self.resolucion, 0.0, self.x0, 0.0, -self.resolucion, self.y0)
+
+    def celda(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Índice plano de la celda de cada punto (-1 fuera de la grilla)."""
+        import numpy as np
+
+        columna = np.floor((x - self.x0) / self.resolucion).astype(np.int64)
+        fila = np.floor((self.y0 - y) / self.resolucion).astype(np.int64)
+        dentro = (columna >= 0) & (columna < self.columnas) & (fila >= 0) & (fila < self.filas)
+        return np.where(dentro, fila * self.columnas + columna, -1)
+
+
+def acumular(capa: np.ndarray, celda: np.ndarray, emision: np.ndarray, capas: int, grilla: Grilla) -> np.ndarray:
+    """Suma de `emision` por (capa, celda) -> arreglo (capas, filas, columnas)."""
+    import numpy as np
+
+    validas = (capa >= 0) & (celda >= 0) & ~np.isnan(emision)
+    plano = np.bincount(
+        capa[validas] * grilla.celdas + celda[validas],
+        weights=emision[validas],
+        minlength=capas * grilla.celdas,
+    )
+    return plano.reshape(capas, grilla.filas, grilla.columnas)
+
+
+def kernel_gaussiano(sigma_celdas: float) -> np.ndarray:
+    import numpy as np
+
+    radio = max(1, int(np.ceil(3 * sigma_celdas)))
+    eje = np.arange(-radio, radio + 1)
+    perfil = np.exp(-0.5 * (eje / sigma_celdas) ** 2)
+    kernel = np.outer(perfil, perfil)
+    return kernel / kernel.sum()
+
+
+def suavizar(capas: np.ndarray, kernel: np.ndarray) -> np.ndarray:
+    """Convolución lineal (sin envolver) de cada capa con `kernel`, vía FFT."""
+    import numpy as np
+
+    radio = kernel.shape[0] // 2
+    filas, columnas = capas.shape[-2:]
+    forma = (filas + 2 * radio, columnas + 2 * radio)
+    espectro = np.fft.rfft2(capas, s=forma) * np.fft.rfft2(kernel, s=forma)
+    resultado = np.fft.irfft2(espectro, s=forma)[..., radio:radio + filas, radio:radio + columnas]
+    # la FFT deja residuos del orden de 1e-16 (relativos a cada capa) donde no hay emisión
+    umbral = 1e-12 * np.abs(capas).max(axis=(-2, -1), keepdims=True)
+    return np.where(np.abs(resultado) <= umbral, 0.0, resultado)
+
+
+def escribir_geotiff(path: Path, capa: np.ndarray, grilla: Grilla) -> bool:
+    try:
+        import rasterio
+        from rasterio.transform import Affine
+    except ImportError:
+        return False
+    perfil = {
+        "driver": "GTiff",
+        "height": grilla.filas,
+        "width": grilla.columnas,
+        "count": 1,
+        "dtype": "float32",
+        "crs": CRS_METRICO,
+        "transform": Affine(*grilla.transform),
+        "compress": "deflate",
+        "predictor": 3,
+        "tiled": True,
+    }
+    with rasterio.open(path, "w", **perfil) as destino:
+        destino.write(capa.astype("float32"), 1)
+    return True
+
+
+class VistaPrevia:
+    """Figura PNG reutilizada entre capas: sólo cambian datos, escala de color y título.
+
+    Crear la figura, la barra de color y el ajuste de márgenes por cada capa
+    costaba más que todo el resto de la etapa.
+    """
+
+    def __init__(self, grilla: Grilla) -> None:
+        import numpy as np
+        from matplotlib.colors import LogNorm
+        from matplotlib.figure import Figure
+
+        extent = (grilla.x0 / 1000, (grilla.x0 + grilla.columnas * grilla.resolucion) / 1000,
+                  (grilla.y0 - grilla.filas * grilla.resolucion) / 1000, grilla.y0 / 1000)
+        self.figura = Figure(figsize=(8, 7))
+        self.ejes = self.figura.add_subplot()
+        # escala logarítmica: unas pocas fuentes concentran la mayor parte de la emisión
+        self.imagen = self.ejes.imshow(np.ma.masked_all((grilla.filas, grilla.columnas)), extent=extent,
+                                       norm=LogNorm(vmin=1e-6, vmax=1.0), cmap="inferno", interpolation="nearest")
+        self.barra = self.figura.colorbar(self.imagen, ax=self.ejes, label="t/año por km²", shrink=0.8)
+        self.ejes.set_title(" ")
+        self.ejes.set_xlabel("Este UTM 19S (km)")
+        self.ejes.set_ylabel("Norte UTM 19S (km)")
+        self.figura.tight_layout()
+
+    def escribir(self, path: Path, capa: np.ndarray, titulo: str) -> None:
+        import numpy as np
+
+        positivos = capa[capa > 0]
+        if len(positivos):
+            self.imagen.set_data(np.ma.masked_less_equal(capa, 0))
+            self.imagen.set_clim(max(positivos.min(), positivos.max() * 1e-6), positivos.max())
+        self.imagen.set_visible(bool(len(positivos)))
+        self.barra.ax.set_visible(bool(len(positivos)))
+        self.ejes.set_title(titulo)
+        self.figura.savefig(path, dpi=150)
+
+
+def capas_png(claves: Sequence[Tuple[str, str]], todas: bool) -> List[int]:
+    """Capas con vista previa: todas, o el último año de cada contaminante (`claves` viene ordenado)."""
+    if todas:
+        return list(range(len(claves)))
+    return sorted({contaminante: i for i, (contaminante, _) in enumerate(claves)}.values())
+
+
+@instrumentar
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Rásters de densidad de emisiones por contaminante y año")
+    parser.add_argument("--consolidado", default=DEFAULT_CONSOLIDADO, help="CSV consolidado RM")
+    parser.add_argument("--outdir", default=DEFAULT_OUTDIR, help="Carpeta de salida")
+    parser.add_argument("--resolucion", type=float, default=RESOLUCION_M, help="Tamaño de celda (m)")
+    parser.add_argument("--suavizado", type=float, default=0.0, help="Sigma del suavizado gaussiano (m); 0 = sin suavizar")
+    parser.add_argument("--contaminante", action="append", default=None, help="contaminante_canon a incluir (repetible)")
+    parser.add_argument("--año", dest="anos", action="append", default=None, help="Año a incluir (repetible)")
+    png = parser.add_mutually_exclusive_group()
+    png.add_argument("--sin-png", action="store_true", help="No generar las vistas previas PNG")
+    png.add_argument("--png-todos", action="store_true",
+                     help="Vista previa PNG de cada capa (por defecto, sólo el último año de cada contaminante)")
+    agregar_argumento_profile(parser)
+    args = parser.parse_args(argv)
+
+    import numpy as np
+    import pandas as pd
+
+    consolidado_path = Path(args.consolidado).expanduser().resolve()
+    outdir = Path(args.outdir).expanduser().resolve()
+    if not consolidado_path.exists():
+        raise SystemExit(f"No se encontró el consolidado: {consolidado_path}")
+    if args.resolucion <= 0:
+        raise SystemExit("--resolucion debe ser positiva")
+
+    columnas = LAT_COLS + LON_COLS + [YEAR_COL, CONTAMINANTE_COL, EMISION_COL]
+    df = leer_csv_etapa(consolidado_path, usecols=selector_columnas(columnas))
+    faltantes = [c for c in (YEAR_COL, CONTAMINANTE_COL, EMISION_COL) if c not in df.columns]
+    if faltantes:
+        raise SystemExit(f"{consolidado_path.name} no tiene las columnas: {', '.join(faltantes)}")
+    if args.contaminante:
+        df = df[df[CONTAMINANTE_COL].isin(args.contaminante)]
+    if args.anos:
+        df = df[df[YEAR_COL].isin(args.anos)]
+    df = df.dropna(subset=[YEAR_COL, CONTAMINANTE_COL]).reset_index(drop=True)
+    if df.empty:
+        print("[!] No hay registros con contaminante y año para rasterizar")
+        return
+
+    lon, lat, calidad = evaluar_coordenadas(df)
+    informar_calidad(df, calidad)
+    aceptadas = ~np.isnan(lon)
+    grilla = Grilla(args.resolucion)
+    celda = np.full(len(df), -1, dtype=np.int64)
+    x, y = proyectar(lon[aceptadas], lat[aceptadas])
+    celda[aceptadas] = grilla.celda(np.asarray(x), np.asarray(y))
+
+    capa, claves = pd.MultiIndex.from_frame(df[[CONTAMINANTE_COL, YEAR_COL]]).factorize(sort=True)
+    emision = parse_numeric(df[EMISION_COL])[0].to_numpy(dtype="float64")
+    sumas = acumular(capa, celda, emision, len(claves), grilla)
+    print(f"[i] {len(claves)} capas contaminante × año en una grilla de {grilla.columnas}x{grilla.filas} "
+          f"celdas de {args.resolucion:g} m")
+
+    if args.suavizado > 0:
+        sumas = suavizar(sumas, kernel_gaussiano(args.suavizado / args.resolucion))
+    densidad = (sumas / (args.resolucion / 1000) ** 2).astype("float32")
+
+    outdir.mkdir(parents=True, exist_ok=True)
+    prefijo = f"LBP_AIRE_{datetime.now().strftime('%Y%m%d_%H%M%S')}_densidad"
+    npz_path = outdir / f"{prefijo}_emisiones.npz"
+    np.savez_compressed(
+        npz_path,
+        densidad=densidad,
+        contaminante=np.array([c for c, _ in claves], dtype=str),
+        año=np.array([a for _, a in claves], dtype=str),
+        transform=np.array(grilla.transform),
+        crs=CRS_METRICO,
+        suavizado_m=args.suavizado,
+    )
+    print(f"[✓] Rásters en {npz_path}")
+
+    def base(i: int) -> Path:
+        contaminante, año = claves[i]
+        return outdir / f"{prefijo}_{safe_name(contaminante)}_{safe_name(año)}"
+
+    geotiff = True
+    for i in range(len(claves)):
+        geotiff = geotiff and escribir_geotiff(base(i).with_suffix(".tif"), densidad[i], grilla)
+    if not geotiff:
+        print("[i] rasterio no está instalado; se omiten los GeoTIFF (pip install rasterio)")
+    elif len(claves):
+        print(f"[✓] {len(claves)} GeoTIFF en {outdir}")
+
+    if not args.sin_png:
+        vista = VistaPrevia(grilla)
+        seleccion = capas_png(claves, args.png_todos)
+        for i in seleccion:
+            contaminante, año = claves[i]
+            vista.escribir(base(i).with_suffix(".png"), densidad[i], f"{contaminante} {año} — densidad de emisión")
+        print(f"[✓] {len(seleccion)} vistas previas PNG en {outdir}")
+
+    contar_filas(entrada=len(df), salida=len(claves))
+    fuera = int((aceptadas & (celda < 0)).sum())
+    if fuera:
+        print(f"[!] {fuera} filas aceptadas quedaron fuera de la grilla")
+
+
+if __name__ == "__main__":
+    main()
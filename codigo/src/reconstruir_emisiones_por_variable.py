@@ -6,25 +6,32 @@
 - Combina `rubro_id` con `id_rubro_vu`.
 - Normaliza `unidad` a `t/año` (reemplaza variantes `ton/año`).
 - Escribe un CSV por contaminante en el directorio de salida.
+- Con `--proyectar` sólo lee las columnas que usan las etapas posteriores
+  (ver `esquema_retc.COLUMNAS_RECONSTRUCCION`).
+- Registra los conflictos por par de columnas en `reporte_fusion.json`.
 
 Uso:
   python reconstruir_emisiones_por_variable.py \
     --indir ../data/interim/emisiones_por_variable \
-    --outdir ../data/interim/emisiones_por_variable_fusionadas
+    --outdir ../data/interim/emisiones_por_variable_fusionadas \
+    --jobs 4
 """
 from __future__ import annotations
 
 import argparse
+import json
 from pathlib import Path
-from typing import Iterable, Tuple
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
 
-import pandas as pd
+from ejecucion_por_archivo import agregar_argumento_jobs, ejecutar_por_archivo, reportar_fallos
+from esquema_retc import COLUMNAS_RECONSTRUCCION, PARES_FUSION, selector_columnas
+from instrumentacion import agregar_argumento_profile, contar_filas, instrumentar
 
-DEFAULT_PAIRS: Tuple[Tuple[str, str], ...] = (
-    ("cantidad_toneladas", "emision_total"),
-    ("id_ciiu6", "ciiu6_id"),
-    ("rubro_id", "id_rubro_vu"),
-)
+if TYPE_CHECKING:
+    import pandas as pd
+
+DEFAULT_PAIRS: Tuple[Tuple[str, str], ...] = PARES_FUSION
+REPORT_NAME = "reporte_fusion.json"
 
 SKIP_FILES = {
     "diccionario_id_nombre_por_grupo.csv",
@@ -32,36 +39,57 @@ SKIP_FILES = {
 }
 
 
-def read_csv(path: Path) -> pd.DataFrame:
-    df = pd.read_csv(path, dtype=str)
-    # homogenizar vacíos como NA para facilitar el merge
-    df = df.apply(lambda col: col.replace({"": pd.NA}))
-    return df
+def read_csv(path: Path, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    import pandas as pd
 
+    usecols = selector_columnas(columns) if columns is not None else None
+    # homogenizar vacíos como NA en la lectura para facilitar el merge
+    return pd.read_csv(path, dtype=str, usecols=usecols, na_values=[""])
 
-def merge_columns(df: pd.DataFrame, primary: str, secondary: str) -> pd.DataFrame:
-    if primary not in df.columns and secondary not in df.columns:
-        return df
-    if primary not in df.columns:
-        df[primary] = pd.NA
-    if secondary not in df.columns:
-        return df
 
-    prim = df[primary]
-    sec = df[secondary]
+def merge_columns(
+    df: pd.DataFrame, pairs: Iterable[Tuple[str, str]]
+) -> Tuple[pd.DataFrame, List[Dict[str, object]]]:
+    """Fusiona todos los pares (principal, secundaria) en una sola pasada.
 
-    # Detectar conflictos: filas con valores distintos en ambas columnas
-    conflicts = prim.notna() & sec.notna() & (prim != sec)
-    if conflicts.any():
-        conflict_count = int(conflicts.sum())
-        print(f"[!] Advertencia: {conflict_count} conflictos al fusionar '{primary}' y '{secondary}'. Se conserva '{primary}'.")
+    Ante valores distintos en ambas columnas se conserva la principal; el
+    número de conflictos por par se devuelve en lugar de imprimirse.
+    """
+    import pandas as pd
 
-    df[primary] = prim.combine_first(sec)
-    df = df.drop(columns=[secondary])
-    return df
+    report: List[Dict[str, object]] = []
+    primaries: List[str] = []
+    secondaries: List[str] = []
+    for primary, secondary in pairs:
+        if primary not in df.columns and secondary not in df.columns:
+            continue
+        if primary not in df.columns:
+            df[primary] = pd.NA
+        if secondary not in df.columns:
+            continue
+        primaries.append(primary)
+        secondaries.append(secondary)
+
+    if not primaries:
+        return df, report
+
+    prim = df[primaries]
+    sec = df[secondaries].set_axis(primaries, axis=1)
+    conflicts = (prim.notna() & sec.notna() & prim.ne(sec)).sum()
+
+    df[primaries] = prim.where(prim.notna(), sec)
+    df = df.drop(columns=secondaries)
+
+    for primary, secondary in zip(primaries, secondaries):
+        report.append(
+            {"principal": primary, "secundaria": secondary, "conflictos": int(conflicts[primary])}
+        )
+    return df, report
 
 
 def normalize_units(df: pd.DataFrame) -> pd.DataFrame:
+    import pandas as pd
+
     if "unidad" not in df.columns:
         return df
     df["unidad"] = (
@@ -72,16 +100,23 @@ def normalize_units(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def process_file(path: Path, outdir: Path, pairs: Iterable[Tuple[str, str]]) -> None:
-    df = read_csv(path)
-    for primary, secondary in pairs:
-        df = merge_columns(df, primary, secondary)
+def process_file(
+    path: Path,
+    outdir: Path,
+    pairs: Iterable[Tuple[str, str]],
+    columns: Optional[Iterable[str]] = None,
+) -> Dict[str, object]:
+    df = read_csv(path, columns)
+    df, conflicts = merge_columns(df, pairs)
     df = normalize_units(df)
+    contar_filas(entrada=len(df), salida=len(df))
     outdir.mkdir(parents=True, exist_ok=True)
     df.to_csv(outdir / path.name, index=False, encoding="utf-8-sig")
+    return {"archivo": path.name, "filas": len(df), "pares": conflicts}
 
 
-def main() -> None:
+@instrumentar
+def main(argv: Optional[List[str]] = None) -> None:
     parser = argparse.ArgumentParser(description="Fusiona columnas duplicadas en tablas por contaminante")
     parser.add_argument(
         "--indir",
@@ -93,7 +128,19 @@ def main() -> None:
         default="../data/interim/emisiones_por_variable_fusionadas",
         help="Directorio de salida para los CSV fusionados",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--proyectar",
+        action="store_true",
+        help="Leer sólo las columnas requeridas por extractos y totales",
+    )
+    agregar_argumento_jobs(parser)
+    parser.add_argument(
+        "--reporte",
+        default=None,
+        help=f"Ruta del reporte JSON de conflictos (por defecto <outdir>/{REPORT_NAME})",
+    )
+    agregar_argumento_profile(parser)
+    args = parser.parse_args(argv)
 
     indir = Path(args.indir).expanduser().resolve()
     outdir = Path(args.outdir).expanduser().resolve()
@@ -104,10 +151,25 @@ def main() -> None:
     if not files:
         raise SystemExit("No se encontraron archivos CSV de contaminantes en el directorio indicado.")
 
-    for path in files:
-        process_file(path, outdir, DEFAULT_PAIRS)
-        print(f"[✓] Procesado {path.name}")
+    columns = COLUMNAS_RECONSTRUCCION if args.proyectar else None
+    outdir.mkdir(parents=True, exist_ok=True)
 
+    resultados, fallos = ejecutar_por_archivo(
+        process_file, files, outdir, DEFAULT_PAIRS, columns, jobs=args.jobs
+    )
+    results = []
+    for path, result in resultados:
+        results.append(result)
+        total = sum(int(p["conflictos"]) for p in result["pares"])
+        suffix = f" ({total} conflictos)" if total else ""
+        print(f"[✓] Procesado {path.name}{suffix}")
+
+    report_path = Path(args.reporte).expanduser().resolve() if args.reporte else outdir / REPORT_NAME
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    print(f"[✓] Reporte de conflictos: {report_path}")
+    reportar_fallos(fallos)
     print(f"[✓] CSV fusionados disponibles en: {outdir}")
 
 
@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""Asigna un `id_establecimiento` estable entre años a cada fila de las tablas RM.
+
+Un mismo establecimiento aparece con `razon_social`, `nombre_establecimiento`,
+`rut_razon_social` e `id_vu` distintos entre EFP 2005–2022 y RUEA 2023. La
+resolución trabaja sobre las combinaciones distintas de esas columnas (más
+comuna y coordenadas) de todos los años, reducidas a perfiles normalizados
+(RUT sin formato, nombre sin tildes ni forma societaria, comuna normalizada y
+coordenadas redondeadas a `DECIMALES_PERFIL`), y los agrupa sin comparar
+todos los pares:
+
+  1. bloqueo: cada perfil recibe claves de bloque (`id_vu`, RUT, celda de
+     sus coordenadas en cuatro grillas desplazadas media celda, y los
+     `TRIGRAMAS_BLOQUE` trigramas más raros de su nombre dentro de su comuna);
+     sólo se comparan perfiles que comparten alguna clave,
+  2. comparación: dos perfiles son el mismo establecimiento si tienen el mismo
+     `id_vu`; si, con comuna compatible, cumplen al menos dos de: mismo RUT,
+     a menos de `DISTANCIA_M` metros, similitud de Jaccard de los trigramas
+     del nombre >= `SIMILITUD_NOMBRE` (si ambos tienen coordenadas, deben
+     estar a menos de `DISTANCIA_M`: RUT y nombre sólo deciden cuando a uno
+     le faltan); o si, en la misma comuna y sin RUT ni
+     coordenadas que lo contradigan, sus nombres tienen similitud >=
+     `SIMILITUD_ALTA`,
+  3. los pares aceptados se cierran transitivamente (componentes conexas);
+     un grupo sin coordenadas se une a un grupo con coordenadas sólo si
+     coincide con uno solo, para no unir sucursales por transitividad.
+
+Los bloques de más de `MAX_BLOQUE` perfiles (p. ej. un trigrama muy común) se
+omiten, de modo que los pares comparados crecen linealmente con el número de
+perfiles y no con su cuadrado. Bloqueo, comparación y componentes se
+calculan con arreglos NumPy.
+
+El ID es `E` + 16 dígitos hexadecimales del hash del registro más antiguo del
+grupo, así que agregar un año nuevo no cambia los IDs existentes salvo que un
+registro nuevo una dos grupos (se conserva entonces el del más antiguo).
+
+Se ejecuta después de `agregar_id_unico_rm.py` y antes de
+`fusionar_emisiones_consolidadas.py`, que lleva la columna al consolidado:
+
+  python resolver_establecimientos_rm.py --indir ../data/interim/03_emisiones_rm_fusionadas \
+    --tabla ../outputs/tablas/resumenes/LBP_AIRE_<fecha>_establecimientos.csv
+"""
+from __future__ import annotations
+
+import argparse
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING, List, NamedTuple, Optional, Sequence, Tuple
+
+from calidad_coordenadas import LAT_COLS, LON_COLS, YEAR_COL, coalesce_columns, evaluar_coordenadas
+from agregar_id_unico_rm import hash_estable
+from ejecucion_por_archivo import agregar_argumento_jobs, ejecutar_por_archivo, reportar_fallos
+from esquema_retc import selector_columnas
+from instrumentacion import agregar_argumento_profile, contar_filas, instrumentar
+from lectura_csv import leer_csv_etapa
+from normalizar_comunas_rm import normalize
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+ID_COL = "id_establecimiento"
+RUT_COLS = ["rut_razon_social", "rut"]
+NOMBRE_COLS = ["nombre_establecimiento", "razon_social"]
+COLUMNAS_IDENTIDAD = ["id_vu", *RUT_COLS, *NOMBRE_COLS, "comuna", *LAT_COLS, *LON_COLS]
+
+DECIMALES_PERFIL = 3  # ~110 m
+DISTANCIA_M = 150.0
+# celdas de al menos 2 * DISTANCIA_M también en longitud (cos 34° ~ 0.83): dos puntos a
+# menos de DISTANCIA_M comparten celda en alguna de las cuatro grillas desplazadas
+CELDA_GRADOS = 0.0033
+SIMILITUD_NOMBRE = 0.6
+SIMILITUD_ALTA = 0.85
+TRIGRAMAS_BLOQUE = 3
+MAX_BLOQUE = 200
+PARES_POR_LOTE = 500_000
+METROS_POR_GRADO = 111_320.0
+
+# formas societarias y palabras vacías que no distinguen establecimientos
+PALABRAS_VACIAS = frozenset({
+    "s", "a", "sa", "spa", "ltda", "limitada", "sociedad", "anonima", "eirl", "cia", "compania",
+    "y", "de", "del", "la", "el", "los", "las",
+})
+
+
+def por_valor(serie: pd.Series, func) -> pd.Series:
+    """`func` aplicada una vez por valor distinto (vacíos como '') y no por fila."""
+    import numpy as np
+    import pandas as pd
+
+    codigos, unicos = pd.factorize(serie.fillna(""), sort=False)
+    valores = np.asarray([func(str(v)) for v in unicos] + [""], dtype=object)
+    return pd.Series(valores[codigos], index=serie.index)
+
+
+def normalizar_rut(texto: str) -> str:
+    """Dígitos + verificador en mayúscula, sin puntos, guion ni ceros a la izquierda ('' si no parece RUT)."""
+    limpio = re.sub(r"[^0-9K]", "", texto.upper()).lstrip("0")
+    return limpio if len(limpio) >= 7 and limpio[:-1].isdigit() else ""
+
+
+def normalizar_nombre(texto: str) -> str:
+    palabras = re.sub(r"[^a-z0-9]+", " ", normalize(texto)).split()
+    return " ".join(p for p in palabras if p not in PALABRAS_VACIAS)
+
+
+def trigramas(nombre: str) -> List[str]:
+    if not nombre:
+        return []
+    relleno = f" {nombre} "
+    return sorted({relleno[i:i + 3] for i in range(len(relleno) - 2)})
+
+
+def clave_registro(df: pd.DataFrame) -> np.ndarray:
+    """Hash (uint64) de las columnas de identidad tal como vienen en el CSV."""
+    import pandas as pd
+
+    columnas = pd.DataFrame({col: df[col] if col in df.columns else None for col in COLUMNAS_IDENTIDAD}, index=df.index)
+    return hash_estable(columnas.fillna("").astype(str))
+
+
+def _registros_tabla(df: pd.DataFrame, columnas: List[str]) -> pd.DataFrame:
+    df = df.reindex(columns=columnas)
+    df["clave"] = clave_registro(df)
+    return df.drop_duplicates(["clave", YEAR_COL])
+
+
+def leer_registros(paths: List[Path], extra: Sequence[pd.DataFrame] = (), con_id: bool = False) -> pd.DataFrame:
+    """Combinaciones distintas de las columnas de identidad, con su clave y el primer año en que aparecen.
+
+    `extra` agrega filas que aún no están en `paths` (p. ej. las de un delta);
+    con `con_id` se conserva además el `id_establecimiento` ya asignado.
+    """
+    import pandas as pd
+
+    columnas = COLUMNAS_IDENTIDAD + [YEAR_COL] + ([ID_COL] if con_id else [])
+    partes = [_registros_tabla(leer_csv_etapa(path, usecols=selector_columnas(columnas)), columnas) for path in paths]
+    partes += [_registros_tabla(df, columnas) for df in extra]
+    registros = pd.concat(partes, ignore_index=True)
+    registros["año_min"] = registros[YEAR_COL].fillna("")
+    registros = registros.sort_values(["clave", "año_min"], kind="stable").drop_duplicates("clave")
+    return registros.drop(columns=[YEAR_COL]).reset_index(drop=True)
+
+
+def perfiles(registros: pd.DataFrame) -> Tuple[pd.DataFrame, np.ndarray]:
+    """(perfiles normalizados distintos, perfil de cada registro)."""
+    import numpy as np
+    import pandas as pd
+
+    normalizado = pd.DataFrame(index=registros.index)
+    normalizado["id_vu"] = coalesce_columns(registros, ["id_vu"]).fillna("")
+    normalizado["rut"] = por_valor(coalesce_columns(registros, RUT_COLS), normalizar_rut)
+    normalizado["comuna"] = por_valor(coalesce_columns(registros, ["comuna"]), normalize)
+    normalizado["nombre"] = por_valor(coalesce_columns(registros, NOMBRE_COLS), normalizar_nombre)
+    lon, lat, _ = evaluar_coordenadas(registros)
+    normalizado["lon"], normalizado["lat"] = lon.round(DECIMALES_PERFIL), lat.round(DECIMALES_PERFIL)
+    perfil, _ = pd.factorize(pd.util.hash_pandas_object(normalizado, index=False), sort=False)
+    primeros = np.unique(perfil, return_index=True)[1]
+    return normalizado.iloc[primeros].reset_index(drop=True), perfil
+
+
+class Trigramas(NamedTuple):
+    perfil: np.ndarray  # perfil de cada (perfil, trigrama), agrupados por perfil
+    trigrama: np.ndarray  # id del trigrama
+    cuenta: np.ndarray  # trigramas de cada perfil
+    inicio: np.ndarray  # posición del primer trigrama de cada perfil
+    total: int  # trigramas distintos
+
+
+def indexar_trigramas(nombres: pd.Series) -> Trigramas:
+    import numpy as np
+    import pandas as pd
+
+    listas = [trigramas(nombre) for nombre in nombres]
+    cuenta = np.fromiter((len(lista) for lista in listas), dtype=np.int64, count=len(listas))
+    ids, unicos = pd.factorize(pd.Series([t for lista in listas for t in lista], dtype=object), sort=False)
+    inicio = np.cumsum(cuenta) - cuenta
+    return Trigramas(np.repeat(np.arange(len(listas)), cuenta), ids.astype(np.int64), cuenta, inicio, max(len(unicos), 1))
+
+
+def _expandir(cuenta: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(dueño, posición dentro del dueño) de cada elemento al repetir cada dueño `cuenta` veces."""
+    import numpy as np
+
+    duenio = np.repeat(np.arange(len(cuenta)), cuenta)
+    return duenio, np.arange(len(duenio)) - np.repeat(np.cumsum(cuenta) - cuenta, cuenta)
+
+
+def claves_bloque(perfil: pd.DataFrame, tri: Trigramas) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Pares (perfil, clave de bloque entera): bloques de `id_vu` y bloques a comparar."""
+    import numpy as np
+    import pandas as pd
+
+    indices = np.arange(len(perfil))
+
+    def bloque(miembros: np.ndarray, valores) -> pd.DataFrame:
+        codigos, _ = pd.factorize(valores, sort=False)
+        return pd.DataFrame({"perfil": miembros, "clave": codigos.astype(np.int64)})
+
+    con_vu = (perfil["id_vu"] != "").to_numpy()
+    vu = bloque(indices[con_vu], perfil["id_vu"].to_numpy()[con_vu])
+
+    partes = []
+    con_rut = (perfil["rut"] != "").to_numpy()
+    partes.append(bloque(indices[con_rut], perfil["rut"].to_numpy()[con_rut]))
+
+    lat, lon = perfil["lat"].to_numpy(), perfil["lon"].to_numpy()
+    con_xy = ~np.isnan(lat)
+    for desfase_fila, desfase_columna in ((0.0, 0.0), (0.0, 0.5), (0.5, 0.0), (0.5, 0.5)):
+        fila = np.floor(lat[con_xy] / CELDA_GRADOS + desfase_fila).astype(np.int64)
+        columna = np.floor(lon[con_xy] / CELDA_GRADOS + desfase_columna).astype(np.int64)
+        partes.append(bloque(indices[con_xy], pd.MultiIndex.from_arrays([fila, columna])))
+
+    if len(tri.trigrama):
+        comuna, _ = pd.factorize(perfil["comuna"], sort=False)
+        clave, _ = pd.factorize(comuna[tri.perfil].astype(np.int64) * tri.total + tri.trigrama, sort=False)
+        frecuencia = np.bincount(clave)[clave]
+        orden = np.lexsort((clave, frecuencia, tri.perfil))
+        rango = np.arange(len(orden)) - tri.inicio[tri.perfil[orden]]
+        raros = orden[rango < TRIGRAMAS_BLOQUE]
+        partes.append(pd.DataFrame({"perfil": tri.perfil[raros], "clave": clave[raros].astype(np.int64)}))
+
+    # claves de distinto tipo en rangos disjuntos
+    desfase = 0
+    for parte in partes:
+        parte["clave"] += desfase
+        desfase = int(parte["clave"].max()) + 1 if len(parte) else desfase
+    return vu, pd.concat(partes, ignore_index=True).drop_duplicates()
+
+
+def _ordenar_bloques(bloques: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(miembros ordenados por bloque, inicio del bloque y tamaño del bloque de cada miembro)."""
+    import numpy as np
+
+    orden = np.argsort(bloques["clave"].to_numpy(), kind="stable")
+    clave = bloques["clave"].to_numpy()[orden]
+    nuevo = np.r_[True, clave[1:] != clave[:-1]] if len(clave) else np.zeros(0, dtype=bool)
+    inicios = np.flatnonzero(nuevo)
+    tamanios = np.diff(np.r_[inicios, len(clave)])
+    bloque = np.cumsum(nuevo) - 1
+    return bloques["perfil"].to_numpy()[orden], inicios[bloque], tamanios[bloque]
+
+
+def aristas_mismo_bloque(bloques: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """Une cada miembro con el primero de su bloque (sin comparar)."""
+    miembros, inicio, _ = _ordenar_bloques(bloques)
+    return miembros[inicio], miembros
+
+
+def pares_candidatos(bloques: pd.DataFrame, n: int) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Pares (i < j) que comparten algún bloque de hasta MAX_BLOQUE perfiles, y bloques omitidos."""
+    import numpy as np
+
+    miembros, inicio, tamanio = _ordenar_bloques(bloques)
+    posicion = np.arange(len(miembros)) - inicio
+    companeros = np.where(tamanio <= MAX_BLOQUE, tamanio - 1 - posicion, 0)
+    origen, k = _expandir(companeros)
+    a, b = miembros[origen], miembros[origen + 1 + k]
+    codigos = np.unique(np.minimum(a, b).astype(np.int64) * n + np.maximum(a, b))
+    omitidos = int(((tamanio > MAX_BLOQUE) & (posicion == 0)).sum())
+    return codigos // n, codigos % n, omitidos
+
+
+def similitud_nombres(tri: Trigramas, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+    """Jaccard de los trigramas del nombre de cada par (0 si alguno no tiene nombre)."""
+    import numpy as np
+
+    claves = np.sort(tri.perfil * tri.total + tri.trigrama)
+    similitud = np.zeros(len(i))
+    if not len(claves):
+        return similitud
+    for desde in range(0, len(i), PARES_POR_LOTE):
+        li, lj = i[desde:desde + PARES_POR_LOTE], j[desde:desde + PARES_POR_LOTE]
+        par, k = _expandir(tri.cuenta[li])
+        buscados = lj[par] * tri.total + tri.trigrama[tri.inicio[li][par] + k]
+        posicion = np.minimum(np.searchsorted(claves, buscados), len(claves) - 1)
+        comunes = np.bincount(par, weights=claves[posicion] == buscados, minlength=len(li))
+        union = tri.cuenta[li] + tri.cuenta[lj] - comunes
+        similitud[desde:desde + len(li)] = np.divide(comunes, union, out=np.zeros(len(li)), where=union > 0)
+    return similitud
+
+
+def coinciden(perfil: pd.DataFrame, tri: Trigramas, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+    """Regla de decisión para cada par candidato."""
+    import numpy as np
+
+    rut = perfil["rut"].to_numpy(dtype=object)
+    comuna = perfil["comuna"].to_numpy(dtype=object)
+    lat, lon = perfil["lat"].to_numpy(), perfil["lon"].to_numpy()
+
+    con_rut = (rut[i] != "") & (rut[j] != "")
+    mismo_rut = con_rut & (rut[i] == rut[j])
+    comuna_compatible = (comuna[i] == comuna[j]) | (comuna[i] == "") | (comuna[j] == "")
+    with np.errstate(invalid="ignore"):
+        dx = (lon[i] - lon[j]) * np.cos(np.radians(lat[i])) * METROS_POR_GRADO
+        dy = (lat[i] - lat[j]) * METROS_POR_GRADO
+        distancia = np.hypot(dx, dy)
+    cerca = distancia <= DISTANCIA_M
+    similitud = similitud_nombres(tri, i, j)
+    evidencia = mismo_rut.astype(int) + cerca.astype(int) + (similitud >= SIMILITUD_NOMBRE).astype(int)
+    # con coordenadas en ambos, la distancia manda: sucursales con el mismo RUT y nombre son establecimientos distintos
+    lejos = distancia > DISTANCIA_M
+    # sin RUT ni coordenadas que lo contradigan (p. ej. años EFP sin ellos), basta un nombre casi idéntico
+    contradicho = (con_rut & ~mismo_rut) | lejos
+    nombre_fuerte = (similitud >= SIMILITUD_ALTA) & (comuna[i] == comuna[j]) & (comuna[i] != "") & ~contradicho
+    return (comuna_compatible & (evidencia >= 2) & ~lejos) | nombre_fuerte
+
+
+def componentes(n: int, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+    """Menor nodo de la componente conexa de cada nodo (propagación de etiquetas con salto de punteros)."""
+    import numpy as np
+
+    etiqueta = np.arange(n)
+    while True:
+        menor = np.minimum(etiqueta[i], etiqueta[j])
+        nueva = etiqueta.copy()
+        np.minimum.at(nueva, i, menor)
+        np.minimum.at(nueva, j, menor)
+        nueva = nueva[nueva]
+        if np.array_equal(nueva, etiqueta):
+            return etiqueta
+        etiqueta = nueva
+
+
+def anclar_sin_coordenadas(etiqueta: np.ndarray, con_xy: np.ndarray, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+    """Une cada grupo sin coordenadas al único grupo con coordenadas con que coincide.
+
+    Un perfil sin coordenadas que coincide con varias sucursales (mismo RUT y
+    nombre, lejos entre sí) las uniría por transitividad; si coincide con más
+    de un grupo con coordenadas queda aparte.
+    """
+    import numpy as np
+
+    grupo_con_xy = np.zeros(len(etiqueta), dtype=bool)
+    grupo_con_xy[etiqueta[con_xy]] = True
+    sin_xy = etiqueta[np.where(con_xy[i], j, i)]
+    otro = etiqueta[np.where(con_xy[i], i, j)]
+    validos = ~grupo_con_xy[sin_xy]
+    pares = np.unique(np.c_[sin_xy[validos], otro[validos]], axis=0)
+    grupos, cuenta = np.unique(pares[:, 0], return_counts=True)
+    pares = pares[np.isin(pares[:, 0], grupos[cuenta == 1])]
+    return componentes(len(etiqueta), pares[:, 0], pares[:, 1])[etiqueta]
+
+
+def resolver(registros: pd.DataFrame) -> pd.Series:
+    """`id_establecimiento` de cada registro (índice = clave del registro)."""
+    import numpy as np
+    import pandas as pd
+
+    perfil, perfil_de_registro = perfiles(registros)
+    n = len(perfil)
+    tri = indexar_trigramas(perfil["nombre"])
+    vu, bloques = claves_bloque(perfil, tri)
+
+    vu_i, vu_j = aristas_mismo_bloque(vu)
+    i, j, omitidos = pares_candidatos(bloques, n)
+    aceptados = coinciden(perfil, tri, i, j)
+    i_ok, j_ok = i[aceptados], j[aceptados]
+    con_xy = ~np.isnan(perfil["lat"].to_numpy())
+    firme = con_xy[i_ok] == con_xy[j_ok]
+    etiqueta = componentes(n, np.r_[vu_i, i_ok[firme]], np.r_[vu_j, j_ok[firme]])
+    grupo = anclar_sin_coordenadas(etiqueta, con_xy, i_ok[~firme], j_ok[~firme])[perfil_de_registro]
+
+    # representante: registro más antiguo (y de menor clave) de cada grupo
+    orden = pd.DataFrame({"grupo": grupo, "año_min": registros["año_min"].to_numpy(), "clave": registros["clave"].to_numpy()})
+    representante = orden.sort_values(["año_min", "clave"]).drop_duplicates("grupo").set_index("grupo")["clave"]
+    hashes = representante.reindex(grupo).to_numpy(dtype=np.uint64)
+    ids = np.char.add("E", np.frombuffer(hashes.astype('>u8').tobytes().hex().encode('ascii'), dtype='S16').astype(str))
+
+    print(f"[i] {len(registros)} registros distintos, {n} perfiles -> {len(representante)} establecimientos; "
+          f"{len(i)} pares comparados de {n * (n - 1) // 2} posibles ({int(aceptados.sum())} coincidencias)")
+    if omitidos:
+        print(f"[i] {omitidos} bloques de más de {MAX_BLOQUE} perfiles omitidos")
+    return pd.Series(ids, index=registros["clave"].to_numpy())
+
+
+def asignar_delta(paths: List[Path], filas: pd.DataFrame) -> Tuple[pd.Series, int]:
+    """Resuelve `filas` nuevas junto a las tablas `paths` que ya tienen `id_establecimiento`.
+
+    Devuelve la asignación (clave del registro -> ID) y cuántos registros de
+    `paths` cambiarían de ID, lo que ocurre si una fila nueva une dos grupos.
+    """
+    import pandas as pd
+
+    registros = leer_registros(paths, [filas], con_id=True)
+    asignacion = resolver(registros.drop(columns=[ID_COL]))
+    anterior = registros[ID_COL].to_numpy()
+    cambian = pd.notna(anterior) & (anterior != asignacion.to_numpy())
+    return asignacion, int(cambian.sum())
+
+
+def process_file(csv_path: Path, asignacion: pd.Series) -> int:
+    import pandas as pd
+
+    df = leer_csv_etapa(csv_path)
+    if ID_COL in df.columns:
+        df.drop(columns=[ID_COL], inplace=True)
+    ids = asignacion.reindex(clave_registro(df)).to_numpy()
+    posicion = df.columns.get_loc("id_unico") + 1 if "id_unico" in df.columns else 0
+    df.insert(posicion, ID_COL, ids)
+    contar_filas(entrada=len(df), salida=len(df))
+    df.to_csv(csv_path, index=False, sep=';', encoding='utf-8-sig', quoting=0, escapechar='\\')
+    return int(pd.Series(ids).nunique())
+
+
+@instrumentar
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="id_establecimiento estable entre años en tablas RM")
+    parser.add_argument(
+        "--indir",
+        default="../data/interim/03_emisiones_rm_fusionadas",
+        help="Carpeta con los CSV a actualizar",
+    )
+    parser.add_argument("--tabla", default=None, help="CSV opcional con cada registro distinto y su id_establecimiento")
+    agregar_argumento_jobs(parser)
+    agregar_argumento_profile(parser)
+    args = parser.parse_args(argv)
+
+    indir = Path(args.indir).expanduser().resolve()
+    if not indir.is_dir():
+        raise SystemExit(f"No se encontró el directorio: {indir}")
+    files = sorted(indir.glob('retc*_RM.csv'))
+    if not files:
+        raise SystemExit(f"No se encontraron tablas RM en {indir}")
+
+    registros = leer_registros(files)
+    asignacion = resolver(registros)
+
+    if args.tabla:
+        tabla_path = Path(args.tabla).expanduser().resolve()
+        tabla_path.parent.mkdir(parents=True, exist_ok=True)
+        tabla = registros.assign(**{ID_COL: asignacion.to_numpy()}).drop(columns=["clave"])
+        tabla.sort_values([ID_COL, "año_min"]).to_csv(tabla_path, index=False, sep=';', encoding='utf-8-sig')
+        print(f"[✓] Registros y establecimientos en {tabla_path}")
+
+    resultados, fallos = ejecutar_por_archivo(process_file, files, asignacion, jobs=args.jobs)
+    for csv_path, establecimientos in resultados:
+        print(f"[✓] {ID_COL} añadido en {csv_path.name} ({establecimientos} establecimientos)")
+    reportar_fallos(fallos)
+
+
+if __name__ == '__main__':
+    main()
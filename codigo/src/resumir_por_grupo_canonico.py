@@ -11,20 +11,28 @@ from __future__ import annotations
 import argparse
 from datetime import datetime
 from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional
 
-import pandas as pd
+from instrumentacion import agregar_argumento_profile, instrumentar
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 # archivos que no representan contaminantes individuales
 SKIP_FILES = set()
 
 
 def load_dataframe(path: Path) -> pd.DataFrame:
+    import pandas as pd
+
     df = pd.read_csv(path, dtype=str)
     # considerar cadenas vacías como nulos para el conteo
     return df.apply(lambda col: col.replace({"": pd.NA}))
 
 
 def summarize_file(path: Path) -> pd.DataFrame:
+    import pandas as pd
+
     df = load_dataframe(path)
     rows = []
     for column in df.columns:
@@ -52,7 +60,8 @@ def resolve_output(default_dir: Path, explicit: str | None) -> Path:
     return default_dir / f"LBP_AIRE_{today}_no_nulos_por_grupo.csv"
 
 
-def main() -> None:
+@instrumentar
+def main(argv: Optional[List[str]] = None) -> None:
     parser = argparse.ArgumentParser(description="Resumen de valores nulos/no nulos por grupo canónico")
     parser.add_argument(
         "--indir",
@@ -64,7 +73,10 @@ def main() -> None:
         default=None,
         help="Ruta del CSV de salida (por defecto outputs/tablas/resumenes/LBP_AIRE_<fecha>_no_nulos_por_grupo.csv)",
     )
-    args = parser.parse_args()
+    agregar_argumento_profile(parser)
+    args = parser.parse_args(argv)
+
+    import pandas as pd
 
     indir = Path(args.indir).expanduser().resolve()
     if not indir.is_dir():
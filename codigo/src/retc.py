@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""Punto de entrada único para las etapas del pipeline RETC.
+
+Cada subcomando corresponde a un script de esta carpeta y recibe los mismos
+argumentos que el script. Los scripts importan pandas, numpy, matplotlib o
+geopandas dentro de las funciones que los usan (en `main`, después de
+`parse_args`), y `retc.py` importa el módulo de la etapa sólo al ejecutarla:
+`python retc.py --help` y `python retc.py <etapa> --help` responden sin
+cargar ninguna librería pesada.
+
+Varias etapas separadas por `+` se ejecutan en un mismo proceso, pagando una
+sola vez el arranque del intérprete y de las librerías:
+
+  python retc.py filtrar --jobs 4 + fusionar_grupos
+  python retc.py contaminantes + ciiu + comunas + emision_total + id_unico
+
+`pipeline` ejecuta las etapas 01–04 con sus rutas por defecto:
+
+  python retc.py pipeline --jobs 4
+  python retc.py pipeline --desde contaminantes --hasta consolidar
+
+`--lector arrow` (antes de la etapa) lee los CSV de las etapas con pyarrow;
+equivale a `RETC_LECTOR=arrow` (ver `lectura_csv.py`):
+
+  python retc.py --lector arrow pipeline --jobs 4
+
+Se ejecuta desde `codigo/src`, igual que los scripts individuales.
+"""
+from __future__ import annotations
+
+import argparse
+import importlib
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from lectura_csv import ENV_LECTOR, LECTORES
+
+# nombre del subcomando -> (módulo, descripción)
+ETAPAS: Dict[str, Tuple[str, str]] = {
+    "descargar": ("descarga_retc", "Descarga los archivos RETC EFP/RUEA del portal"),
+    "inspeccionar": ("inspeccionar_ruea_headers", "Diagnóstico de encabezados y codificación"),
+    "convertir": ("convertir_raw_a_csv_por_ano", "01: RAW -> CSV normalizado por año"),
+    "convertir_excel": ("convertir_excel_a_csv", "Convierte un Excel RETC a CSV estandarizado"),
+    "filtrar": ("filtrar_region_metropolitana", "02: filtra cada año a la Región Metropolitana"),
+    "fusionar_grupos": ("fusionar_emisiones_por_grupo", "03: fusiona años RM por grupo"),
+    "contaminantes": ("estandarizar_contaminantes_rm", "03: nombres canónicos de contaminantes"),
+    "ciiu": ("estandarizar_ciiu_rm", "03: códigos CIIU y macro-actividad"),
+    "comunas": ("normalizar_comunas_rm", "03: nombres canónicos de comunas"),
+    "emision_total": ("agregar_emision_total_rm", "03: columna emision_total"),
+    "id_unico": ("agregar_id_unico_rm", "03: columna id_unico"),
+    "establecimientos": ("resolver_establecimientos_rm", "03: id_establecimiento estable entre años"),
+    "consolidar": ("fusionar_emisiones_consolidadas", "04: consolidado RM único"),
+    "diferencias": ("diferencias_retc", "Delta entre dos publicaciones (etapa 01)"),
+    "aplicar_delta": ("aplicar_delta_retc", "Aplica un delta a las etapas 02–04"),
+    "coordenadas": ("completar_coordenadas_con_centros", "Completa coordenadas con centros comunales"),
+    "calidad_coordenadas": ("calidad_coordenadas", "Calidad de coordenadas por año frente a la caja RM"),
+    "paisaje": ("asignar_unidad_paisaje_rm", "Asigna unidad de paisaje al consolidado"),
+    "enriquecer": ("enriquecer_espacial_rm", "Atributos de varias capas de polígonos en una pasada"),
+    "proximidad": ("proximidad_establecimientos", "Índice de proximidad de establecimientos (radio y k vecinos)"),
+    "rasterizar": ("rasterizar_emisiones_rm", "Rásters de densidad de emisiones por contaminante y año"),
+    "tablas_paisaje": ("generar_tablas_paisaje_markdown", "Tablas Markdown por unidad de paisaje"),
+    "filtrado_region": ("filtrado_region", "Filtra un archivo RUEA por región"),
+    "filtrado_region_todo": ("filtrado_region_todo", "Filtra todos los RUEA/RUEA-EFP por región"),
+    "consolidar_efp": ("consolidar_efp", "Consolida EFP 2005–2022"),
+    "consolidar_global": ("consolidar_global_2005_2023", "Consolida EFP 2005–2022 + RUEA 2023"),
+    "separar_grupos": ("separar_por_grupo_canonico", "Separa el consolidado por grupo canónico"),
+    "resumir_grupos": ("resumir_por_grupo_canonico", "Resumen de nulos por grupo canónico"),
+    "reconstruir": ("reconstruir_emisiones_por_variable", "Fusiona columnas duplicadas por contaminante"),
+    "extractos": ("exportar_extractos_por_variable", "Extractos de columnas clave por contaminante"),
+    "graficar_totales": ("graficar_totales_por_variable", "Gráficos de totales por contaminante"),
+    "graficar_acumulado": ("graficar_acumulado_por_variable", "Gráficos acumulados por contaminante"),
+    "graficar_grupos": ("graficar_emisiones_por_grupo", "Gráficos de emisiones por año y grupo"),
+    "graficar_comunas": ("graficar_acumulado_comuna_contaminante", "Emisiones 2023 por comuna y contaminante"),
+    "graficar_distribucion": (
+        "graficar_distribucion_emisiones_por_contaminante",
+        "Distribución de emisiones por contaminante",
+    ),
+    "sinteticos": ("generar_datos_sinteticos_retc", "Genera descargas RETC sintéticas"),
+    "benchmark": ("medir_rendimiento_pipeline", "Benchmark del pipeline con datos sintéticos"),
+    "benchmark_numeros": ("medir_parseo_numerico", "Microbenchmark del conversor numérico compartido"),
+}
+
+# Etapas 01–04 en orden, con las rutas por defecto encadenadas entre sí
+PIPELINE = [
+    "convertir",
+    "filtrar",
+    "fusionar_grupos",
+    "contaminantes",
+    "ciiu",
+    "comunas",
+    "emision_total",
+    "id_unico",
+    "establecimientos",
+    "consolidar",
+]
+ACEPTAN_JOBS = {"convertir", "filtrar", "contaminantes", "ciiu", "comunas", "emision_total", "id_unico", "establecimientos"}
+SEPARADOR = "+"
+
+
+def resolver_etapa(nombre: str) -> str:
+    """Acepta el nombre del subcomando o el del módulo (`filtrar_region_metropolitana`)."""
+    if nombre in ETAPAS:
+        return nombre
+    for clave, (modulo, _) in ETAPAS.items():
+        if nombre in (modulo, f"{modulo}.py"):
+            return clave
+    raise SystemExit(f"Etapa desconocida: {nombre} (ver `python retc.py --help`)")
+
+
+@contextmanager
+def nombre_programa(nombre: str) -> Iterator[None]:
+    """Hace que el `usage:` de argparse muestre `retc.py <etapa>`."""
+    original = sys.argv[0]
+    sys.argv[0] = f"retc.py {nombre}"
+    try:
+        yield
+    finally:
+        sys.argv[0] = original
+
+
+def ejecutar_etapa(nombre: str, argv: List[str]) -> None:
+    modulo, _ = ETAPAS[nombre]
+    main = importlib.import_module(modulo).main
+    with nombre_programa(nombre):
+        main(argv)
+
+
+def dividir_cadena(argv: List[str]) -> List[Tuple[str, List[str]]]:
+    """Separa `a --x 1 + b --y 2` en [(a, [--x, 1]), (b, [--y, 2])]."""
+    bloques: List[List[str]] = [[]]
+    for token in argv:
+        if token == SEPARADOR:
+            bloques.append([])
+        else:
+            bloques[-1].append(token)
+    cadena = []
+    for bloque in bloques:
+        if not bloque:
+            raise SystemExit(f"Falta el nombre de la etapa junto a '{SEPARADOR}'")
+        cadena.append((resolver_etapa(bloque[0]), bloque[1:]))
+    return cadena
+
+
+def ejecutar_cadena(cadena: List[Tuple[str, List[str]]]) -> None:
+    inicio = time.perf_counter()
+    for nombre, argv in cadena:
+        if len(cadena) > 1:
+            print(f"[i] Etapa {nombre}: {' '.join(argv)}".rstrip())
+        ejecutar_etapa(nombre, argv)
+    if len(cadena) > 1:
+        print(f"[✓] {len(cadena)} etapas completadas en {time.perf_counter() - inicio:.1f} s")
+
+
+def cadena_pipeline(argv: List[str]) -> List[Tuple[str, List[str]]]:
+    parser = argparse.ArgumentParser(
+        prog="retc.py pipeline",
+        description="Ejecuta las etapas 01–04 en un solo proceso con sus rutas por defecto",
+    )
+    parser.add_argument("--desde", default=PIPELINE[0], choices=PIPELINE, help="Primera etapa")
+    parser.add_argument("--hasta", default=PIPELINE[-1], choices=PIPELINE, help="Última etapa")
+    parser.add_argument("--jobs", type=int, default=1, help="Valor de --jobs para las etapas que lo aceptan")
+    args = parser.parse_args(argv)
+
+    desde, hasta = PIPELINE.index(args.desde), PIPELINE.index(args.hasta)
+    if desde > hasta:
+        raise SystemExit("--desde debe ser anterior o igual a --hasta")
+    cadena = []
+    for nombre in PIPELINE[desde : hasta + 1]:
+        cadena.append((nombre, ["--jobs", str(args.jobs)] if nombre in ACEPTAN_JOBS else []))
+    return cadena
+
+
+def extraer_lector(argv: List[str]) -> List[str]:
+    """Consume `--lector X` inicial y lo deja en `RETC_LECTOR` para todas las etapas."""
+    if argv and argv[0].startswith("--lector"):
+        opcion, _, valor = argv[0].partition("=")
+        if opcion == "--lector":
+            if not valor:
+                if len(argv) < 2:
+                    raise SystemExit("--lector requiere un valor")
+                valor, argv = argv[1], argv[1:]
+            if valor not in LECTORES:
+                raise SystemExit(f"--lector debe ser uno de: {', '.join(LECTORES)}")
+            os.environ[ENV_LECTOR] = valor
+            return argv[1:]
+    return argv
+
+
+def ayuda() -> str:
+    ancho = max(len(nombre) for nombre in ETAPAS)
+    lineas = [
+        "uso: python retc.py [--lector {pandas,arrow}] <etapa> [argumentos] [+ <etapa> [argumentos] ...]",
+        "     python retc.py [--lector {pandas,arrow}] pipeline [--desde ETAPA] [--hasta ETAPA] [--jobs N]",
+        "",
+        "Cada etapa acepta los argumentos de su script (`python retc.py <etapa> --help`).",
+        "--lector arrow lee los CSV de las etapas con pyarrow (como RETC_LECTOR=arrow).",
+        "",
+        "etapas:",
+    ]
+    lineas += [f"  {nombre.ljust(ancho)}  {descripcion}" for nombre, (_, descripcion) in ETAPAS.items()]
+    lineas.append(f"  {'pipeline'.ljust(ancho)}  Etapas 01–04 en orden ({', '.join(PIPELINE)})")
+    return "\n".join(lineas)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = extraer_lector(list(sys.argv[1:] if argv is None else argv))
+    if not argv or argv[0] in ("-h", "--help"):
+        print(ayuda())
+        return
+    if argv[0] == "pipeline":
+        ejecutar_cadena(cadena_pipeline(argv[1:]))
+        return
+    ejecutar_cadena(dividir_cadena(argv))
+
+
+if __name__ == "__main__":
+    main()
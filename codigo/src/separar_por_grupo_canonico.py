@@ -12,7 +12,10 @@ Uso:
 """
 import argparse, re
 from pathlib import Path
-import pandas as pd
+
+from exportar_xlsx import escribir_xlsx
+from instrumentacion import agregar_argumento_profile, contar_filas, instrumentar
+from lectura_csv import leer_csv_detectado
 
 # ====== Mapeo ID -> Grupo canónico (ajústalo si sumas IDs) ======
 ID_A_GRUPO = {
@@ -50,22 +53,22 @@ def slug(s: str) -> str:
     s = re.sub(r"\\s+", "_", s.strip())
     return s
 
-def main():
+@instrumentar
+def main(argv=None):
     ap = argparse.ArgumentParser()
     ap.add_argument("--in", dest="infile", required=True, help="CSV consolidado (2005–2023)")
     ap.add_argument("--outdir", required=True, help="Carpeta de salida para los CSV por grupo")
     ap.add_argument("--xlsx", action="store_true", help="Además, exportar XLSX por grupo")
-    args = ap.parse_args()
+    agregar_argumento_profile(ap)
+    args = ap.parse_args(argv)
 
     infile = Path(args.infile).expanduser().resolve()
     outdir = Path(args.outdir).expanduser().resolve()
     outdir.mkdir(parents=True, exist_ok=True)
 
-    # Leer CSV (intenta utf-8, luego latin-1)
-    try:
-        df = pd.read_csv(infile, dtype=str)
-    except Exception:
-        df = pd.read_csv(infile, dtype=str, encoding="latin-1")
+    df = leer_csv_detectado(infile)
+
+    contar_filas(entrada=len(df), salida=len(df))
 
     # Detectar columna de ID
     id_col = "id_contaminantes" if "id_contaminantes" in df.columns else (
@@ -101,9 +104,9 @@ def main():
         sub.to_csv(outdir / fname, index=False, encoding="utf-8-sig")
         if args.xlsx:
             try:
-                sub.to_excel(outdir / f"{slug(g)}.xlsx", index=False)
-            except Exception:
-                pass
+                escribir_xlsx(sub, outdir / f"{slug(g)}.xlsx")
+            except Exception as e:
+                print(f"[!] No se pudo exportar {slug(g)}.xlsx: {e}")
 
     print("✓ Separación completada")
     print("  Entrada :", infile)
@@ -0,0 +1,136 @@
+"""Unión por columnas de CSV con esquemas distintos, leída y escrita por bloques.
+
+El esquema de salida (superconjunto ordenado de columnas) se calcula sólo con
+los encabezados (`columnas_entrada`, `esquema_union`). Luego
+`escribir_union` recorre cada entrada por bloques de `CHUNK_ROWS` filas, la
+lleva a ese esquema (renombres, columnas constantes y vacíos para las que
+faltan) y la agrega a uno o varios archivos de salida. La memoria queda
+acotada por el tamaño del bloque y cada entrada se lee una sola vez aunque
+alimente varias salidas (p. ej. un bloque de años y el consolidado total).
+Si una entrada utf-8 tiene un byte no válido después de la parte ya escrita,
+se descartan sus filas de las salidas y se vuelve a leer como latin-1.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Sequence
+
+from instrumentacion import contar_filas
+from lectura_csv import es_utf8
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+CHUNK_ROWS = 200_000
+
+
+class EntradaUnion(NamedTuple):
+    path: Path
+    renombres: Mapping[str, str] = {}
+    constantes: Mapping[str, str] = {}
+    encoding: str = "utf-8"
+
+
+class SalidaUnion(NamedTuple):
+    path: Path
+    columnas: List[str]
+    entradas: Sequence[EntradaUnion]
+
+
+def leer_encabezado(path: Path, encoding: str = "utf-8") -> List[str]:
+    """Nombres de columna tal como los entrega `pd.read_csv`, sin leer filas."""
+    import pandas as pd
+
+    return [str(col) for col in pd.read_csv(path, nrows=0, dtype=str, encoding=encoding).columns]
+
+
+def columnas_entrada(entrada: EntradaUnion) -> List[str]:
+    """Columnas de la entrada tras los renombres (sin las constantes)."""
+    return [entrada.renombres.get(col, col) for col in leer_encabezado(entrada.path, entrada.encoding)]
+
+
+def esquema_union(*grupos: Iterable[str]) -> List[str]:
+    """Superconjunto de columnas en orden de primera aparición."""
+    return list(dict.fromkeys(col for grupo in grupos for col in grupo))
+
+
+def _bloques(
+    entrada: EntradaUnion, columnas: Sequence[str], chunksize: int, opciones: Dict[str, Any]
+) -> Iterator[pd.DataFrame]:
+    # sólo se leen las columnas (con su nombre original) que alguna salida necesita
+    import pandas as pd
+
+    necesarias = set(columnas)
+    originales = {col for col, nuevo in entrada.renombres.items() if nuevo in necesarias}
+    reader = pd.read_csv(
+        entrada.path,
+        dtype=str,
+        encoding=entrada.encoding,
+        usecols=lambda col: col in necesarias or col in originales,
+        chunksize=chunksize,
+        **opciones,
+    )
+    with reader:
+        for chunk in reader:
+            chunk = chunk.rename(columns=dict(entrada.renombres))
+            for col, valor in entrada.constantes.items():
+                chunk[col] = valor
+            yield chunk
+
+
+def _agregar_entrada(
+    entrada: EntradaUnion,
+    destinos: Sequence[SalidaUnion],
+    columnas: Sequence[str],
+    chunksize: int,
+    opciones: Dict[str, Any],
+    filas: Dict[Path, int],
+) -> int:
+    leidas = 0
+    for chunk in _bloques(entrada, columnas, chunksize, opciones):
+        leidas += len(chunk)
+        for salida in destinos:
+            bloque = chunk.reindex(columns=salida.columnas, fill_value="")
+            bloque.to_csv(salida.path, mode="a", header=False, index=False, encoding="utf-8")
+            filas[salida.path] += len(bloque)
+    return leidas
+
+
+def escribir_union(
+    salidas: Sequence[SalidaUnion],
+    chunksize: int = CHUNK_ROWS,
+    **opciones: Any,
+) -> Dict[Path, int]:
+    """Escribe cada salida como CSV `utf-8-sig` y devuelve las filas de cada una.
+
+    `opciones` se pasa a `pd.read_csv` (p. ej. `keep_default_na=False`).
+    Una entrada que figura en varias salidas se lee una sola vez.
+    """
+    import pandas as pd
+
+    filas = {salida.path: 0 for salida in salidas}
+    for salida in salidas:
+        pd.DataFrame(columns=salida.columnas).to_csv(salida.path, index=False, encoding="utf-8-sig")
+
+    entradas: List[EntradaUnion] = []
+    for salida in salidas:
+        entradas += [entrada for entrada in salida.entradas if entrada not in entradas]
+    for entrada in entradas:
+        destinos = [salida for salida in salidas if entrada in salida.entradas]
+        columnas = esquema_union(*(salida.columnas for salida in destinos))
+        inicio = {salida.path: (salida.path.stat().st_size, filas[salida.path]) for salida in destinos}
+        try:
+            leidas = _agregar_entrada(entrada, destinos, columnas, chunksize, opciones, filas)
+        except UnicodeDecodeError:
+            if not es_utf8(entrada.encoding):
+                raise
+            print(f"[!] {entrada.path.name}: bytes no válidos en {entrada.encoding}; se relee como latin-1")
+            for path, (tamano, previas) in inicio.items():
+                with path.open("r+b") as fh:
+                    fh.truncate(tamano)
+                filas[path] = previas
+            entrada_latin1 = entrada._replace(encoding="latin-1")
+            leidas = _agregar_entrada(entrada_latin1, destinos, columnas, chunksize, opciones, filas)
+        contar_filas(entrada=leidas)
+    contar_filas(salida=sum(filas.values()))
+    return filas
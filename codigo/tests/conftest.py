@@ -0,0 +1,8 @@
+"""Los scripts de `codigo/src` se importan como módulos sueltos, igual que al ejecutarlos."""
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+# las pruebas que llaman a `main` no deben escribir en outputs/metricas
+os.environ.setdefault("RETC_METRICAS", "off")
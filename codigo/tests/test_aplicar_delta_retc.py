@@ -0,0 +1,30 @@
+import warnings
+
+import pandas as pd
+
+from aplicar_delta_retc import update_stage04
+
+
+def test_update_stage04_conserva_columnas_posteriores(tmp_path):
+    consolidado = tmp_path / "retc_consolidado.csv"
+    pd.DataFrame(
+        {
+            "id_unico": ["a", "b", "c"],
+            "año": ["2020", "2020", "2021"],
+            "rut": ["1-9", "2-7", "3-5"],
+            "latitud_nueva": ["-33.4", "-33.5", "-33.6"],
+            "unidad_paisaje": ["P1", "P2", "P3"],
+        }
+    ).to_csv(consolidado, index=False, sep=";", encoding="utf-8-sig")
+    nuevas = pd.DataFrame({"id_unico": ["d"], "año": ["2021"], "rut_razon_social": ["4-3"]})
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        update_stage04(consolidado, {"b"}, nuevas, chunksize=2)
+
+    resultado = pd.read_csv(consolidado, sep=";", dtype=str, encoding="utf-8-sig")
+    assert list(resultado.columns) == ["id_unico", "año", "rut", "latitud_nueva", "unidad_paisaje"]
+    assert resultado["id_unico"].tolist() == ["a", "c", "d"]
+    assert resultado["unidad_paisaje"].tolist()[:2] == ["P1", "P3"]
+    assert resultado["rut"].tolist()[2] == "4-3"
+    assert resultado.loc[2, ["latitud_nueva", "unidad_paisaje"]].isna().all()
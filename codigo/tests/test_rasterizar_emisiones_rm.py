@@ -0,0 +1,27 @@
+import pytest
+
+from rasterizar_emisiones_rm import capas_png, main
+
+
+def test_capas_png_ultimo_ano_por_contaminante():
+    claves = [("CO", "2021"), ("CO", "2022"), ("NOX", "2020"), ("NOX", "2021"), ("SO2", "2019")]
+    assert capas_png(claves, todas=False) == [1, 3, 4]
+    assert capas_png(claves, todas=True) == [0, 1, 2, 3, 4]
+
+
+def test_vistas_previas_por_defecto(tmp_path):
+    # con una figura por capa, las vistas previas de todas las capas superaban
+    # al resto del pipeline; por defecto sólo se dibuja el último año
+    pytest.importorskip("matplotlib")
+    pytest.importorskip("pyproj")
+    consolidado = tmp_path / "retc_RM_consolidado.csv"
+    filas = ["año;contaminante_canon;emision_total;latitud;longitud"]
+    filas += [f"{año};{c};1,5;-33.45;-70.65" for c in ("CO", "NOX") for año in ("2020", "2021", "2022")]
+    consolidado.write_text("\n".join(filas) + "\n", encoding="utf-8-sig")
+
+    main(["--consolidado", str(consolidado), "--outdir", str(tmp_path / "a")])
+    assert sorted(p.name.split("_densidad_")[1] for p in (tmp_path / "a").glob("*.png")) == [
+        "CO_2022.png", "NOX_2022.png"
+    ]
+    main(["--consolidado", str(consolidado), "--outdir", str(tmp_path / "b"), "--png-todos"])
+    assert len(list((tmp_path / "b").glob("*.png"))) == 6